@@ -0,0 +1,41 @@
+"""Shared helpers for handler tests."""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+from unittest.mock import MagicMock
+
+from worker2.ssh import CommandResult
+
+
+def make_ssh_result(stdout: str = "", stderr: str = "", exit_code: int = 0) -> CommandResult:
+    return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
+
+
+def make_mock_job(
+    process_instance_key: int = 2251799813793035,
+    element_instance_key: int = 2251799813793040,
+    bpmn_process_id: str = "upstream-sync",
+) -> MagicMock:
+    """Create a mock pyzeebe Job with required attributes."""
+    job = MagicMock()
+    job.process_instance_key = process_instance_key
+    job.element_instance_key = element_instance_key
+    job.bpmn_process_id = bpmn_process_id
+    return job
+
+
+def extract_handlers(register: Callable[..., None], *args: Any) -> dict:
+    """Register handlers and capture them from mock worker."""
+    handlers: dict = {}
+
+    def task_decorator(task_type: str, **kwargs):
+        def wrapper(fn):
+            handlers[task_type] = fn
+            return fn
+        return wrapper
+
+    worker = MagicMock()
+    worker.task = task_decorator
+    register(worker, *args)
+    return handlers
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import os
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from worker.config import (
+# Keep a developer's local .env.camunda out of the test environment.
+os.environ.setdefault("CAMUNDA_SKIP_DOTENV", "1")
+
+from worker.config import (  # noqa: E402
     AppConfig,
     GitHubConfig,
     OdooConfig,
@@ -16,7 +20,51 @@ from worker.config import (
 )
 
 
-@pytest.fixture
+# ── Collection hooks ──────────────────────────────────────
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--cov-all",
+        action="store_true",
+        default=False,
+        help="Trace handler mock tests under pytest-cov as well.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # pytest-cov / pytest-xdist register these markers themselves; keep them
+    # known when the plugins are not installed.
+    config.addinivalue_line(
+        "markers", "no_cover: disable coverage tracing for this test",
+    )
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run tests of one group on the same xdist worker",
+    )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item],
+) -> None:
+    """Tag handler mock tests for coverage and xdist scheduling.
+
+    Each ``test_handlers_*`` file is pinned to a single xdist worker
+    (``pytest -n auto --dist loadgroup``) so its fixtures are built once,
+    while different files still fan out across workers. Coverage tracing
+    is skipped for these files unless ``--cov-all`` is given.
+    """
+    cov_all = config.getoption("--cov-all")
+    no_cover = pytest.mark.no_cover
+    for item in items:
+        if not item.path.name.startswith("test_handlers_"):
+            continue
+        item.add_marker(pytest.mark.xdist_group(name=item.path.stem))
+        if not cov_all:
+            item.add_marker(no_cover)
+
+
+# Configs are frozen, so one instance per module is safe to share.
+@pytest.fixture(scope="module")
 def staging_server() -> ServerConfig:
     return ServerConfig(
         host="staging.example.com",
@@ -27,7 +75,7 @@ def staging_server() -> ServerConfig:
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def production_server() -> ServerConfig:
     return ServerConfig(
         host="prod.example.com",
@@ -38,7 +86,7 @@ def production_server() -> ServerConfig:
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def app_config(staging_server: ServerConfig) -> AppConfig:
     return AppConfig(
         zeebe=ZeebeConfig(gateway_address="localhost:26500"),
@@ -60,7 +108,7 @@ def app_config(staging_server: ServerConfig) -> AppConfig:
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def app_config_with_production(
     staging_server: ServerConfig,
     production_server: ServerConfig,
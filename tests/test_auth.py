@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -80,7 +82,7 @@ def test_token_manager_refresh() -> None:
     mock_response.json.return_value = {"access_token": "new-token-123"}
     mock_response.raise_for_status = MagicMock()
 
-    with patch("httpx.post", return_value=mock_response) as mock_post:
+    with patch("httpx.Client.post", return_value=mock_response) as mock_post:
         token = mgr.refresh_token()
 
     assert token == "new-token-123"
@@ -90,3 +92,64 @@ def test_token_manager_refresh() -> None:
     assert call_kwargs[0][0] == "https://auth.example.com/token"
     assert call_kwargs[1]["data"]["client_id"] == "id"
     assert call_kwargs[1]["data"]["audience"] == "zeebe-api"
+
+
+def test_token_manager_reuses_http_client() -> None:
+    mgr = TokenManager(
+        client_id="id",
+        client_secret="secret",
+        token_url="https://auth.example.com/token",
+    )
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"access_token": "tok"}
+
+    with patch("httpx.Client.post", return_value=mock_response):
+        mgr.refresh_token()
+        client = mgr._client
+        mgr.refresh_token()
+        assert mgr._client is client
+
+    mgr.close()
+    assert mgr._client is None
+
+
+def test_cached_token_serves_token_within_grace() -> None:
+    mgr = TokenManager(client_id="id", client_secret="secret", token_url="https://t")
+    mgr._token = "old-token"
+    # Refresh deadline just passed; the background loop is still catching up
+    mgr._expires_at = time.monotonic() - 1.0
+    with patch.object(TokenManager, "refresh_token") as mock_refresh:
+        assert mgr.cached_token == "old-token"
+    mock_refresh.assert_not_called()
+
+
+def test_cached_token_refreshes_expired_token() -> None:
+    mgr = TokenManager(client_id="id", client_secret="secret", token_url="https://t")
+    mgr._token = "old-token"
+    mgr._expires_at = time.monotonic() - 60.0
+    with patch.object(TokenManager, "refresh_token", return_value="new-token") as mock_refresh:
+        assert mgr.cached_token == "new-token"
+    mock_refresh.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_renews_token() -> None:
+    mgr = TokenManager(client_id="id", client_secret="secret", token_url="https://t")
+    calls = []
+
+    def fake_refresh() -> str:
+        calls.append(1)
+        mgr._token = f"token-{len(calls)}"
+        mgr._expires_at = float("inf")
+        return mgr._token
+
+    with patch.object(mgr, "refresh_token", side_effect=fake_refresh):
+        mgr.start_background_refresh()
+        for _ in range(50):
+            if calls:
+                break
+            await asyncio.sleep(0.01)
+        mgr.close()
+
+    assert mgr.cached_token == "token-1"
+    assert mgr._refresh_task is None
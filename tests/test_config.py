@@ -95,3 +95,8 @@ def test_resolve_server_by_host(app_config: AppConfig) -> None:
 def test_resolve_server_missing(app_config: AppConfig) -> None:
     with pytest.raises(ValueError, match="No server config"):
         app_config.resolve_server("unknown-host")
+
+
+def test_resolve_server_name_by_host(app_config_with_production: AppConfig) -> None:
+    assert app_config_with_production.resolve_server_name("prod.example.com") == "production"
+    assert app_config_with_production.resolve_server("prod.example.com").db_name == "odoo19prod"
@@ -0,0 +1,39 @@
+"""Tests for worker2.github_cache — TTL/LRU MemoryCache."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from worker2.github_cache import CacheKeys, MemoryCache
+
+
+def test_get_returns_value_until_expiry() -> None:
+    cache = MemoryCache()
+    with patch("worker2.github_cache.time.monotonic", return_value=100.0):
+        cache.set("k", {"a": 1}, ttl_ms=1_000)
+    with patch("worker2.github_cache.time.monotonic", return_value=100.5):
+        assert cache.get("k") == {"a": 1}
+    with patch("worker2.github_cache.time.monotonic", return_value=101.0):
+        assert cache.get("k") is None
+
+
+def test_lru_eviction_keeps_recently_read() -> None:
+    cache = MemoryCache(max_size=2)
+    cache.set("a", 1, ttl_ms=60_000)
+    cache.set("b", 2, ttl_ms=60_000)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl_ms=60_000)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_delete_and_keys() -> None:
+    cache = MemoryCache()
+    key = CacheKeys.pr("tut-ua/repo", 7)
+    cache.set(key, {"number": 7}, ttl_ms=60_000)
+    cache.delete(key)
+    cache.delete(key)
+    assert cache.get(key) is None
+    assert key == "pr:tut-ua/repo#7"
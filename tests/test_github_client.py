@@ -1,4 +1,4 @@
-"""Tests for worker.github_client — GitHubClient async HTTP operations."""
+"""Tests for worker2.github_client — GitHubClient async HTTP operations."""
 
 from __future__ import annotations
 
@@ -6,7 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from worker.github_client import GitHubClient
+from worker2.github_client import GitHubClient
 
 
 @pytest.fixture
@@ -19,9 +19,14 @@ def github_no_deploy_pat() -> GitHubClient:
     return GitHubClient(token="ghp_test")
 
 
-def _mock_response(status_code: int = 200, json_data: dict | None = None) -> MagicMock:
+def _mock_response(
+    status_code: int = 200,
+    json_data: dict | None = None,
+    headers: dict[str, str] | None = None,
+) -> MagicMock:
     resp = MagicMock()
     resp.status_code = status_code
+    resp.headers = headers or {}
     resp.json.return_value = json_data or {}
     resp.raise_for_status = MagicMock()
     return resp
@@ -41,8 +46,8 @@ async def test_get_pr(github: GitHubClient) -> None:
 
     assert result["number"] == 42
     call_args = instance.request.call_args
-    assert call_args[0][0] == "GET"
-    assert "/repos/tut-ua/odoo-enterprise/pulls/42" in call_args[0][1]
+    assert call_args.args[0] == "GET"
+    assert "/repos/tut-ua/odoo-enterprise/pulls/42" in call_args.args[1]
 
 
 @pytest.mark.asyncio
@@ -57,7 +62,7 @@ async def test_merge_pr_squash(github: GitHubClient) -> None:
 
         await github.merge_pr("tut-ua/repo", 10, method="squash")
 
-    call_kwargs = instance.request.call_args[1]
+    call_kwargs = instance.request.call_args.kwargs
     assert call_kwargs["json"]["merge_method"] == "squash"
 
 
@@ -74,9 +79,9 @@ async def test_comment_pr(github: GitHubClient) -> None:
         await github.comment_pr("tut-ua/repo", 10, "LGTM")
 
     call_args = instance.request.call_args
-    assert call_args[0][0] == "POST"
-    assert "/issues/10/comments" in call_args[0][1]
-    assert call_args[1]["json"]["body"] == "LGTM"
+    assert call_args.args[0] == "POST"
+    assert "/issues/10/comments" in call_args.args[1]
+    assert call_args.kwargs["json"]["body"] == "LGTM"
 
 
 @pytest.mark.asyncio
@@ -92,7 +97,7 @@ async def test_create_pr_uses_deploy_pat(github: GitHubClient) -> None:
         await github.create_pr("tut-ua/repo", "feat", "main", "Title")
 
     call_args = instance.request.call_args
-    headers = call_args[1]["headers"]
+    headers = call_args.kwargs["headers"]
     assert "ghp_deploy" in headers["Authorization"]
 
 
@@ -120,3 +125,184 @@ async def test_get_pr_diff():
 
     assert "diff --git" in diff
     assert "+new line" in diff
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_across_calls(github: GitHubClient) -> None:
+    mock_resp = _mock_response(json_data={"number": 42})
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(return_value=mock_resp)
+        MockClient.return_value = instance
+
+        await github.get_pr("tut-ua/repo", 42)
+        await github.comment_pr("tut-ua/repo", 42, "LGTM")
+        await github.aclose()
+
+    MockClient.assert_called_once()
+    assert instance.request.await_count == 2
+    instance.aclose.assert_awaited_once()
+
+
+def test_http_client_uses_http2(github: GitHubClient) -> None:
+    with patch("httpx.AsyncClient") as MockClient, \
+            patch("worker2.github_client._HTTP2_AVAILABLE", True):
+        github._http()
+
+    assert MockClient.call_args.kwargs["http2"] is True
+
+
+def test_http_client_falls_back_without_h2(github: GitHubClient) -> None:
+    with patch("httpx.AsyncClient") as MockClient, \
+            patch("worker2.github_client._HTTP2_AVAILABLE", False):
+        github._http()
+
+    assert MockClient.call_args.kwargs["http2"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_pr_is_cached_until_write(github: GitHubClient) -> None:
+    mock_resp = _mock_response(json_data={"number": 42, "node_id": "PR_1"})
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(return_value=mock_resp)
+        MockClient.return_value = instance
+
+        await github.get_pr("tut-ua/repo", 42)
+        await github.get_pr("tut-ua/repo", 42)
+        assert instance.request.await_count == 1
+
+        await github.get_pr("tut-ua/repo", 42, cached=False)
+        assert instance.request.await_count == 2
+
+        await github.comment_pr("tut-ua/repo", 42, "LGTM")
+        await github.get_pr("tut-ua/repo", 42)
+        assert instance.request.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_bot_review_comment_is_newest_match(github: GitHubClient) -> None:
+    comments = [
+        {"id": 1, "body": "## PR Reviewer Guide (old)"},
+        {"id": 2, "body": None},
+        {"id": 3, "body": "## PR Reviewer Guide (new)"},
+        {"id": 4, "body": "thanks"},
+    ]
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(return_value=_mock_response(json_data=comments))
+        MockClient.return_value = instance
+
+        comment = await github.get_bot_review_comment("tut-ua/repo", 42)
+
+    assert comment["id"] == 3
+
+
+@pytest.mark.asyncio
+async def test_bot_review_comment_scans_all_pages(github: GitHubClient) -> None:
+    comments = [{"id": i, "body": "note"} for i in range(150)]
+    comments[120]["body"] = "## PR Reviewer Guide"
+
+    async def request(method, url, params, **kwargs):
+        page, per_page = params["page"], params["per_page"]
+        return _mock_response(json_data=comments[(page - 1) * per_page:page * per_page])
+
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(side_effect=request)
+        MockClient.return_value = instance
+
+        comment = await github.get_bot_review_comment("tut-ua/repo", 42)
+
+    assert comment["id"] == 120
+    # page 1, then one prefetch window of four pages
+    assert instance.request.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_find_comment_matches_marker(github: GitHubClient) -> None:
+    comments = [
+        {"id": 1, "body": None},
+        {"id": 2, "body": "## Codex Code Review — Score: 8/10"},
+        {"id": 3, "body": "thanks"},
+    ]
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(return_value=_mock_response(json_data=comments))
+        MockClient.return_value = instance
+
+        found = await github.find_comment("tut-ua/repo", 42, "Codex Code Review")
+        missing = await github.find_comment("tut-ua/repo", 42, "Staging Deploy Status")
+
+    assert found["id"] == 2
+    assert missing is None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured(github: GitHubClient) -> None:
+    limited = _mock_response(status_code=429, headers={"Retry-After": "2"})
+    ok = _mock_response(json_data={"number": 42})
+    with patch("httpx.AsyncClient") as MockClient, \
+            patch("worker2.github_client.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        instance = AsyncMock()
+        instance.request = AsyncMock(side_effect=[limited, ok])
+        MockClient.return_value = instance
+
+        result = await github.get_pr("tut-ua/repo", 42)
+
+    assert result["number"] == 42
+    assert instance.request.await_count == 2
+    mock_sleep.assert_awaited_once_with(2.0)
+
+
+@pytest.mark.asyncio
+async def test_plain_403_is_not_retried(github: GitHubClient) -> None:
+    forbidden = _mock_response(status_code=403)
+    forbidden.raise_for_status.side_effect = RuntimeError("403 Forbidden")
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(return_value=forbidden)
+        MockClient.return_value = instance
+
+        with pytest.raises(RuntimeError, match="403"):
+            await github.get_pr("tut-ua/repo", 42)
+
+    assert instance.request.await_count == 1
+
+
+def test_low_quota_paces_next_request(github: GitHubClient) -> None:
+    resp = _mock_response(headers={
+        "X-RateLimit-Remaining": "10",
+        "X-RateLimit-Reset": "1100",
+    })
+    with patch("worker2.github_client.time.time", return_value=1000.0):
+        github._track_rate_limit(resp)
+
+    assert github._next_request_at == pytest.approx(1010.0)
+
+
+@pytest.mark.asyncio
+async def test_find_own_comment_ignores_other_authors(github: GitHubClient) -> None:
+    comments = [
+        {"id": 1, "user": {"login": "camunda-bot"}, "body": "## Codex Code Review — old"},
+        {"id": 2, "user": {"login": "camunda-bot"}, "body": "## Codex Code Review — new"},
+        {"id": 3, "user": {"login": "someone"}, "body": "## Codex Code Review — forged"},
+    ]
+
+    async def request(method, url, **kwargs):
+        if url.endswith("/user"):
+            return _mock_response(json_data={"login": "camunda-bot"})
+        return _mock_response(json_data=comments)
+
+    with patch("httpx.AsyncClient") as MockClient:
+        instance = AsyncMock()
+        instance.request = AsyncMock(side_effect=request)
+        MockClient.return_value = instance
+
+        found = await github.find_own_comment("tut-ua/repo", 42, "Codex Code Review")
+        await github.find_own_comment("tut-ua/repo", 42, "Codex Code Review")
+
+    assert found["id"] == 2
+    # the login is looked up once and cached
+    user_calls = [c for c in instance.request.await_args_list if c.args[1].endswith("/user")]
+    assert len(user_calls) == 1
@@ -1,34 +1,20 @@
-"""Tests for worker.handlers.audit — audit analysis handler."""
+"""Tests for worker2.handlers.audit — audit analysis handler and script."""
 
 from __future__ import annotations
 
 import json
+import subprocess
+import sys
+import types
+from typing import Iterator
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from worker.config import AppConfig, ServerConfig
-from worker.handlers.audit import register_audit_handlers
-from worker.ssh import CommandResult
+from worker2.config import AppConfig, ServerConfig
+from worker2.handlers.audit import _ANALYSIS_SCRIPT, _SCRIPT_PATH, register_audit_handlers
 
-
-def _make_ssh_result(stdout: str = "", stderr: str = "", exit_code: int = 0) -> CommandResult:
-    return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
-
-
-def _extract_handlers(config: AppConfig, ssh: AsyncMock) -> dict:
-    handlers = {}
-
-    def task_decorator(task_type: str, **kwargs):
-        def wrapper(fn):
-            handlers[task_type] = fn
-            return fn
-        return wrapper
-
-    worker = MagicMock()
-    worker.task = task_decorator
-    register_audit_handlers(worker, config, ssh)
-    return handlers
+from ._helpers import extract_handlers, make_ssh_result
 
 
 @pytest.fixture
@@ -43,16 +29,39 @@ def kozak_config() -> AppConfig:
     )
 
 
+async def _stream(*lines: str):
+    for line in lines:
+        yield line + "\n"
+
+
+def _ndjson(conflicts: list[dict], stats: dict, extension_points_scanned: int = 0) -> list[str]:
+    summary = {"stats": stats, "extension_points_scanned": extension_points_scanned}
+    return [json.dumps(c) for c in conflicts] + [json.dumps(summary)]
+
+
 @pytest.fixture
 def mock_ssh() -> AsyncMock:
     ssh = AsyncMock()
-    ssh.run = AsyncMock()
+    ssh.run = AsyncMock(return_value=make_ssh_result())
+    ssh.run_stream = MagicMock(return_value=_stream())
     return ssh
 
 
+@pytest.fixture(scope="module")
+def script() -> Iterator[dict]:
+    """Namespace of the remote analysis script, executed locally."""
+    module = types.ModuleType("_audit_analyze")
+    sys.modules[module.__name__] = module  # process pool pickles functions by module
+    try:
+        exec(compile(_ANALYSIS_SCRIPT, "_audit_analyze.py", "exec"), module.__dict__)
+        yield module.__dict__
+    finally:
+        del sys.modules[module.__name__]
+
+
 @pytest.fixture
 def handlers(kozak_config: AppConfig, mock_ssh: AsyncMock) -> dict:
-    return _extract_handlers(kozak_config, mock_ssh)
+    return extract_handlers(register_audit_handlers, kozak_config, mock_ssh)
 
 
 # ── audit-analysis ────────────────────────────────────────
@@ -69,8 +78,8 @@ async def test_audit_no_changed_modules(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_audit_success_with_conflicts(handlers: dict, mock_ssh: AsyncMock) -> None:
-    audit_output = json.dumps({
-        "conflicts": [
+    mock_ssh.run_stream.return_value = _stream(*_ndjson(
+        [
             {"id": 1, "severity": "critical", "type": "python_override",
              "custom_module": "tut_hr", "target": "hr.employee.write",
              "base_file": "src/enterprise/hr/models/hr.py"},
@@ -78,57 +87,352 @@ async def test_audit_success_with_conflicts(handlers: dict, mock_ssh: AsyncMock)
              "custom_module": "tut_web", "target": "WebClient",
              "base_module": "web"},
         ],
-        "stats": {"total": 2, "critical": 1, "warning": 1, "info": 0},
-        "extension_points": 15,
-    })
-    mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # write script
-        _make_ssh_result(),  # git add -N
-        _make_ssh_result(stdout=audit_output),  # run script
-        _make_ssh_result(),  # rm script
-    ]
+        {"total": 2, "critical": 1, "warning": 1, "info": 0},
+        extension_points_scanned=15,
+    ))
     result = await handlers["audit-analysis"](changed_modules="hr, web", workspace_dir="/tmp/ws")
     assert result["audit_conflicts"] == 2
     assert result["audit_critical"] == 1
     assert result["audit_warning"] == 1
     assert "tut_hr" in result["audit_report"]
+    assert "**Extension points scanned:** 15" in result["audit_report"]
+    assert _SCRIPT_PATH in mock_ssh.run_stream.call_args[0][1]
 
 
 @pytest.mark.asyncio
-async def test_audit_script_failure(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # write script
-        _make_ssh_result(),  # git add -N
-        _make_ssh_result(stdout="", exit_code=1),  # script failed
-        _make_ssh_result(),  # rm script
+async def test_audit_report_truncates_rows(handlers: dict, mock_ssh: AsyncMock) -> None:
+    conflicts = [
+        {"id": i, "severity": "warning", "type": "js_patch", "custom_module": "tut_web",
+         "target": f"Widget{i}", "base_module": "web"}
+        for i in range(1, 101)
     ]
+    mock_ssh.run_stream.return_value = _stream(*_ndjson(
+        conflicts, {"total": 100, "critical": 0, "warning": 100, "info": 0},
+    ))
+    result = await handlers["audit-analysis"](changed_modules="web", workspace_dir="/tmp/ws")
+    assert result["audit_conflicts"] == 100
+    assert "Widget80 " in result["audit_report"]
+    assert "Widget81 " not in result["audit_report"]
+    assert "+20 more" in result["audit_report"]
+
+
+@pytest.mark.asyncio
+async def test_audit_script_failure(handlers: dict, mock_ssh: AsyncMock) -> None:
+    mock_ssh.run_stream.return_value = _stream()  # script failed, no output
     result = await handlers["audit-analysis"](changed_modules="sale", workspace_dir="/tmp/ws")
     assert result["audit_conflicts"] == 0
     assert result["audit_critical"] == 0
 
 
+@pytest.mark.asyncio
+async def test_audit_truncated_output(handlers: dict, mock_ssh: AsyncMock) -> None:
+    # Script died after a conflict line but before the summary
+    mock_ssh.run_stream.return_value = _stream(json.dumps({"id": 1, "severity": "critical"}))
+    result = await handlers["audit-analysis"](changed_modules="sale", workspace_dir="/tmp/ws")
+    assert result["audit_conflicts"] == 0
+    assert result["audit_report"] == ""
+
+
 @pytest.mark.asyncio
 async def test_audit_invalid_json(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # write script
-        _make_ssh_result(),  # git add -N
-        _make_ssh_result(stdout="not valid json{"),  # bad output
-        _make_ssh_result(),  # rm script
-    ]
+    mock_ssh.run_stream.return_value = _stream("not valid json{")
     result = await handlers["audit-analysis"](changed_modules="sale", workspace_dir="/tmp/ws")
     assert result["audit_conflicts"] == 0
     assert "JSON parse error" in result["audit_report"]
 
 
 @pytest.mark.asyncio
-async def test_audit_cleanup(handlers: dict, mock_ssh: AsyncMock) -> None:
+async def test_audit_reuses_uploaded_script(handlers: dict, mock_ssh: AsyncMock) -> None:
+    await handlers["audit-analysis"](changed_modules="sale", workspace_dir="/tmp/ws")
+    mock_ssh.upload.assert_not_awaited()
+    probe_cmd = mock_ssh.run.call_args_list[0][0][1]
+    assert probe_cmd.endswith(f'test -f "$HOME/{_SCRIPT_PATH}"')
+    # Kept in a private directory, never world-writable /tmp
+    assert "chmod 700" in probe_cmd
+    assert not _SCRIPT_PATH.startswith("/tmp")
+    # Script is kept for the next run, not removed
+    assert not any("rm -f" in c[0][1] for c in mock_ssh.run.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_audit_uploads_missing_script(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # write script
-        _make_ssh_result(),  # git add -N
-        _make_ssh_result(stdout="", exit_code=1),  # script failed
-        _make_ssh_result(),  # rm script
+        make_ssh_result(exit_code=1),  # script not on server yet
+        make_ssh_result(),  # git add -N
     ]
     await handlers["audit-analysis"](changed_modules="sale", workspace_dir="/tmp/ws")
-    # Verify rm -f was called (last ssh.run call)
-    last_call = mock_ssh.run.call_args_list[-1]
-    assert "rm -f" in last_call[0][1]
+    mock_ssh.upload.assert_awaited_once()
+    _, data, path = mock_ssh.upload.call_args[0]
+    assert data == _ANALYSIS_SCRIPT.encode()
+    assert path == _SCRIPT_PATH
+
+
+# ── analysis script ───────────────────────────────────────
+
+
+_CUSTOM_MODEL = """
+from odoo import models
+
+
+class HrEmployee(models.Model):
+    _inherit = ["hr.employee", "mail.thread"]
+
+    def write(self, vals):
+        if vals:
+            return super().write(vals)
+        return True
+
+    def unlink(self):
+        return True
+
+    def action_archive(self):
+        def helper():
+            return super().action_archive()
+        return super().action_archive()
+"""
+
+_BASE_MODEL = """
+from odoo import models
+
+
+class HrEmployee(models.Model):
+    _name = "hr.employee"
+
+    def write(self, vals):
+        return True
+
+    if True:
+        class Nested(models.Model):
+            _inherit = "hr.job"
+
+            def copy(self):
+                return True
+"""
+
+
+def test_extract_python_overrides(script: dict, tmp_path) -> None:
+    path = tmp_path / "hr.py"
+    path.write_text(_CUSTOM_MODEL)
+
+    overrides = {
+        o["method"]: o for o in script["extract_python_overrides"](str(path), "tut_hr")
+    }
+
+    assert set(overrides) == {"write", "unlink", "action_archive"}
+    assert all(o["model"] == "hr.employee" for o in overrides.values())
+    assert overrides["write"]["has_super"] is True
+    assert overrides["write"]["super_conditional"] is True
+    assert overrides["unlink"]["has_super"] is False
+    assert overrides["action_archive"]["has_super"] is True
+    assert overrides["action_archive"]["super_conditional"] is False
+    assert overrides["write"]["line"] == 8
+
+
+def test_extract_python_overrides_skips_unchanged_models(script: dict, tmp_path) -> None:
+    path = tmp_path / "hr.py"
+    path.write_text(_CUSTOM_MODEL)
+    extract = script["extract_python_overrides"]
+
+    assert extract(str(path), "tut_hr", frozenset({"sale.order"})) == []
+    assert len(extract(str(path), "tut_hr", frozenset({"hr.employee"}))) == 3
+
+
+def test_extract_base_methods_includes_nested_classes(script: dict) -> None:
+    methods = script["extract_base_methods"](_BASE_MODEL)
+    assert methods == {"hr.employee": {"write"}, "hr.job": {"copy"}}
+
+
+def test_extract_js_patches(script: dict, tmp_path) -> None:
+    path = tmp_path / "patch.js"
+    path.write_text(
+        'import { FormController } from "@web/views/form/form_controller";\n'
+        "\n"
+        "patch(FormController.prototype, {\n"
+        "    setup() {},\n"
+        "});\n"
+    )
+
+    patches = script["extract_js_patches"](str(path), "tut_web")
+
+    assert patches == [{
+        "target": "FormController",
+        "import_path": "@web/views/form/form_controller",
+        "base_module": "web",
+        "line": 3,
+    }]
+
+
+def test_extract_js_patches_line_numbers(script: dict, tmp_path) -> None:
+    path = tmp_path / "patch.js"
+    path.write_text("patch(A, {});\n\n\npatch(B, {});\npatch(C.prototype, {});\n")
+
+    patches = script["extract_js_patches"](str(path), "tut_web")
+
+    assert [(p["target"], p["line"]) for p in patches] == [("A", 1), ("B", 4), ("C", 5)]
+
+
+def test_extract_xml_inherits(script: dict, tmp_path) -> None:
+    path = tmp_path / "views.xml"
+    path.write_text(
+        '<record id="view" model="ir.ui.view">\n'
+        '  <field name="inherit_id" ref="hr.view_employee_form"/>\n'
+        '  <field name="arch" type="xml">\n'
+        '    <xpath expr="//sheet/group" position="after"/>\n'
+        "  </field>\n"
+        "</record>\n"
+    )
+
+    inherits = script["extract_xml_inherits"](str(path), "tut_hr")
+
+    assert inherits == [{
+        "inherit_id": "hr.view_employee_form",
+        "xpath": "//sheet/group",
+        "base_module": "hr",
+    }]
+
+
+def test_extract_xml_inherits_pairs_xpaths_with_their_view(script: dict, tmp_path) -> None:
+    path = tmp_path / "views.xml"
+    path.write_text(
+        '<record id="a" model="ir.ui.view">\n'
+        '  <field name="inherit_id" ref="hr.view_employee_form"/>\n'
+        '  <xpath expr="//sheet" position="inside"/>\n'
+        '  <xpath expr="//notebook" position="inside"/>\n'
+        "</record>\n"
+        '<template id="b" inherit_id="web.layout"/>\n'
+        '<record id="c" model="ir.ui.view">\n'
+        '  <field name="inherit_id" ref="sale.view_order_form"/>\n'
+        '  <xpath expr="//group" position="after"/>\n'
+        "</record>\n"
+    )
+
+    inherits = script["extract_xml_inherits"](str(path), "tut_hr")
+
+    assert [(i["inherit_id"], i["xpath"]) for i in inherits] == [
+        ("hr.view_employee_form", "//sheet"),
+        ("hr.view_employee_form", "//notebook"),
+        ("web.layout", ""),
+        ("sale.view_order_form", "//group"),
+    ]
+
+
+def test_iter_files_skips_cache_dirs(script: dict, tmp_path) -> None:
+    (tmp_path / "static/src").mkdir(parents=True)
+    (tmp_path / "static/src/a.js").write_text("")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__/m.pyc").write_text("")
+    (tmp_path / "b.py").write_text("")
+
+    found = {name for _, name in script["iter_files"](str(tmp_path))}
+
+    assert found == {"a.js", "b.py"}
+
+
+def _git(root, *args: str) -> None:
+    subprocess.run(["git", "-C", str(root), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Git workspace with one changed base model and a custom module."""
+    base = tmp_path / "src/enterprise/hr/models"
+    base.mkdir(parents=True)
+    (base / "hr.py").write_text(_BASE_MODEL)
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "-c", "user.email=t@t", "-c", "user.name=t", "commit", "-qm", "base")
+    (base / "hr.py").write_text(_BASE_MODEL + "\n# upstream change\n")
+    (tmp_path / "src/enterprise/hr/i18n").mkdir()
+    (tmp_path / "src/enterprise/hr/i18n/uk.po").write_text("changed")
+
+    custom = tmp_path / "src/custom/tut_hr"
+    (custom / "models").mkdir(parents=True)
+    (custom / "views").mkdir()
+    (custom / "static").mkdir()
+    (custom / "__manifest__.py").write_text("{}")
+    (custom / "models/hr.py").write_text(_CUSTOM_MODEL)
+    (custom / "views/hr.xml").write_text(
+        '<field name="inherit_id" ref="hr.view_employee_form"/>'
+        '<xpath expr="//sheet" position="inside"/>'
+    )
+    (custom / "static/patch.js").write_text(
+        'import { Employee } from "@hr/employee";\npatch(Employee, {});\n'
+    )
+    return tmp_path
+
+
+def _summary(result: dict) -> list[tuple]:
+    return sorted((c["type"], c["severity"], c["target"]) for c in result["conflicts"])
+
+
+def test_run_analysis(script: dict, workspace) -> None:
+    result = script["run_analysis"](str(workspace))
+
+    assert _summary(result) == [
+        ("js_patch", "warning", "Employee"),
+        ("python_override", "warning", "hr.employee.write"),
+        ("xml_xpath", "warning", "hr.view_employee_form"),
+    ]
+    assert result["stats"]["base_files_changed"] == 1
+    assert result["stats"]["warning"] == 3
+    assert result["stats"]["by_type"] == {"python": 1, "js": 1, "xml": 1}
+    assert [c["id"] for c in result["conflicts"]] == [1, 2, 3]
+    assert result["extension_points_scanned"] == 5
+
+
+def test_run_analysis_counts_only_scanned_extension_points(script: dict, workspace) -> None:
+    # Overrides of models the sync did not touch are never parsed, so not counted
+    (workspace / "src/custom/tut_hr/models/partner.py").write_text(
+        _CUSTOM_MODEL.replace("hr.employee", "res.partner")
+    )
+    result = script["run_analysis"](str(workspace))
+    assert result["extension_points_scanned"] == 5
+
+
+def test_run_analysis_parallel_scan_matches_serial(script: dict, workspace, monkeypatch) -> None:
+    serial = script["run_analysis"](str(workspace))
+    monkeypatch.setitem(script, "PARALLEL_MIN_FILES", 0)
+    monkeypatch.setattr("os.cpu_count", lambda: 2)
+
+    assert script["run_analysis"](str(workspace)) == serial
+
+
+def test_script_prints_ndjson(workspace, tmp_path) -> None:
+    script_file = tmp_path / "audit.py"
+    script_file.write_text(_ANALYSIS_SCRIPT)
+    proc = subprocess.run(
+        [sys.executable, str(script_file), str(workspace)],
+        check=True, capture_output=True, text=True,
+    )
+
+    records = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert [r["id"] for r in records[:-1]] == [1, 2, 3]
+    assert records[-1]["stats"]["total"] == 3
+    assert records[-1]["extension_points_scanned"] == 5
+
+
+def test_run_analysis_parses_only_overridden_base_files(script: dict, workspace, monkeypatch) -> None:
+    other = workspace / "src/enterprise/hr_contract/models"
+    other.mkdir(parents=True)
+    (other / "contract.py").write_text(
+        "class Contract(models.Model):\n    _name = 'hr.contract'\n\n    def write(self, vals):\n        pass\n"
+    )
+    _git(workspace, "add", "-N", "src/enterprise/hr_contract")
+    parsed = []
+    extract = script["extract_base_methods"]
+    monkeypatch.setitem(script, "extract_base_methods", lambda src: parsed.append(src) or extract(src))
+
+    result = script["run_analysis"](str(workspace))
+
+    assert result["stats"]["base_files_changed"] == 2
+    assert len(parsed) == 1 and "hr.contract" not in parsed[0]
+
+
+def test_json_line_without_orjson(script: dict, monkeypatch) -> None:
+    record = {"target": "hr.employee.write", "detail": "змінено"}
+    fast = script["json_line"](record)
+    monkeypatch.setitem(script, "orjson", None)
+    plain = script["json_line"](record)
+
+    assert plain.endswith(b"\n")
+    assert json.loads(plain) == json.loads(fast) == record
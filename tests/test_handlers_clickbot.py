@@ -2,32 +2,14 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
 import pytest
 
 from worker.config import AppConfig, ServerConfig
 from worker.handlers.clickbot import register_clickbot_handlers
-from worker.ssh import CommandResult
 
-
-def _make_ssh_result(stdout: str = "", stderr: str = "", exit_code: int = 0) -> CommandResult:
-    return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
-
-
-def _extract_handlers(config: AppConfig, ssh: AsyncMock) -> dict:
-    handlers = {}
-
-    def task_decorator(task_type: str, **kwargs):
-        def wrapper(fn):
-            handlers[task_type] = fn
-            return fn
-        return wrapper
-
-    worker = MagicMock()
-    worker.task = task_decorator
-    register_clickbot_handlers(worker, config, ssh)
-    return handlers
+from ._helpers import extract_handlers, make_ssh_result
 
 
 @pytest.fixture
@@ -55,7 +37,7 @@ def mock_ssh() -> AsyncMock:
 
 @pytest.fixture
 def handlers(clickbot_config: AppConfig, mock_ssh: AsyncMock) -> dict:
-    return _extract_handlers(clickbot_config, mock_ssh)
+    return extract_handlers(register_clickbot_handlers, clickbot_config, mock_ssh)
 
 
 # ── clickbot-test ─────────────────────────────────────────
@@ -64,19 +46,15 @@ def handlers(clickbot_config: AppConfig, mock_ssh: AsyncMock) -> dict:
 def _setup_clickbot_ssh(mock_ssh: AsyncMock, test_stdout: str, exit_code: int = 0) -> None:
     """Set up SSH mock for a full clickbot run."""
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(),  # cleanup previous
-        _make_ssh_result(),  # start clickbot-db
-        _make_ssh_result(stdout=test_stdout, exit_code=exit_code),  # run tests
-        _make_ssh_result(),  # cleanup finally
+        make_ssh_result(),  # cleanup previous
+        make_ssh_result(),  # start clickbot-db
+        make_ssh_result(stdout="0123456789abcdef\n"),  # snapshot key
+        make_ssh_result(stdout=test_stdout, exit_code=exit_code),  # run tests
+        make_ssh_result(),  # cleanup finally
     ]
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # pg_dump
-        _make_ssh_result(),  # pg_isready wait
-        _make_ssh_result(),  # docker cp
-        _make_ssh_result(),  # pg_restore
-        _make_ssh_result(),  # rename DB to clickbot_test
-        _make_ssh_result(),  # prepare SQL (neutralize crons/mail)
-        _make_ssh_result(),  # rm dump finally
+        make_ssh_result(),  # pg_isready wait
+        make_ssh_result(),  # clone template + prepare SQL (neutralize crons/mail)
     ]
 
 
@@ -115,19 +93,15 @@ async def test_clickbot_cleanup_on_success(handlers: dict, mock_ssh: AsyncMock)
 @pytest.mark.asyncio
 async def test_clickbot_cleanup_on_error(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(),  # cleanup previous
-        _make_ssh_result(),  # start clickbot-db
+        make_ssh_result(),  # cleanup previous
+        make_ssh_result(),  # start clickbot-db
+        make_ssh_result(stdout="0123456789abcdef\n"),  # snapshot key
         RuntimeError("SSH connection lost"),  # test fails
-        _make_ssh_result(),  # cleanup finally
+        make_ssh_result(),  # cleanup finally
     ]
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # pg_dump
-        _make_ssh_result(),  # pg_isready wait
-        _make_ssh_result(),  # docker cp
-        _make_ssh_result(),  # pg_restore
-        _make_ssh_result(),  # rename DB to clickbot_test
-        _make_ssh_result(),  # prepare SQL
-        _make_ssh_result(),  # rm dump finally
+        make_ssh_result(),  # pg_isready wait
+        make_ssh_result(),  # clone template + prepare SQL
     ]
     with pytest.raises(RuntimeError, match="SSH connection lost"):
         await handlers["clickbot-test"](server_host="staging")
@@ -0,0 +1,68 @@
+"""Tests for the codex-review handler's pre-review reads."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from worker2.config import AppConfig
+from worker2.errors import GitHubError
+from worker2.handlers.github import _format_review_comment, register_github_handlers
+
+from ._helpers import extract_handlers, make_mock_job
+
+HEAD = "a" * 40
+
+
+@pytest.fixture
+def mock_github() -> AsyncMock:
+    github = AsyncMock()
+    github.get_pr.return_value = {"head": {"sha": HEAD}}
+    github.get_pr_diff.return_value = "diff --git a/x b/x"
+    github.find_own_comment.return_value = None
+    return github
+
+
+@pytest.fixture
+def handlers(app_config: AppConfig, mock_github: AsyncMock) -> dict:
+    return extract_handlers(register_github_handlers, app_config, AsyncMock(), mock_github)
+
+
+@pytest.mark.asyncio
+async def test_codex_review_reuses_own_cached_result(handlers: dict, mock_github: AsyncMock) -> None:
+    mock_github.find_own_comment.return_value = {
+        "body": _format_review_comment({"score": 9, "critical": False}, head_sha=HEAD),
+    }
+    result = await handlers["codex-review"](
+        job=make_mock_job(), pr_number=42, pr_url="https://github.com/o/r/pull/42",
+    )
+    assert result["review_score"] == 9
+    assert result["has_critical_issues"] is False
+    assert result["review_head_sha"] == HEAD
+    mock_github.find_own_comment.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_codex_review_propagates_cancellation(handlers: dict, mock_github: AsyncMock) -> None:
+    mock_github.get_pr.side_effect = asyncio.CancelledError()
+    with pytest.raises(asyncio.CancelledError):
+        await handlers["codex-review"](
+            job=make_mock_job(), pr_number=42, pr_url="https://github.com/o/r/pull/42",
+        )
+
+
+@pytest.mark.asyncio
+async def test_codex_review_warns_when_cache_lookup_fails(
+    handlers: dict, mock_github: AsyncMock, caplog: pytest.LogCaptureFixture,
+) -> None:
+    # e.g. GET /user is forbidden for GitHub App installation tokens
+    mock_github.find_own_comment.side_effect = GitHubError("403 Forbidden")
+    with patch("worker2.handlers.github._run_review", AsyncMock(side_effect=RuntimeError("stop"))):
+        with pytest.raises(RuntimeError, match="stop"):
+            await handlers["codex-review"](
+                job=make_mock_job(), pr_number=42, pr_url="https://github.com/o/r/pull/42",
+            )
+    assert "Failed to look up cached review for PR #42" in caplog.text
+    assert "403 Forbidden" in caplog.text
@@ -2,37 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from worker2.config import AppConfig, ServerConfig
-from worker2.handlers.deploy import register_deploy_handlers
+from worker2.errors import DeployError
+from worker2.handlers.deploy import _stop_and_build_web, register_deploy_handlers
 from worker2.ssh import CommandResult, RemoteCommandError
 
+from ._helpers import extract_handlers, make_ssh_result
 
-def _make_ssh_result(stdout: str = "", stderr: str = "", exit_code: int = 0) -> CommandResult:
-    return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
 
-
-OK = _make_ssh_result
-FAIL = lambda msg="error": _make_ssh_result(stderr=msg, exit_code=1)
-
-
-def _extract_handlers(config: AppConfig, ssh: AsyncMock) -> dict:
-    """Register handlers and capture them from mock worker."""
-    handlers = {}
-
-    def task_decorator(task_type: str, **kwargs):
-        def wrapper(fn):
-            handlers[task_type] = fn
-            return fn
-        return wrapper
-
-    worker = MagicMock()
-    worker.task = task_decorator
-    register_deploy_handlers(worker, config, ssh)
-    return handlers
+OK = make_ssh_result
+FAIL = lambda msg="error": make_ssh_result(stderr=msg, exit_code=1)
 
 
 @pytest.fixture
@@ -45,12 +30,12 @@ def mock_ssh() -> AsyncMock:
 
 @pytest.fixture
 def handlers(app_config: AppConfig, mock_ssh: AsyncMock) -> dict:
-    return _extract_handlers(app_config, mock_ssh)
+    return extract_handlers(register_deploy_handlers, app_config, mock_ssh)
 
 
 @pytest.fixture
 def prod_handlers(app_config_with_production: AppConfig, mock_ssh: AsyncMock) -> dict:
-    return _extract_handlers(app_config_with_production, mock_ssh)
+    return extract_handlers(register_deploy_handlers, app_config_with_production, mock_ssh)
 
 
 # ══════════════════════════════════════════════════════════
@@ -74,11 +59,11 @@ def test_all_11_handlers_registered(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_git_pull_has_changes(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.return_value = _make_ssh_result(stdout="aaa1111\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="aaa1111\n")
     mock_ssh.run_in_repo.side_effect = [
         OK(),  # git fetch
         OK(),  # git checkout
-        _make_ssh_result(stdout="bbb2222\n"),  # git rev-parse HEAD
+        make_ssh_result(stdout="bbb2222\n"),  # git rev-parse HEAD
     ]
     result = await handlers["git-pull"](
         server_host="staging", branch="staging",
@@ -90,11 +75,11 @@ async def test_git_pull_has_changes(handlers: dict, mock_ssh: AsyncMock) -> None
 
 @pytest.mark.asyncio
 async def test_git_pull_no_changes(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.return_value = _make_ssh_result(stdout="aaa1111\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="aaa1111\n")
     mock_ssh.run_in_repo.side_effect = [
         OK(),  # git fetch
         OK(),  # git checkout
-        _make_ssh_result(stdout="aaa1111\n"),  # same commit
+        make_ssh_result(stdout="aaa1111\n"),  # same commit
     ]
     result = await handlers["git-pull"](
         server_host="staging", branch="staging",
@@ -105,11 +90,11 @@ async def test_git_pull_no_changes(handlers: dict, mock_ssh: AsyncMock) -> None:
 @pytest.mark.asyncio
 async def test_git_pull_first_deploy_no_state(handlers: dict, mock_ssh: AsyncMock) -> None:
     """When state file doesn't exist, old_commit='none'."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="none\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="none\n")
     mock_ssh.run_in_repo.side_effect = [
         OK(),  # git fetch
         OK(),  # git checkout
-        _make_ssh_result(stdout="abc1234\n"),  # rev-parse
+        make_ssh_result(stdout="abc1234\n"),  # rev-parse
     ]
     result = await handlers["git-pull"](server_host="staging", branch="main")
     assert result["old_commit"] == "none"
@@ -120,8 +105,8 @@ async def test_git_pull_first_deploy_no_state(handlers: dict, mock_ssh: AsyncMoc
 @pytest.mark.asyncio
 async def test_git_pull_custom_repo_dir(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Custom repo_dir overrides server default."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="aaa\n")
-    mock_ssh.run_in_repo.side_effect = [OK(), OK(), _make_ssh_result(stdout="bbb\n")]
+    mock_ssh.run.return_value = make_ssh_result(stdout="aaa\n")
+    mock_ssh.run_in_repo.side_effect = [OK(), OK(), make_ssh_result(stdout="bbb\n")]
 
     await handlers["git-pull"](
         server_host="staging", branch="main", repo_dir="/custom/path",
@@ -134,7 +119,7 @@ async def test_git_pull_custom_repo_dir(handlers: dict, mock_ssh: AsyncMock) ->
 @pytest.mark.asyncio
 async def test_git_pull_retry_on_fetch_failure(handlers: dict, mock_ssh: AsyncMock) -> None:
     """git fetch retries up to 3 times via retry()."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="aaa\n")  # state file
+    mock_ssh.run.return_value = make_ssh_result(stdout="aaa\n")  # state file
     mock_ssh.run_in_repo.side_effect = [
         # fetch attempt 1 — fail (check=True raises)
         RemoteCommandError("network error"),
@@ -145,7 +130,7 @@ async def test_git_pull_retry_on_fetch_failure(handlers: dict, mock_ssh: AsyncMo
         # checkout
         OK(),
         # rev-parse
-        _make_ssh_result(stdout="bbb\n"),
+        make_ssh_result(stdout="bbb\n"),
     ]
 
     with patch("worker.handlers.deploy._asyncio.sleep", new_callable=AsyncMock):
@@ -157,7 +142,7 @@ async def test_git_pull_retry_on_fetch_failure(handlers: dict, mock_ssh: AsyncMo
 @pytest.mark.asyncio
 async def test_git_pull_all_retries_exhausted(handlers: dict, mock_ssh: AsyncMock) -> None:
     """When all 3 fetch retries fail, the handler raises."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="aaa\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="aaa\n")
     mock_ssh.run_in_repo.side_effect = [
         RemoteCommandError("fail"),
         RemoteCommandError("fail"),
@@ -206,6 +191,23 @@ async def test_detect_modules_checksum_deduplicates(handlers: dict, mock_ssh: As
     assert result["changed_modules"] == "mod_a,mod_b"
 
 
+@pytest.mark.asyncio
+async def test_detect_modules_uploads_script_when_missing(handlers: dict, mock_ssh: AsyncMock) -> None:
+    """The compare script is uploaded once, then run by its content-addressed path."""
+    mock_ssh.run_in_repo.side_effect = [
+        make_ssh_result(exit_code=97),  # script not on the server yet
+        OK("mod_a\n"),
+    ]
+    mock_ssh.upload = AsyncMock()
+    result = await handlers["detect-modules"](server_host="staging")
+    assert result["changed_modules"] == "mod_a"
+    path = mock_ssh.upload.call_args[0][2]
+    # Kept in a private directory, never world-writable /tmp
+    assert path.startswith(".cache/camunda-worker/_detect_modules_")
+    assert "chmod 700" in mock_ssh.run_in_repo.call_args_list[0][0][1]
+    assert mock_ssh.run_in_repo.call_args[0][1].startswith(f'python3 "$HOME/{path}" ')
+
+
 # ══════════════════════════════════════════════════════════
 # docker-up
 # ══════════════════════════════════════════════════════════
@@ -216,70 +218,78 @@ async def test_docker_up_happy_path(handlers: dict, mock_ssh: AsyncMock) -> None
     """Container starts and HTTP responds on first check."""
     mock_ssh.run_in_repo.return_value = OK()  # docker compose up
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),  # container status — running immediately
-        _make_ssh_result(exit_code=0),  # curl HTTP check — OK
+        OK(),  # remote container status loop — running
+        OK(),  # remote curl loop — OK
         OK(),  # nginx restart
     ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        result = await handlers["docker-up"](server_host="staging")
+    result = await handlers["docker-up"](server_host="staging")
     assert result == {}
+    assert mock_ssh.run_in_repo.call_args[0][1] == "docker compose up -d"
+    assert "docker restart odoo19-nginx" in mock_ssh.run.call_args_list[2][0][1]
 
 
 @pytest.mark.asyncio
 async def test_docker_up_waits_for_container(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """Container takes a few checks to become running."""
+    """The status poll runs remotely — one SSH command with backoff."""
     mock_ssh.run_in_repo.return_value = OK()
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="created\n"),  # not running yet
-        _make_ssh_result(stdout="starting\n"),  # still not
-        _make_ssh_result(stdout="running\n"),  # now running
-        _make_ssh_result(exit_code=0),  # HTTP OK
+        OK(),  # remote status loop — running after retries
+        OK(),  # HTTP OK
         OK(),  # nginx restart
     ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
+    with patch("worker2.handlers.deploy._sleep", new_callable=AsyncMock) as sleep:
         result = await handlers["docker-up"](server_host="staging")
     assert result == {}
+    sleep.assert_not_awaited()
+    cmd = mock_ssh.run.call_args_list[0][0][1]
+    assert cmd.startswith("for d in 0.2 0.3 0.5 1 2 3 5 8 13 21 4 0; do ")
+    assert "docker inspect --format '{{.State.Status}}' odoo19 " in cmd
+    assert '[ "$s" = running ] && exit 0; sleep "$d"; done; exit 1' in cmd
 
 
 @pytest.mark.asyncio
 async def test_docker_up_container_never_starts(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """Container never becomes 'running' — raises after 12 attempts."""
+    """Container never becomes 'running' — remote loop exhausts its budget."""
     mock_ssh.run_in_repo.return_value = OK()
-    mock_ssh.run.return_value = _make_ssh_result(stdout="created\n")
+    mock_ssh.run.return_value = make_ssh_result(exit_code=1)
 
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        with pytest.raises(RuntimeError, match="not running after 60s"):
-            await handlers["docker-up"](server_host="staging")
+    with pytest.raises(DeployError, match="not running after 60s"):
+        await handlers["docker-up"](server_host="staging")
+    # Gave up before polling HTTP
+    assert mock_ssh.run.await_count == 1
 
 
 @pytest.mark.asyncio
 async def test_docker_up_waits_for_http(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """HTTP endpoint takes multiple attempts to respond."""
+    """The HTTP poll runs remotely — one SSH command with doubling delay."""
     mock_ssh.run_in_repo.return_value = OK()
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),  # container running
-        _make_ssh_result(exit_code=7),  # curl fail
-        _make_ssh_result(exit_code=7),  # curl fail
-        _make_ssh_result(exit_code=0),  # curl OK
+        OK(),  # container running
+        OK(),  # remote curl loop — OK after retries
         OK(),  # nginx restart
     ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        result = await handlers["docker-up"](server_host="staging")
+    result = await handlers["docker-up"](server_host="staging")
     assert result == {}
+    cmd = mock_ssh.run.call_args_list[1][0][1]
+    assert cmd.startswith("end=$((SECONDS + 240)); delay=1; while :; do ")
+    assert "curl -sf -o /dev/null --max-time 10 http://localhost:8069/web/login && exit 0; " in cmd
+    assert '[ "$SECONDS" -ge "$end" ] && exit 1; ' in cmd
+    assert 'delay=$((delay * 2)); [ "$delay" -le 10 ] || delay=10; done' in cmd
+    assert mock_ssh.run.call_args_list[1][1]["timeout"] == 270
 
 
 @pytest.mark.asyncio
 async def test_docker_up_http_never_responds(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """HTTP never responds — raises RuntimeError after max attempts."""
+    """HTTP never responds — raises DeployError once the remote budget is spent."""
     mock_ssh.run_in_repo.return_value = OK()
-    # container running + 24 failed curl attempts
+    # container running + remote curl loop exhausts its budget
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),
-    ] + [_make_ssh_result(exit_code=7)] * 24
+        OK(),
+        make_ssh_result(exit_code=1),
+    ]
 
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        with pytest.raises(RuntimeError, match="HTTP service not responding"):
-            await handlers["docker-up"](server_host="staging")
+    with pytest.raises(DeployError, match="HTTP service not responding .* after 240s"):
+        await handlers["docker-up"](server_host="staging")
 
 
 @pytest.mark.asyncio
@@ -287,17 +297,17 @@ async def test_docker_up_custom_container_and_port(handlers: dict, mock_ssh: Asy
     """Custom container/port override server defaults."""
     mock_ssh.run_in_repo.return_value = OK()
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),
-        _make_ssh_result(exit_code=0),  # HTTP OK
+        OK(),
+        OK(),  # HTTP OK
         OK(),  # nginx
     ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        await handlers["docker-up"](
-            server_host="staging", container="my-ctr", port=8080,
-        )
-    # Verify custom container name in docker inspect
+    await handlers["docker-up"](
+        server_host="staging", container="my-ctr", port=8080,
+    )
     inspect_cmd = mock_ssh.run.call_args_list[0][0][1]
-    assert "my-ctr" in inspect_cmd
+    assert "'{{.State.Status}}' my-ctr " in inspect_cmd
+    assert "http://localhost:8080/web/login" in mock_ssh.run.call_args_list[1][0][1]
+    assert "docker restart my-ctr-nginx" in mock_ssh.run.call_args_list[2][0][1]
 
 
 @pytest.mark.asyncio
@@ -305,32 +315,32 @@ async def test_docker_up_nginx_restart_failure_ignored(handlers: dict, mock_ssh:
     """Nginx restart failure is not fatal (|| true in command)."""
     mock_ssh.run_in_repo.return_value = OK()
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),
-        _make_ssh_result(exit_code=0),  # HTTP OK
-        _make_ssh_result(exit_code=0),  # nginx restart (uses || true)
+        OK(),
+        OK(),  # HTTP OK
+        make_ssh_result(exit_code=1),  # nginx restart
     ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        result = await handlers["docker-up"](server_host="staging")
+    result = await handlers["docker-up"](server_host="staging")
     assert result == {}
+    assert mock_ssh.run.call_args_list[2][0][1].endswith("|| true")
 
 
 @pytest.mark.asyncio
 async def test_docker_up_retry_compose_up(handlers: dict, mock_ssh: AsyncMock) -> None:
     """docker compose up retries on failure."""
     mock_ssh.run_in_repo.side_effect = [
-        FAIL("compose error"),
-        FAIL("compose error"),
+        RemoteCommandError("compose error"),
+        RemoteCommandError("compose error"),
         OK(),  # 3rd attempt
     ]
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),
-        _make_ssh_result(exit_code=0),  # HTTP
+        OK(),
+        OK(),  # HTTP
         OK(),  # nginx
     ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        with patch("worker.handlers.deploy._asyncio.sleep", new_callable=AsyncMock):
-            result = await handlers["docker-up"](server_host="staging")
+    with patch("worker2.retry.asyncio.sleep", new_callable=AsyncMock):
+        result = await handlers["docker-up"](server_host="staging")
     assert result == {}
+    assert mock_ssh.run_in_repo.await_count == 3
 
 
 # ══════════════════════════════════════════════════════════
@@ -338,6 +348,10 @@ async def test_docker_up_retry_compose_up(handlers: dict, mock_ssh: AsyncMock) -
 # ══════════════════════════════════════════════════════════
 
 
+def _repo_commands(mock_ssh: AsyncMock) -> list[str]:
+    return [c[0][1] for c in mock_ssh.run_in_repo.call_args_list]
+
+
 @pytest.mark.asyncio
 async def test_module_update_empty(handlers: dict, mock_ssh: AsyncMock) -> None:
     result = await handlers["module-update"](
@@ -351,131 +365,208 @@ async def test_module_update_empty(handlers: dict, mock_ssh: AsyncMock) -> None:
 async def test_module_update_all(handlers: dict, mock_ssh: AsyncMock) -> None:
     """'all' modules update — skips installed check."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="secret123\n"),  # DB password from container
+        make_ssh_result(stdout="secret123\n"),  # DB password from container
         OK(),  # asset cache clear
     ]
-    mock_ssh.run_in_repo.side_effect = [
-        OK(),  # find __pycache__
-        OK(),  # docker compose run --rm --no-deps web odoo-bin
-    ]
+    mock_ssh.run_in_repo.return_value = OK()
     result = await handlers["module-update"](
         server_host="staging", changed_modules="all",
     )
     assert result["modules_updated"] == "all"
-    # Should contain -u all in the update command
-    update_cmd = mock_ssh.run_in_repo.call_args_list[1][0][1]
-    assert "-u all" in update_cmd
+    clean, stop, build, migrate, up = _repo_commands(mock_ssh)
+    assert clean == "git clean -fdxq -- 'src/*__pycache__*' 2>/dev/null || true"
+    assert stop == "docker compose stop web"
+    assert build == "docker compose build web"
+    assert migrate.startswith("docker compose run --rm --no-deps -T -u odoo web odoo-bin -d odoo19 -u all ")
+    assert "--db_password='secret123'" in migrate
+    assert up == "docker compose up -d web"
+    # No installed-modules query for 'all'
+    assert not any("json_agg" in c[0][1] for c in mock_ssh.run.call_args_list)
 
 
 @pytest.mark.asyncio
 async def test_module_update_specific_modules(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Specific modules — filter to installed ones only."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="dbpass\n"),  # DB password
-        # installed modules query
-        _make_ssh_result(stdout="tut_hr\nsale\naccount\n"),
-        # asset cache clear
-        OK(),
-    ]
-    mock_ssh.run_in_repo.side_effect = [
-        OK(),  # find __pycache__
-        OK(),  # docker compose run --rm --no-deps web odoo-bin
+        make_ssh_result(stdout="dbpass\n"),  # DB password
+        # installed modules query (json_agg, one line)
+        make_ssh_result(stdout='["tut_hr", "sale", "account"]\n'),
+        OK(),  # asset cache clear
     ]
+    mock_ssh.run_in_repo.return_value = OK()
     result = await handlers["module-update"](
         server_host="staging", changed_modules="tut_hr,tut_core,sale",
     )
     # tut_core is NOT installed, so should only update tut_hr,sale
-    updated = result["modules_updated"]
-    assert "tut_hr" in updated
-    assert "sale" in updated
-    assert "tut_core" not in updated
+    assert result["modules_updated"] == "tut_hr,sale"
+    query = next(c[0][1] for c in mock_ssh.run.call_args_list if "json_agg" in c[0][1])
+    assert query.startswith("docker exec -i odoo19-db psql -U odoo -d odoo19 -t -A -v ON_ERROR_STOP=1 <<'SQL'\n")
+    assert "SELECT COALESCE(json_agg(name), '[]') FROM ir_module_module WHERE state = 'installed';" in query
+    assert " -u tut_hr,sale " in _repo_commands(mock_ssh)[3]
+
+
+@pytest.mark.asyncio
+async def test_module_update_prep_runs_concurrently(handlers: dict, mock_ssh: AsyncMock) -> None:
+    """Password lookup, __pycache__ cleanup and the installed query are gathered."""
+    started: list[str] = []
+    release = asyncio.Event()
+
+    async def run(server, cmd, **kwargs):
+        started.append(cmd)
+        if len(started) < 3:
+            await release.wait()
+        else:
+            release.set()
+        if "printenv PASSWORD" in cmd:
+            return make_ssh_result(stdout="dbpass\n")
+        if "json_agg" in cmd:
+            return make_ssh_result(stdout='["sale"]\n')
+        return OK()
+
+    mock_ssh.run.side_effect = run
+    mock_ssh.run_in_repo.side_effect = run
+    result = await asyncio.wait_for(
+        handlers["module-update"](server_host="staging", changed_modules="sale"),
+        timeout=1,
+    )
+    assert result["modules_updated"] == "sale"
+    # All three prep commands were in flight before any finished
+    assert "printenv PASSWORD" in started[0]
+    assert "__pycache__" in started[1]
+    assert "json_agg" in started[2]
 
 
 @pytest.mark.asyncio
 async def test_module_update_installs_new_modules(handlers: dict, mock_ssh: AsyncMock) -> None:
     """New modules (not installed) get -i flag instead of being skipped."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="dbpass\n"),  # password
-        _make_ssh_result(stdout="base\nweb\n"),  # installed (none match changed)
-        OK(),  # docker exec odoo-bin -i tut_new_module
+        make_ssh_result(stdout="dbpass\n"),  # password
+        make_ssh_result(stdout='["base", "web"]\n'),  # installed (none match changed)
         OK(),  # psql cache clear
     ]
-    mock_ssh.run_in_repo.side_effect = [
-        OK(),  # clean __pycache__
-        OK(),  # docker compose build web
-        OK(),  # docker compose up -d web
+    mock_ssh.run_in_repo.return_value = OK()
+    result = await handlers["module-update"](
+        server_host="staging", changed_modules="tut_new_module", install_modules="tut_new_module",
+    )
+    assert result["modules_updated"] == "tut_new_module"
+    migrate = _repo_commands(mock_ssh)[3]
+    assert "-i tut_new_module" in migrate
+    assert "-u tut_new_module" not in migrate
+
+
+@pytest.mark.asyncio
+async def test_module_update_skips_modules_not_installed(handlers: dict, mock_ssh: AsyncMock) -> None:
+    """Changed modules that are not installed (and not requested) are skipped."""
+    mock_ssh.run.side_effect = [
+        make_ssh_result(stdout="dbpass\n"),
+        make_ssh_result(stdout="[]\n"),  # json_agg over no rows, coalesced
     ]
+    mock_ssh.run_in_repo.return_value = OK()
     result = await handlers["module-update"](
         server_host="staging", changed_modules="tut_new_module",
     )
-    assert result["modules_updated"] == "tut_new_module"
-    # Verify -i flag used
-    odoo_cmd = mock_ssh.run.call_args_list[2][0][1]
-    assert "-i tut_new_module" in odoo_cmd
+    assert result == {"modules_updated": ""}
+    assert "docker compose build web" not in _repo_commands(mock_ssh)
 
 
 @pytest.mark.asyncio
 async def test_module_update_over_10_switches_to_all(handlers: dict, mock_ssh: AsyncMock) -> None:
     """More than 10 matching modules switches to -u all."""
     many_mods = ",".join(f"mod_{i}" for i in range(15))
-    installed_stdout = "\n".join(f"mod_{i}" for i in range(15)) + "\n"
+    installed_stdout = json.dumps([f"mod_{i}" for i in range(15)]) + "\n"
 
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="dbpass\n"),  # password
-        _make_ssh_result(stdout=installed_stdout),  # all installed
+        make_ssh_result(stdout="dbpass\n"),  # password
+        make_ssh_result(stdout=installed_stdout),  # all installed
         OK(),  # asset cache
     ]
-    mock_ssh.run_in_repo.side_effect = [
-        OK(),  # __pycache__
-        OK(),  # docker compose run --rm --no-deps web odoo-bin
-    ]
+    mock_ssh.run_in_repo.return_value = OK()
     result = await handlers["module-update"](
         server_host="staging", changed_modules=many_mods,
     )
     assert result["modules_updated"] == "all"
+    assert " -u all " in _repo_commands(mock_ssh)[3]
 
 
 @pytest.mark.asyncio
 async def test_module_update_db_password_from_env_file(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """Falls back to .env file if container env fails."""
+    """Container env and the .env fallback are tried in one command."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="", exit_code=1),  # container env fails
+        make_ssh_result(stdout="env_pass\n"),  # container env empty, .env file fallback
         OK(),  # asset cache
     ]
-    mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="env_pass\n"),  # .env file fallback
-        OK(),  # __pycache__
-        OK(),  # docker compose run --rm --no-deps web odoo-bin
-    ]
+    mock_ssh.run_in_repo.return_value = OK()
     result = await handlers["module-update"](
         server_host="staging", changed_modules="all",
     )
     assert result["modules_updated"] == "all"
+    pw_cmd = mock_ssh.run.call_args_list[0][0][1]
+    assert "docker exec odoo19 printenv PASSWORD" in pw_cmd
+    assert "POSTGRES_PASSWORD=" in pw_cmd and "/.env" in pw_cmd
+    assert "--db_password='env_pass'" in _repo_commands(mock_ssh)[3]
 
 
 @pytest.mark.asyncio
 async def test_module_update_no_db_password_raises(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """If DB password can't be retrieved, raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="", exit_code=1)
-    mock_ssh.run_in_repo.return_value = _make_ssh_result(stdout="", exit_code=1)
+    """If DB password can't be retrieved, raises DeployError."""
+    mock_ssh.run.return_value = make_ssh_result(stdout="", exit_code=1)
+    mock_ssh.run_in_repo.return_value = OK()
 
-    with pytest.raises(RuntimeError, match="Cannot retrieve DB password"):
+    with pytest.raises(DeployError, match="Cannot retrieve DB password"):
         await handlers["module-update"](
             server_host="staging", changed_modules="all",
         )
+    assert "docker compose build web" not in _repo_commands(mock_ssh)
 
 
 @pytest.mark.asyncio
 async def test_module_update_clears_pycache(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Verify __pycache__ cleanup is called."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="pass\n"),  # password
+        make_ssh_result(stdout="pass\n"),  # password
         OK(),  # asset cache
     ]
-    mock_ssh.run_in_repo.side_effect = [OK(), OK()]
+    mock_ssh.run_in_repo.return_value = OK()
+    await handlers["module-update"](server_host="staging", changed_modules="all")
+    assert "__pycache__" in _repo_commands(mock_ssh)[0]
+
+
+@pytest.mark.asyncio
+async def test_module_update_clears_asset_cache_via_stdin(handlers: dict, mock_ssh: AsyncMock) -> None:
+    """The asset cleanup SQL goes through psql's stdin, not a quoted -c argument."""
+    mock_ssh.run.side_effect = [
+        make_ssh_result(stdout="pass\n"),
+        OK(),  # asset cache
+    ]
+    mock_ssh.run_in_repo.return_value = OK()
     await handlers["module-update"](server_host="staging", changed_modules="all")
-    pycache_cmd = mock_ssh.run_in_repo.call_args_list[0][0][1]
-    assert "__pycache__" in pycache_cmd
+    clear = mock_ssh.run.call_args_list[1][0][1]
+    assert clear == (
+        "docker exec -i odoo19-db psql -U odoo -d odoo19 -t -A -v ON_ERROR_STOP=1 <<'SQL'\n"
+        "DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%' OR name LIKE 'web.assets%';\n"
+        "SQL"
+    )
+
+
+@pytest.mark.asyncio
+async def test_stop_and_build_web_waits_for_both(mock_ssh: AsyncMock) -> None:
+    """A failed stop is raised only after the concurrent build has finished."""
+    build_done = asyncio.Event()
+
+    async def run_in_repo(server, cmd, **kwargs):
+        if cmd == "docker compose stop web":
+            raise RemoteCommandError("stop failed")
+        await asyncio.sleep(0)
+        build_done.set()
+        return OK()
+
+    mock_ssh.run_in_repo.side_effect = run_in_repo
+    with pytest.raises(RemoteCommandError, match="stop failed"):
+        await _stop_and_build_web(mock_ssh, ServerConfig(host="h", ssh_user="deploy"))
+    assert build_done.is_set()
+    cmds = _repo_commands(mock_ssh)
+    assert cmds == ["docker compose stop web", "docker compose build web"]
+    assert mock_ssh.run_in_repo.call_args_list[1][1]["timeout"] == 1200
 
 
 # ══════════════════════════════════════════════════════════
@@ -485,8 +576,8 @@ async def test_module_update_clears_pycache(handlers: dict, mock_ssh: AsyncMock)
 
 @pytest.mark.asyncio
 async def test_cache_clear(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.return_value = _make_ssh_result()
-    mock_ssh.run_in_repo.return_value = _make_ssh_result()
+    mock_ssh.run.return_value = make_ssh_result()
+    mock_ssh.run_in_repo.return_value = make_ssh_result()
     result = await handlers["cache-clear"](server_host="staging")
     assert result == {}
     # Verify SQL DELETE on assets
@@ -524,9 +615,9 @@ async def test_cache_clear_custom_container(handlers: dict, mock_ssh: AsyncMock)
 @pytest.mark.asyncio
 async def test_smoke_test_passes(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Clean smoke test — no errors."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")  # password
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")  # password
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="INFO odoo: Modules loaded.\n"),  # docker compose run smoke test
+        make_ssh_result(stdout="INFO odoo: Modules loaded.\n"),  # docker compose run smoke test
     ]
     result = await handlers["smoke-test"](server_host="staging")
     assert result["smoke_passed"] is True
@@ -535,9 +626,9 @@ async def test_smoke_test_passes(handlers: dict, mock_ssh: AsyncMock) -> None:
 @pytest.mark.asyncio
 async def test_smoke_test_fails_on_error(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Smoke test detects ERROR lines and raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(
+        make_ssh_result(
             stdout="ERROR odoo.modules: Failed to import module tut_hr\nTraceback blah\n",
         ),
     ]
@@ -548,9 +639,9 @@ async def test_smoke_test_fails_on_error(handlers: dict, mock_ssh: AsyncMock) ->
 @pytest.mark.asyncio
 async def test_smoke_test_fails_on_exit_code(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Non-zero exit code means failure — raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="", exit_code=1),  # crashed
+        make_ssh_result(stdout="", exit_code=1),  # crashed
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -559,9 +650,9 @@ async def test_smoke_test_fails_on_exit_code(handlers: dict, mock_ssh: AsyncMock
 @pytest.mark.asyncio
 async def test_smoke_test_ignores_safe_warnings(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Known safe warnings are filtered out."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(
+        make_ssh_result(
             stdout="ERROR: Some modules are not loaded, ignored: crm_ext\n"
                    "ERROR: inconsistent states during test\n",
         ),
@@ -573,9 +664,9 @@ async def test_smoke_test_ignores_safe_warnings(handlers: dict, mock_ssh: AsyncM
 @pytest.mark.asyncio
 async def test_smoke_test_detects_critical(handlers: dict, mock_ssh: AsyncMock) -> None:
     """CRITICAL level is caught — raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="CRITICAL odoo: database connection failed\n"),
+        make_ssh_result(stdout="CRITICAL odoo: database connection failed\n"),
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -584,9 +675,9 @@ async def test_smoke_test_detects_critical(handlers: dict, mock_ssh: AsyncMock)
 @pytest.mark.asyncio
 async def test_smoke_test_detects_import_error(handlers: dict, mock_ssh: AsyncMock) -> None:
     """ImportError / ModuleNotFoundError detected — raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="ImportError: No module named 'missing_dep'\n"),
+        make_ssh_result(stdout="ImportError: No module named 'missing_dep'\n"),
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -595,9 +686,9 @@ async def test_smoke_test_detects_import_error(handlers: dict, mock_ssh: AsyncMo
 @pytest.mark.asyncio
 async def test_smoke_test_detects_syntax_error(handlers: dict, mock_ssh: AsyncMock) -> None:
     """SyntaxError detected — raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="SyntaxError: invalid syntax in /opt/odoo/src/custom/tut_hr/models.py\n"),
+        make_ssh_result(stdout="SyntaxError: invalid syntax in /opt/odoo/src/custom/tut_hr/models.py\n"),
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -606,9 +697,9 @@ async def test_smoke_test_detects_syntax_error(handlers: dict, mock_ssh: AsyncMo
 @pytest.mark.asyncio
 async def test_smoke_test_raises_on_error(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Smoke test should raise RuntimeError when errors are detected."""
-    mock_ssh.run.side_effect = [_make_ssh_result(stdout="password123")]  # _get_db_password
+    mock_ssh.run.side_effect = [make_ssh_result(stdout="password123")]  # _get_db_password
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="2026 ERROR something broke\n", exit_code=1),
+        make_ssh_result(stdout="2026 ERROR something broke\n", exit_code=1),
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -617,9 +708,9 @@ async def test_smoke_test_raises_on_error(handlers: dict, mock_ssh: AsyncMock) -
 @pytest.mark.asyncio
 async def test_smoke_test_no_restart_on_failure(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Smoke test runs in a separate container — no stop/start/up of main service."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="CRITICAL: boom\n", exit_code=1),
+        make_ssh_result(stdout="CRITICAL: boom\n", exit_code=1),
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -633,14 +724,15 @@ async def test_smoke_test_no_restart_on_failure(handlers: dict, mock_ssh: AsyncM
 async def test_smoke_test_db_password_fallback(handlers: dict, mock_ssh: AsyncMock) -> None:
     """Password fallback to .env file works for smoke-test."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="", exit_code=1),  # container env fails
+        make_ssh_result(stdout="envpass\n"),  # container env empty, .env fallback
     ]
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="envpass\n"),  # .env fallback
-        _make_ssh_result(stdout="OK\n"),  # docker compose run smoke test
+        make_ssh_result(stdout="OK\n"),  # docker compose run smoke test
     ]
     result = await handlers["smoke-test"](server_host="staging")
     assert result["smoke_passed"] is True
+    cmd = mock_ssh.run.call_args_list[0][0][1]
+    assert "printenv PASSWORD" in cmd and "/.env" in cmd
 
 
 # ══════════════════════════════════════════════════════════
@@ -651,7 +743,7 @@ async def test_smoke_test_db_password_fallback(handlers: dict, mock_ssh: AsyncMo
 @pytest.mark.asyncio
 async def test_http_verify_ok(handlers: dict, mock_ssh: AsyncMock) -> None:
     """HTTP responds on first attempt."""
-    mock_ssh.run.return_value = _make_ssh_result(exit_code=0)
+    mock_ssh.run.return_value = make_ssh_result(exit_code=0)
     with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
         result = await handlers["http-verify"](server_host="staging")
     assert result == {}
@@ -659,26 +751,25 @@ async def test_http_verify_ok(handlers: dict, mock_ssh: AsyncMock) -> None:
 
 @pytest.mark.asyncio
 async def test_http_verify_retries_then_ok(handlers: dict, mock_ssh: AsyncMock) -> None:
-    """HTTP fails a few times then succeeds."""
-    mock_ssh.run.side_effect = [
-        _make_ssh_result(exit_code=7),  # connection refused
-        _make_ssh_result(exit_code=7),
-        _make_ssh_result(exit_code=0),  # success
-    ]
-    with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
-        result = await handlers["http-verify"](server_host="staging")
+    """The retry loop runs remotely — one SSH command with backoff."""
+    mock_ssh.run.return_value = make_ssh_result(exit_code=0)
+    result = await handlers["http-verify"](server_host="staging")
     assert result == {}
+    cmd = mock_ssh.run.call_args[0][1]
+    assert "while :" in cmd
+    assert "delay * 2" in cmd
 
 
 @pytest.mark.asyncio
 async def test_http_verify_all_retries_fail(handlers: dict, mock_ssh: AsyncMock) -> None:
     """HTTP never responds — raises RuntimeError."""
-    mock_ssh.run.return_value = _make_ssh_result(exit_code=7)
+    mock_ssh.run.return_value = make_ssh_result(exit_code=7)
     with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
         with pytest.raises(RuntimeError, match="HTTP service not responding"):
             await handlers["http-verify"](server_host="staging")
-    # Should have tried 24 times
-    assert mock_ssh.run.await_count == 24
+    # The whole 240s budget is spent in one remote loop
+    assert mock_ssh.run.await_count == 1
+    assert "SECONDS + 240" in mock_ssh.run.call_args[0][1]
 
 
 @pytest.mark.asyncio
@@ -697,7 +788,7 @@ async def test_http_verify_custom_port(handlers: dict, mock_ssh: AsyncMock) -> N
 
 @pytest.mark.asyncio
 async def test_save_deploy_state(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.return_value = _make_ssh_result()
+    mock_ssh.run.return_value = make_ssh_result()
     result = await handlers["save-deploy-state"](
         server_host="staging", branch="staging", new_commit="abc123def",
     )
@@ -759,7 +850,7 @@ def _make_rollback_handlers(mock_ssh: AsyncMock, db_checkpoint_base_url: str = "
         },
         db_checkpoint_base_url=db_checkpoint_base_url,
     )
-    return _extract_handlers(cfg, mock_ssh)
+    return extract_handlers(register_deploy_handlers, cfg, mock_ssh)
 
 
 def _mock_httpx_context():
@@ -946,7 +1037,7 @@ async def test_rollback_empty_merge_sha_uses_force_push(mock_ssh: AsyncMock) ->
 
 def _make_handlers_with_config(config: AppConfig, mock_ssh: AsyncMock) -> dict:
     """Extract handlers using a custom AppConfig."""
-    return _extract_handlers(config, mock_ssh)
+    return extract_handlers(register_deploy_handlers, config, mock_ssh)
 
 
 @pytest.mark.asyncio
@@ -1025,8 +1116,8 @@ async def test_db_checkpoint_no_token_omits_header(mock_ssh: AsyncMock) -> None:
 @pytest.mark.asyncio
 async def test_git_pull_production_server(prod_handlers: dict, mock_ssh: AsyncMock) -> None:
     """Handlers resolve production server correctly."""
-    mock_ssh.run.return_value = _make_ssh_result(stdout="old\n")
-    mock_ssh.run_in_repo.side_effect = [OK(), OK(), _make_ssh_result(stdout="new\n")]
+    mock_ssh.run.return_value = make_ssh_result(stdout="old\n")
+    mock_ssh.run_in_repo.side_effect = [OK(), OK(), make_ssh_result(stdout="new\n")]
     result = await prod_handlers["git-pull"](server_host="production", branch="main")
     assert result["has_changes"] is True
 
@@ -1048,20 +1139,20 @@ async def test_full_deploy_simulation(handlers: dict, mock_ssh: AsyncMock) -> No
     """Simulate a full deploy pipeline: pull → detect → build → up → update → smoke → verify → save-state."""
 
     # 1. git-pull
-    mock_ssh.run.return_value = _make_ssh_result(stdout="aaa1111\n")
-    mock_ssh.run_in_repo.side_effect = [OK(), OK(), _make_ssh_result(stdout="bbb2222\n")]
+    mock_ssh.run.return_value = make_ssh_result(stdout="aaa1111\n")
+    mock_ssh.run_in_repo.side_effect = [OK(), OK(), make_ssh_result(stdout="bbb2222\n")]
     pull_result = await handlers["git-pull"](server_host="staging", branch="staging")
     assert pull_result["has_changes"] is True
 
     # 2. detect-modules
     mock_ssh.run_in_repo.reset_mock()
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="2\n"),
-        _make_ssh_result(stdout="src/custom/tut_hr/models/hr.py\n"),
-        _make_ssh_result(stdout="yes\n"),
-        _make_ssh_result(stdout=""), _make_ssh_result(stdout=""),
-        _make_ssh_result(stdout=""),
-        _make_ssh_result(stdout=""),
+        make_ssh_result(stdout="2\n"),
+        make_ssh_result(stdout="src/custom/tut_hr/models/hr.py\n"),
+        make_ssh_result(stdout="yes\n"),
+        make_ssh_result(stdout=""), make_ssh_result(stdout=""),
+        make_ssh_result(stdout=""),
+        make_ssh_result(stdout=""),
     ]
     detect_result = await handlers["detect-modules"](
         server_host="staging",
@@ -1079,8 +1170,8 @@ async def test_full_deploy_simulation(handlers: dict, mock_ssh: AsyncMock) -> No
     mock_ssh.run_in_repo.side_effect = None
     mock_ssh.run_in_repo.return_value = OK()
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="running\n"),
-        _make_ssh_result(exit_code=0),
+        make_ssh_result(stdout="running\n"),
+        make_ssh_result(exit_code=0),
         OK(),
     ]
     with patch("worker.handlers.deploy._sleep", new_callable=AsyncMock):
@@ -1092,8 +1183,8 @@ async def test_full_deploy_simulation(handlers: dict, mock_ssh: AsyncMock) -> No
     mock_ssh.run.side_effect = None
     mock_ssh.run_in_repo.side_effect = None
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="dbpass\n"),
-        _make_ssh_result(stdout="tut_hr\nsale\n"),
+        make_ssh_result(stdout="dbpass\n"),
+        make_ssh_result(stdout="tut_hr\nsale\n"),
         OK(),
     ]
     mock_ssh.run_in_repo.side_effect = [OK(), OK(), OK(), OK()]
@@ -1108,9 +1199,9 @@ async def test_full_deploy_simulation(handlers: dict, mock_ssh: AsyncMock) -> No
     mock_ssh.run_in_repo.reset_mock()
     mock_ssh.run.side_effect = None
     mock_ssh.run_in_repo.side_effect = None
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="INFO odoo: Modules loaded.\n"),
+        make_ssh_result(stdout="INFO odoo: Modules loaded.\n"),
     ]
     smoke_result = await handlers["smoke-test"](server_host="staging")
     assert smoke_result["smoke_passed"] is True  # no errors → returns True
@@ -1139,8 +1230,8 @@ async def test_deploy_with_rollback_on_smoke_failure(handlers: dict, mock_ssh: A
     """Simulate deploy where smoke test fails and rollback is triggered."""
 
     # 1. git-pull
-    mock_ssh.run.return_value = _make_ssh_result(stdout="oldcommit\n")
-    mock_ssh.run_in_repo.side_effect = [OK(), OK(), _make_ssh_result(stdout="newcommit\n")]
+    mock_ssh.run.return_value = make_ssh_result(stdout="oldcommit\n")
+    mock_ssh.run_in_repo.side_effect = [OK(), OK(), make_ssh_result(stdout="newcommit\n")]
     pull_result = await handlers["git-pull"](server_host="staging", branch="staging")
 
     # 2-5. detect + up + update (assume they pass)
@@ -1150,9 +1241,9 @@ async def test_deploy_with_rollback_on_smoke_failure(handlers: dict, mock_ssh: A
     mock_ssh.run_in_repo.reset_mock()
     mock_ssh.run.side_effect = None
     mock_ssh.run_in_repo.side_effect = None
-    mock_ssh.run.return_value = _make_ssh_result(stdout="dbpass\n")
+    mock_ssh.run.return_value = make_ssh_result(stdout="dbpass\n")
     mock_ssh.run_in_repo.side_effect = [
-        _make_ssh_result(stdout="CRITICAL: database migration failed\n", exit_code=1),
+        make_ssh_result(stdout="CRITICAL: database migration failed\n", exit_code=1),
     ]
     with pytest.raises(RuntimeError, match="Smoke test failed"):
         await handlers["smoke-test"](server_host="staging")
@@ -1171,8 +1262,8 @@ async def test_first_deploy_full_flow(handlers: dict, mock_ssh: AsyncMock) -> No
     """First deploy — old_commit=none → detect returns 'all' → full build."""
 
     # git-pull (first deploy)
-    mock_ssh.run.return_value = _make_ssh_result(stdout="none\n")
-    mock_ssh.run_in_repo.side_effect = [OK(), OK(), _make_ssh_result(stdout="abc123\n")]
+    mock_ssh.run.return_value = make_ssh_result(stdout="none\n")
+    mock_ssh.run_in_repo.side_effect = [OK(), OK(), make_ssh_result(stdout="abc123\n")]
     pull = await handlers["git-pull"](server_host="staging", branch="main")
     assert pull["old_commit"] == "none"
 
@@ -1,14 +1,16 @@
 """Tests for publish-message handler."""
+from contextlib import asynccontextmanager
+
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
-from worker.config import AppConfig
+from unittest.mock import AsyncMock, MagicMock
+from worker2.errors import ConfigError
 
 
 def _extract_handler(app_config):
-    from worker.handlers.messaging import register_messaging_handlers
+    from worker2.handlers.messaging import register_messaging_handlers
     handlers = {}
     mock_worker = MagicMock()
-    def capture(task_type, timeout_ms=30000):
+    def capture(task_type, **kwargs):
         def decorator(fn):
             handlers[task_type] = fn
             return fn
@@ -19,25 +21,28 @@ def _extract_handler(app_config):
 
 
 @pytest.mark.asyncio
-async def test_publish_message_success(app_config):
+async def test_publish_message_success(app_config, monkeypatch):
     handler = _extract_handler(app_config)
     job = MagicMock()
     job.variables = {"review_score": 8, "has_critical_issues": False}
+    mock_instance = AsyncMock()
+
+    @asynccontextmanager
+    async def fake_zeebe_client(*args, **kwargs):
+        yield mock_instance
 
-    with patch("worker.handlers.messaging.create_channel"), \
-         patch("worker.handlers.messaging.ZeebeClient") as MockClient:
-        mock_instance = AsyncMock()
-        MockClient.return_value = mock_instance
+    monkeypatch.setattr("worker2.handlers.messaging.zeebe_client", fake_zeebe_client)
 
-        result = await handler(
-            job,
-            message_name="msg_review_done",
-            correlation_key="42",
-        )
+    result = await handler(
+        job,
+        message_name="msg_review_done",
+        correlation_key="42",
+        ttl_ms=3_600_000,
+    )
 
     assert result["message_published"] is True
     mock_instance.publish_message.assert_awaited_once()
-    call_kw = mock_instance.publish_message.call_args[1]
+    call_kw = mock_instance.publish_message.call_args.kwargs
     assert call_kw["name"] == "msg_review_done"
     assert call_kw["correlation_key"] == "42"
     assert call_kw["time_to_live_in_milliseconds"] == 3_600_000
@@ -48,7 +53,7 @@ async def test_publish_message_missing_name(app_config):
     handler = _extract_handler(app_config)
     job = MagicMock()
     job.variables = {}
-    with pytest.raises(ValueError, match="message_name"):
+    with pytest.raises(ConfigError, match="message_name"):
         await handler(job, message_name="", correlation_key="42")
 
 
@@ -57,5 +62,5 @@ async def test_publish_message_missing_correlation(app_config):
     handler = _extract_handler(app_config)
     job = MagicMock()
     job.variables = {}
-    with pytest.raises(ValueError, match="correlation_key"):
+    with pytest.raises(ConfigError, match="correlation_key"):
         await handler(job, message_name="test", correlation_key="")
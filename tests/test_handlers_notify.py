@@ -2,41 +2,17 @@
 
 from __future__ import annotations
 
-from unittest.mock import MagicMock
-
 import pytest
 
 from worker.config import AppConfig
 from worker.handlers.notify import register_notify_handlers
 
-
-def _make_mock_job() -> MagicMock:
-    """Create a mock pyzeebe Job with required attributes."""
-    job = MagicMock()
-    job.process_instance_key = 2251799813793035
-    job.element_instance_key = 2251799813793040
-    job.bpmn_process_id = "upstream-sync"
-    return job
-
-
-def _extract_handlers(config: AppConfig) -> dict:
-    handlers = {}
-
-    def task_decorator(task_type: str, **kwargs):
-        def wrapper(fn):
-            handlers[task_type] = fn
-            return fn
-        return wrapper
-
-    worker = MagicMock()
-    worker.task = task_decorator
-    register_notify_handlers(worker, config)
-    return handlers
+from ._helpers import extract_handlers, make_mock_job
 
 
 @pytest.fixture
 def handlers(app_config: AppConfig) -> dict:
-    return _extract_handlers(app_config)
+    return extract_handlers(register_notify_handlers, app_config)
 
 
 # ── render-sync-html ─────────────────────────────────────
@@ -44,7 +20,7 @@ def handlers(app_config: AppConfig) -> dict:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_returns_all_fields(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         affected_custom_count=3,
@@ -68,7 +44,7 @@ async def test_render_sync_html_returns_all_fields(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_conflict_name(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         affected_custom_count=5,
@@ -81,7 +57,7 @@ async def test_render_sync_html_conflict_name(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_review_name(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         sync_branch="sync/upstream-20260301-120000",
@@ -92,7 +68,7 @@ async def test_render_sync_html_review_name(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_conflict_description_has_audit(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         audit_conflicts=3,
@@ -110,7 +86,7 @@ async def test_render_sync_html_conflict_description_has_audit(handlers: dict) -
 
 @pytest.mark.asyncio
 async def test_render_sync_html_review_description_has_pr_link(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         pr_url="https://github.com/tut-ua/odoo-enterprise/pull/42",
@@ -121,7 +97,7 @@ async def test_render_sync_html_review_description_has_pr_link(handlers: dict) -
 
 @pytest.mark.asyncio
 async def test_render_sync_html_no_conflicts_message(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         audit_conflicts=0,
@@ -131,7 +107,7 @@ async def test_render_sync_html_no_conflicts_message(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_modules_list(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         changed_modules="sale, stock, account",
@@ -143,7 +119,7 @@ async def test_render_sync_html_modules_list(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_branch_link(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         sync_branch="sync/upstream-20260301-120000",
@@ -154,7 +130,7 @@ async def test_render_sync_html_branch_link(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_render_sync_html_impact_table(handlers: dict) -> None:
-    job = _make_mock_job()
+    job = make_mock_job()
     result = await handlers["render-sync-html"](
         job=job,
         impact_table="| Custom Module | Affected Dependencies |\n|---|---|\n| tut_core | sale, stock |",
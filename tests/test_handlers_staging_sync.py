@@ -8,26 +8,8 @@ import pytest
 
 from worker2.config import AppConfig, ServerConfig
 from worker2.handlers.staging_sync import register_staging_sync_handlers
-from worker2.ssh import CommandResult
 
-
-def _make_ssh_result(stdout: str = "", stderr: str = "", exit_code: int = 0) -> CommandResult:
-    return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
-
-
-def _extract_handlers(config: AppConfig, ssh: AsyncMock) -> dict:
-    handlers: dict = {}
-
-    def task_decorator(task_type: str, **kwargs):
-        def wrapper(fn):
-            handlers[task_type] = fn
-            return fn
-        return wrapper
-
-    worker = MagicMock()
-    worker.task = task_decorator
-    register_staging_sync_handlers(worker, config, ssh)
-    return handlers
+from ._helpers import extract_handlers, make_ssh_result
 
 
 @pytest.fixture
@@ -45,13 +27,13 @@ def sync_config() -> AppConfig:
 @pytest.fixture
 def mock_ssh() -> AsyncMock:
     ssh = AsyncMock()
-    ssh.run = AsyncMock(return_value=_make_ssh_result(stdout="dummy"))
+    ssh.run = AsyncMock(return_value=make_ssh_result(stdout="dummy"))
     return ssh
 
 
 @pytest.fixture
 def handlers(sync_config: AppConfig, mock_ssh: AsyncMock) -> dict:
-    return _extract_handlers(sync_config, mock_ssh)
+    return extract_handlers(register_staging_sync_handlers, sync_config, mock_ssh)
 
 
 def _make_nfs_conn_mock() -> MagicMock:
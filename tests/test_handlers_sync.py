@@ -1,34 +1,27 @@
-"""Tests for worker.handlers.sync — upstream sync handlers."""
+"""Tests for worker2.handlers.sync — upstream sync handlers."""
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock
 
+import httpx
 import pytest
 
-from worker.config import AppConfig, ServerConfig
-from worker.handlers.sync import register_sync_handlers
-from worker.ssh import CommandResult
+from worker2.config import AppConfig, ServerConfig
+from worker2.errors import ConfigError, SyncError
+from worker2.handlers.sync import register_sync_handlers
 
+from ._helpers import extract_handlers, make_mock_job, make_ssh_result
 
-def _make_ssh_result(stdout: str = "", stderr: str = "", exit_code: int = 0) -> CommandResult:
-    return CommandResult(stdout=stdout, stderr=stderr, exit_code=exit_code)
 
+# Results shared across side_effect lists; handlers never mutate them.
+_OK = make_ssh_result()
 
-def _extract_handlers(config: AppConfig, ssh: AsyncMock, github: AsyncMock) -> dict:
-    """Register handlers and capture them from mock worker."""
-    handlers = {}
-
-    def task_decorator(task_type: str, **kwargs):
-        def wrapper(fn):
-            handlers[task_type] = fn
-            return fn
-        return wrapper
-
-    worker = MagicMock()
-    worker.task = task_decorator
-    register_sync_handlers(worker, config, ssh, github)
-    return handlers
+_AsyncClient = httpx.AsyncClient
+_runbot_payload: list[dict] = [{}]
+_RUNBOT_TRANSPORT = httpx.MockTransport(
+    lambda request: httpx.Response(200, json=_runbot_payload[0]),
+)
 
 
 @pytest.fixture
@@ -73,7 +66,7 @@ def mock_github() -> AsyncMock:
 
 @pytest.fixture
 def handlers(kozak_config: AppConfig, mock_ssh: AsyncMock, mock_github: AsyncMock) -> dict:
-    return _extract_handlers(kozak_config, mock_ssh, mock_github)
+    return extract_handlers(register_sync_handlers, kozak_config, mock_ssh, mock_github)
 
 
 # ── fetch-current-version ─────────────────────────────────
@@ -82,8 +75,8 @@ def handlers(kozak_config: AppConfig, mock_ssh: AsyncMock, mock_github: AsyncMoc
 @pytest.mark.asyncio
 async def test_fetch_current_version(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
-        _make_ssh_result(stdout="version_info = (19, 0, 0, FINAL, 0, '')\n"),
-        _make_ssh_result(stdout='{"community_sha": "aaa", "enterprise_sha": "bbb"}\n'),
+        make_ssh_result(stdout="version_info = (19, 0, 0, FINAL, 0, '')\n"),
+        make_ssh_result(stdout='{"community_sha": "aaa", "enterprise_sha": "bbb"}\n'),
     ]
     result = await handlers["fetch-current-version"]()
     assert result["current_version"] == "19.0"
@@ -94,9 +87,20 @@ async def test_fetch_current_version(handlers: dict, mock_ssh: AsyncMock) -> Non
 # ── fetch-runbot ──────────────────────────────────────────
 
 
+@pytest.fixture
+def runbot_api(monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    """Serve Runbot JSON from a shared MockTransport; tests set ``[0]``."""
+    monkeypatch.setattr(
+        "worker2.handlers.sync.httpx.AsyncClient",
+        lambda *args, **kwargs: _AsyncClient(transport=_RUNBOT_TRANSPORT),
+    )
+    _runbot_payload[0] = {}
+    return _runbot_payload
+
+
 @pytest.mark.asyncio
-async def test_fetch_runbot(handlers: dict) -> None:
-    runbot_data = {
+async def test_fetch_runbot(handlers: dict, runbot_api: list[dict]) -> None:
+    runbot_api[0] = {
         "19.0": {
             "commits": [
                 {"repo": "odoo", "head": "com_sha_abc"},
@@ -104,43 +108,23 @@ async def test_fetch_runbot(handlers: dict) -> None:
             ]
         }
     }
-    with patch("worker.handlers.sync.httpx.AsyncClient") as MockClient:
-        instance = AsyncMock()
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = runbot_data
-        mock_resp.raise_for_status = MagicMock()
-        instance.get = AsyncMock(return_value=mock_resp)
-        instance.__aenter__ = AsyncMock(return_value=instance)
-        instance.__aexit__ = AsyncMock(return_value=False)
-        MockClient.return_value = instance
-
-        result = await handlers["fetch-runbot"]()
+    result = await handlers["fetch-runbot"]()
 
     assert result["runbot_community_sha"] == "com_sha_abc"
     assert result["runbot_enterprise_sha"] == "ent_sha_def"
 
 
 @pytest.mark.asyncio
-async def test_fetch_runbot_incomplete(handlers: dict) -> None:
-    runbot_data = {
+async def test_fetch_runbot_incomplete(handlers: dict, runbot_api: list[dict]) -> None:
+    runbot_api[0] = {
         "19.0": {
             "commits": [
                 {"repo": "odoo", "head": "com_sha"},
             ]
         }
     }
-    with patch("worker.handlers.sync.httpx.AsyncClient") as MockClient:
-        instance = AsyncMock()
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = runbot_data
-        mock_resp.raise_for_status = MagicMock()
-        instance.get = AsyncMock(return_value=mock_resp)
-        instance.__aenter__ = AsyncMock(return_value=instance)
-        instance.__aexit__ = AsyncMock(return_value=False)
-        MockClient.return_value = instance
-
-        with pytest.raises(ValueError, match="Incomplete Runbot data"):
-            await handlers["fetch-runbot"]()
+    with pytest.raises(SyncError, match="Incomplete Runbot data"):
+        await handlers["fetch-runbot"]()
 
 
 # ── diff-report ───────────────────────────────────────────
@@ -148,30 +132,29 @@ async def test_fetch_runbot_incomplete(handlers: dict) -> None:
 
 @pytest.mark.asyncio
 async def test_diff_report_no_changes(handlers: dict, mock_ssh: AsyncMock) -> None:
-    mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # git add -N
-        _make_ssh_result(stdout="0\n"),  # community check
-        _make_ssh_result(stdout="0\n"),  # enterprise check
-    ]
+    mock_ssh.run.side_effect = [_OK]  # git add -N + git diff: nothing listed
     result = await handlers["diff-report"](workspace_dir="/tmp/ws")
     assert result["has_changes"] is False
+    assert result["changed_modules"] == ""
 
 
 @pytest.mark.asyncio
 async def test_diff_report_with_changes(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # git add -N
-        _make_ssh_result(stdout="1\n"),  # community: changed
-        _make_ssh_result(stdout="1\n"),  # enterprise: changed
-        _make_ssh_result(stdout="5\n"),  # community file count
-        _make_ssh_result(stdout="3\n"),  # enterprise file count
-        _make_ssh_result(stdout="sale\naccount\n"),  # enterprise module names
-        _make_ssh_result(stdout="base\n"),  # community addons
+        make_ssh_result(stdout=(
+            "src/community/odoo/addons/base/models/res_users.py\0"
+            "src/community/odoo/tools/misc.py\0"
+            "src/enterprise/sale/models/sale.py\0"
+            "src/enterprise/account/views/account.xml\0"
+            "src/enterprise/account/models/move.py\0"
+        )),
     ]
     result = await handlers["diff-report"](workspace_dir="/tmp/ws")
     assert result["has_changes"] is True
+    assert result["community_files"] == 2
     assert result["enterprise_files"] == 3
-    assert "sale" in result["changed_modules"]
+    assert result["changed_modules"] == "account, base, sale"
+    assert mock_ssh.run.await_count == 1
 
 
 # ── impact-analysis ───────────────────────────────────────
@@ -187,9 +170,9 @@ async def test_impact_analysis_empty(handlers: dict) -> None:
 async def test_impact_analysis_finds_affected(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
         # find custom modules
-        _make_ssh_result(stdout="/tmp/sync-workspace/src/custom/tut_hr\n"),
+        make_ssh_result(stdout="/tmp/sync-workspace/src/custom/tut_hr\n"),
         # read __manifest__.py
-        _make_ssh_result(stdout="{'name': 'TUT HR', 'depends': ['hr', 'sale']}"),
+        make_ssh_result(stdout="{'name': 'TUT HR', 'depends': ['hr', 'sale']}"),
     ]
     result = await handlers["impact-analysis"](changed_modules="sale, account", workspace_dir="/tmp/ws")
     assert result["affected_custom_count"] == 1
@@ -202,8 +185,8 @@ async def test_impact_analysis_finds_affected(handlers: dict, mock_ssh: AsyncMoc
 @pytest.mark.asyncio
 async def test_sync_code_to_demo_success(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # git fetch
-        _make_ssh_result(),  # git checkout
+        _OK,  # git fetch
+        _OK,  # git checkout
     ]
     result = await handlers["sync-code-to-demo"](sync_branch="sync/upstream-20260225-120000")
     assert result == {"code_synced": True}
@@ -219,23 +202,17 @@ async def test_sync_code_to_demo_success(handlers: dict, mock_ssh: AsyncMock) ->
 # ── merge-feature-to-staging ──────────────────────────────
 
 
-def _make_mock_job(process_instance_key: int = 12345) -> MagicMock:
-    job = MagicMock()
-    job.process_instance_key = process_instance_key
-    return job
-
-
 @pytest.mark.asyncio
 async def test_merge_feature_to_staging_success(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # git clone
-        _make_ssh_result(),  # git fetch
-        _make_ssh_result(exit_code=0),  # git merge (success)
-        _make_ssh_result(),  # git push
-        _make_ssh_result(stdout="deadbeef\n"),  # git rev-parse HEAD
-        _make_ssh_result(),  # rm -rf cleanup
+        _OK,  # git clone
+        _OK,  # git fetch
+        _OK,  # git merge (success)
+        _OK,  # git push
+        make_ssh_result(stdout="deadbeef\n"),  # git rev-parse HEAD
+        _OK,  # rm -rf cleanup
     ]
-    job = _make_mock_job(99999)
+    job = make_mock_job(99999)
     result = await handlers["merge-feature-to-staging"](
         job=job,
         feature_branch="feat/my-feature",
@@ -264,14 +241,14 @@ async def test_merge_feature_to_staging_returns_merge_sha(
 ) -> None:
     """merge-feature-to-staging should return merge_sha (HEAD after push)."""
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),                    # git clone
-        _make_ssh_result(),                    # git fetch
-        _make_ssh_result(exit_code=0),         # git merge
-        _make_ssh_result(),                    # git push
-        _make_ssh_result(stdout="abc123\n"),   # git rev-parse HEAD
-        _make_ssh_result(),                    # rm -rf workspace
+        _OK,                                  # git clone
+        _OK,                                  # git fetch
+        _OK,                                  # git merge
+        _OK,                                  # git push
+        make_ssh_result(stdout="abc123\n"),   # git rev-parse HEAD
+        _OK,                                  # rm -rf workspace
     ]
-    job = _make_mock_job(99999)
+    job = make_mock_job(99999)
     result = await handlers["merge-feature-to-staging"](
         job=job,
         feature_branch="feat/x",
@@ -287,15 +264,15 @@ async def test_merge_feature_to_staging_returns_merge_sha(
 @pytest.mark.asyncio
 async def test_merge_feature_to_staging_conflict(handlers: dict, mock_ssh: AsyncMock) -> None:
     mock_ssh.run.side_effect = [
-        _make_ssh_result(),  # git clone
-        _make_ssh_result(),  # git fetch
-        _make_ssh_result(exit_code=1, stderr="CONFLICT"),  # git merge (conflict)
-        _make_ssh_result(),  # git merge --abort
-        _make_ssh_result(),  # rm -rf cleanup
+        _OK,  # git clone
+        _OK,  # git fetch
+        make_ssh_result(exit_code=1, stderr="CONFLICT"),  # git merge (conflict)
+        _OK,  # git merge --abort
+        _OK,  # rm -rf cleanup
     ]
-    with pytest.raises(RuntimeError, match="Merge failed"):
+    with pytest.raises(SyncError, match="Merge failed"):
         await handlers["merge-feature-to-staging"](
-            job=_make_mock_job(),
+            job=make_mock_job(),
             feature_branch="feat/conflicting",
             server_host="staging",
         )
@@ -303,8 +280,8 @@ async def test_merge_feature_to_staging_conflict(handlers: dict, mock_ssh: Async
 
 @pytest.mark.asyncio
 async def test_merge_feature_to_staging_missing_branch(handlers: dict) -> None:
-    with pytest.raises(ValueError, match="feature_branch is required"):
-        await handlers["merge-feature-to-staging"](job=_make_mock_job(), feature_branch="")
+    with pytest.raises(ConfigError, match="feature_branch is required"):
+        await handlers["merge-feature-to-staging"](job=make_mock_job(), feature_branch="")
 
 
 # ── github-pr-ready ───────────────────────────────────────
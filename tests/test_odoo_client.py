@@ -1,13 +1,16 @@
-"""Tests for worker.odoo_client — OdooClient HTTP webhook operations."""
+"""Tests for worker2.odoo_client — OdooClient HTTP webhook operations."""
 
 from __future__ import annotations
 
-from unittest.mock import patch, MagicMock
+import json
 
+import httpx
 import pytest
 
-from worker.config import OdooConfig
-from worker.odoo_client import OdooClient
+from worker2.config import OdooConfig
+from worker2.odoo_client import OdooClient
+
+_AsyncClient = httpx.AsyncClient
 
 
 @pytest.fixture
@@ -24,72 +27,77 @@ def odoo_client(odoo_config: OdooConfig) -> OdooClient:
     return OdooClient(odoo_config)
 
 
-@patch("worker.odoo_client.httpx.post")
-def test_create_task(mock_post: MagicMock, odoo_client: OdooClient) -> None:
-    mock_post.return_value = MagicMock(
-        status_code=200,
-        json=MagicMock(return_value={"id": 99}),
-        raise_for_status=MagicMock(),
-    )
-    task_id = odoo_client.create_task(name="Test task")
+class _Webhook(list):
+    """Requests seen by the in-memory webhook, plus the clients created."""
+
+    clients: list[httpx.AsyncClient]
+
+
+@pytest.fixture
+def webhook(monkeypatch: pytest.MonkeyPatch) -> _Webhook:
+    """Route OdooClient's HTTP client to an in-memory webhook."""
+    requests = _Webhook()
+    requests.clients = clients = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"id": 98 + len(requests)})
+
+    def make_client(*args, **kwargs) -> httpx.AsyncClient:
+        client = _AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr("worker2.odoo_client.httpx.AsyncClient", make_client)
+    return requests
+
+
+def _body(request: httpx.Request) -> dict:
+    return json.loads(request.content)
+
+
+@pytest.mark.asyncio
+async def test_create_task(odoo_client: OdooClient, webhook: _Webhook) -> None:
+    task_id = await odoo_client.create_task(name="Test task")
     assert task_id == 99
 
-    call_kwargs = mock_post.call_args
-    assert call_kwargs[0][0] == "https://o.tut.ua/web/hook/67f62d7c-2612-444c-baf3-ad409c769bbe"
-    body = call_kwargs[1]["json"]
+    assert str(webhook[0].url) == "https://o.tut.ua/web/hook/67f62d7c-2612-444c-baf3-ad409c769bbe"
+    body = _body(webhook[0])
     assert body["name"] == "Test task"
     assert body["_model"] == "project.project"
     assert body["_id"] == 252
     assert "description" not in body
 
 
-@patch("worker.odoo_client.httpx.post")
-def test_create_task_with_description(mock_post: MagicMock, odoo_client: OdooClient) -> None:
-    mock_post.return_value = MagicMock(
-        status_code=200,
-        json=MagicMock(return_value={"id": 100}),
-        raise_for_status=MagicMock(),
-    )
-    task_id = odoo_client.create_task(name="Task", description="Details here")
-    assert task_id == 100
-    body = mock_post.call_args[1]["json"]
-    assert body["description"] == "Details here"
-
-
-@patch("worker.odoo_client.httpx.post")
-def test_create_task_with_assignee(mock_post: MagicMock, odoo_client: OdooClient) -> None:
-    mock_post.return_value = MagicMock(
-        status_code=200,
-        json=MagicMock(return_value={"id": 101}),
-        raise_for_status=MagicMock(),
-    )
-    task_id = odoo_client.create_task(name="Assigned task")
-    assert task_id == 101
-    body = mock_post.call_args[1]["json"]
-    assert body["x_studio_camunda_user_ids"] == 10
-
-
-@patch("worker.odoo_client.httpx.post")
-def test_create_task_with_process_instance_key(mock_post: MagicMock, odoo_client: OdooClient) -> None:
-    mock_post.return_value = MagicMock(
-        status_code=200,
-        json=MagicMock(return_value={"id": 102}),
-        raise_for_status=MagicMock(),
-    )
-    task_id = odoo_client.create_task(name="Tracked task", process_instance_key=2251799813688185)
-    assert task_id == 102
-    body = mock_post.call_args[1]["json"]
-    assert body["process_instance_key"] == 2251799813688185
-
-
-@patch("worker.odoo_client.httpx.post")
-def test_create_task_without_process_instance_key(mock_post: MagicMock, odoo_client: OdooClient) -> None:
-    mock_post.return_value = MagicMock(
-        status_code=200,
-        json=MagicMock(return_value={"id": 103}),
-        raise_for_status=MagicMock(),
-    )
-    task_id = odoo_client.create_task(name="No key task")
-    assert task_id == 103
-    body = mock_post.call_args[1]["json"]
-    assert "process_instance_key" not in body
+@pytest.mark.asyncio
+async def test_create_task_with_description(odoo_client: OdooClient, webhook: _Webhook) -> None:
+    await odoo_client.create_task(name="Task", description="Details here")
+    assert _body(webhook[0])["description"] == "Details here"
+
+
+@pytest.mark.asyncio
+async def test_create_task_with_assignee(odoo_client: OdooClient, webhook: _Webhook) -> None:
+    await odoo_client.create_task(name="Assigned task")
+    assert _body(webhook[0])["x_studio_camunda_user_ids"] == 10
+
+
+@pytest.mark.asyncio
+async def test_create_task_with_process_instance_key(odoo_client: OdooClient, webhook: _Webhook) -> None:
+    await odoo_client.create_task(name="Tracked task", process_instance_key=2251799813688185)
+    assert _body(webhook[0])["process_instance_key"] == 2251799813688185
+
+
+@pytest.mark.asyncio
+async def test_create_task_without_process_instance_key(odoo_client: OdooClient, webhook: _Webhook) -> None:
+    await odoo_client.create_task(name="No key task")
+    assert "process_instance_key" not in _body(webhook[0])
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_across_calls(odoo_client: OdooClient, webhook: _Webhook) -> None:
+    assert await odoo_client.create_task(name="First") == 99
+    assert await odoo_client.create_task(name="Second") == 100
+    assert len(webhook.clients) == 1
+
+    await odoo_client.aclose()
+    assert webhook.clients[0].is_closed
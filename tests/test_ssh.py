@@ -1,4 +1,4 @@
-"""Tests for worker.ssh — CommandResult and AsyncSSHClient."""
+"""Tests for worker2.ssh — CommandResult and AsyncSSHClient."""
 
 from __future__ import annotations
 
@@ -6,8 +6,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from worker.config import ServerConfig
-from worker.ssh import AsyncSSHClient, CommandResult, RemoteCommandError
+from worker2.config import ServerConfig
+from worker2.ssh import AsyncSSHClient, CommandResult, RemoteCommandError
 
 
 # ── CommandResult ─────────────────────────────────────────
@@ -59,3 +59,114 @@ async def test_run_in_repo_prepends_cd() -> None:
     call_args = mock_run.call_args
     assert call_args[0][0] is server
     assert call_args[0][1] == "cd /opt/repo && git status"
+
+
+# ── AsyncSSHClient.upload ─────────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_upload_writes_temp_file_then_renames() -> None:
+    server = ServerConfig(host="test.host", ssh_user="deploy")
+    client = AsyncSSHClient()
+    sftp = MagicMock()
+    sftp.posix_rename = AsyncMock()
+    remote_file = sftp.open.return_value.__aenter__.return_value
+    remote_file.write = AsyncMock()
+    conn = MagicMock()
+    conn.start_sftp_client.return_value.__aenter__.return_value = sftp
+
+    with patch.object(client, "_get_connection", AsyncMock(return_value=conn)):
+        await client.upload(server, b"print(1)\n", "/tmp/script.py")
+
+    tmp_path, mode = sftp.open.call_args[0]
+    assert mode == "wb"
+    assert tmp_path.startswith("/tmp/script.py.") and tmp_path.endswith(".tmp")
+    assert tmp_path != "/tmp/script.py.tmp"
+    remote_file.write.assert_awaited_once_with(b"print(1)\n")
+    sftp.posix_rename.assert_awaited_once_with(tmp_path, "/tmp/script.py")
+
+
+# ── AsyncSSHClient.run_stream ─────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_run_stream_yields_lines_until_eof() -> None:
+    server = ServerConfig(host="test.host", ssh_user="deploy")
+    client = AsyncSSHClient()
+    process = MagicMock()
+    process.stdout.readline = AsyncMock(side_effect=["a\n", "b\n", ""])
+    conn = MagicMock()
+    conn.create_process.return_value.__aenter__.return_value = process
+
+    with patch.object(client, "_get_connection", AsyncMock(return_value=conn)):
+        lines = [line async for line in client.run_stream(server, "cat log")]
+
+    assert lines == ["a\n", "b\n"]
+    assert conn.create_process.call_args[0][0] == "cat log"
+
+
+# ── AsyncSSHClient._get_connection ────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_get_connection_reuses_open_connection_without_probe() -> None:
+    server = ServerConfig(host="test.host", ssh_user="deploy")
+    client = AsyncSSHClient()
+    conn = MagicMock()
+    conn.is_closed.return_value = False
+    conn.run = AsyncMock()
+
+    with patch("worker2.ssh.asyncssh.connect", AsyncMock(return_value=conn)) as connect:
+        first = await client._get_connection(server)
+        second = await client._get_connection(server)
+
+    assert first is second is conn
+    connect.assert_awaited_once()
+    assert connect.call_args.kwargs["keepalive_interval"] == 30
+    conn.run.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_connection_reconnects_when_closed() -> None:
+    server = ServerConfig(host="test.host", ssh_user="deploy")
+    client = AsyncSSHClient()
+    stale = MagicMock()
+    stale.is_closed.return_value = True
+    fresh = MagicMock()
+    fresh.is_closed.return_value = False
+
+    with patch("worker2.ssh.asyncssh.connect", AsyncMock(side_effect=[stale, fresh])) as connect:
+        await client._get_connection(server)
+        conn = await client._get_connection(server)
+
+    assert conn is fresh
+    assert connect.await_count == 2
+
+
+# ── AsyncSSHClient session bound ──────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_run_bounds_concurrent_sessions_per_server() -> None:
+    import asyncio
+
+    server = ServerConfig(host="test.host", ssh_user="deploy")
+    client = AsyncSSHClient(max_sessions=2)
+    active = 0
+    peak = 0
+
+    async def fake_run(command, check=False):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return MagicMock(stdout="", stderr="", exit_status=0)
+
+    conn = MagicMock()
+    conn.run = fake_run
+
+    with patch.object(client, "_get_connection", AsyncMock(return_value=conn)):
+        await asyncio.gather(*(client.run(server, "true") for _ in range(6)))
+
+    assert peak == 2
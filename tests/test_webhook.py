@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import hashlib
+import asyncio
 import hmac
 import json
 from unittest.mock import AsyncMock, patch
@@ -12,26 +12,45 @@ import pytest_asyncio
 from aiohttp.test_utils import TestClient, TestServer
 
 from worker.config import AppConfig
-from worker2.webhook import WebhookServer
+from worker2.webhook import WebhookServer, _verify_github_signature
 
 
 def _sign(body: bytes, secret: str) -> str:
     """Compute GitHub HMAC-SHA256 signature."""
-    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-    return f"sha256={digest}"
+    return "sha256=" + hmac.digest(secret.encode(), body, "sha256").hex()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def webhook(app_config: AppConfig) -> WebhookServer:
     return WebhookServer(app_config)
 
 
-@pytest_asyncio.fixture
-async def client(webhook: WebhookServer) -> TestClient:
-    """Create aiohttp test client for the webhook app."""
-    server = TestServer(webhook._app)
-    client = TestClient(server)
+@pytest.fixture(autouse=True)
+def _reset_webhook(webhook: WebhookServer) -> None:
+    """Forget state left by earlier tests sharing the server."""
+    webhook._verified_deliveries.clear()
+    # Each test patches _create_zeebe_client; drop the cached client.
+    webhook._zeebe = None
+
+
+async def _start_client(webhook: WebhookServer) -> TestClient:
+    client = TestClient(TestServer(webhook._app))
     await client.start_server()
+    return client
+
+
+@pytest_asyncio.fixture(scope="module")
+async def client(webhook: WebhookServer) -> TestClient:
+    """Create aiohttp test client for the webhook app, once per module."""
+    client = await _start_client(webhook)
+    yield client
+    await client.close()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def production_client(app_config_with_production: AppConfig) -> TestClient:
+    """Test client for a webhook app that also has a production server."""
+    client = await _start_client(WebhookServer(app_config_with_production))
     yield client
     await client.close()
 
@@ -116,15 +135,30 @@ async def test_github_valid_signature(client: TestClient, app_config: AppConfig)
 
         assert mock_client.publish_message.await_count == 2
         calls = mock_client.publish_message.call_args_list
-        review_call = calls[0][1]
+        review_call = calls[0].kwargs
         assert review_call["name"] == "msg_pr_review"
         assert review_call["correlation_key"] == "42"
-        event_call = calls[1][1]
+        event_call = calls[1].kwargs
         assert event_call["name"] == "msg_pr_event"
         assert event_call["correlation_key"] == "feat/test"
         assert event_call["variables"]["pr_number"] == 42
 
 
+@pytest.mark.asyncio
+async def test_github_oversized_body_rejected(client: TestClient, app_config: AppConfig) -> None:
+    body = b"x" * (app_config.webhook.max_body_size + 1)
+    resp = await client.post(
+        "/webhook/github",
+        data=body,
+        headers={
+            "X-GitHub-Event": "pull_request",
+            "X-Hub-Signature-256": _sign(body, app_config.github.webhook_secret),
+            "Content-Type": "application/json",
+        },
+    )
+    assert resp.status == 413
+
+
 # ── Event routing ─────────────────────────────────────────
 
 @pytest.mark.asyncio
@@ -204,7 +238,7 @@ async def test_ready_for_review_publishes_pr_ready(client: TestClient, app_confi
         assert data["pr_number"] == 10
 
         mock_client.publish_message.assert_awaited_once()
-        call_kwargs = mock_client.publish_message.call_args[1]
+        call_kwargs = mock_client.publish_message.call_args.kwargs
         assert call_kwargs["name"] == "msg_pr_ready"
         assert call_kwargs["correlation_key"] == "10"
 
@@ -296,7 +330,7 @@ async def test_pr_merged_publishes_message(client: TestClient, app_config: AppCo
         assert data["pr_number"] == 55
 
         mock_client.publish_message.assert_awaited_once()
-        call_kwargs = mock_client.publish_message.call_args[1]
+        call_kwargs = mock_client.publish_message.call_args.kwargs
         assert call_kwargs["name"] == "msg_pr_merged"
         assert call_kwargs["correlation_key"] == "55"
         assert call_kwargs["variables"]["pr_number"] == 55
@@ -375,7 +409,7 @@ async def test_odoo_valid_token(client: TestClient) -> None:
         assert data["message"] == "msg_odoo_task_done"
         assert data["correlation_key"] == "123"
 
-        call_kwargs = mock_client.publish_message.call_args[1]
+        call_kwargs = mock_client.publish_message.call_args.kwargs
         assert call_kwargs["name"] == "msg_odoo_task_done"
         assert call_kwargs["correlation_key"] == "123"
 
@@ -397,7 +431,7 @@ async def test_odoo_process_instance_key_fallback(client: TestClient) -> None:
         data = await resp.json()
         assert data["correlation_key"] == "2251799813793035"
 
-        call_kwargs = mock_client.publish_message.call_args[1]
+        call_kwargs = mock_client.publish_message.call_args.kwargs
         assert call_kwargs["correlation_key"] == "2251799813793035"
 
 
@@ -427,16 +461,93 @@ def test_verify_github_signature_valid() -> None:
     body = b'{"test": true}'
     secret = "my-secret"
     sig = _sign(body, secret)
-    assert WebhookServer._verify_github_signature(body, secret, sig) is True
+    assert _verify_github_signature(body, secret, sig) is True
+
+
+def test_verify_github_signature_prekeyed_template() -> None:
+    body = b'{"test": true}'
+    template = hmac.new(b"my-secret", None, "sha256")
+    sig = _sign(body, "my-secret")
+    assert _verify_github_signature(body, template, sig) is True
+    # The template itself must stay unkeyed by the body.
+    assert _verify_github_signature(body, template, sig) is True
 
 
 def test_verify_github_signature_invalid() -> None:
     body = b'{"test": true}'
-    assert WebhookServer._verify_github_signature(body, "my-secret", "sha256=bad") is False
+    assert _verify_github_signature(body, "my-secret", "sha256=bad") is False
 
 
 def test_verify_github_signature_no_prefix() -> None:
-    assert WebhookServer._verify_github_signature(b"test", "secret", "nope") is False
+    assert _verify_github_signature(b"test", "secret", "nope") is False
+
+
+def test_verify_github_signature_non_hex() -> None:
+    sig = "sha256=" + "z" * 64
+    assert _verify_github_signature(b"test", b"secret", sig) is False
+
+
+def test_redelivery_skips_hmac(webhook: WebhookServer, app_config: AppConfig) -> None:
+    body = b'{"action": "opened"}'
+    sig = _sign(body, app_config.github.webhook_secret)
+    assert webhook._check_github_delivery(body, "delivery-1", sig) is True
+
+    with patch("worker2.webhook._verify_github_signature") as mock_verify:
+        assert webhook._check_github_delivery(body, "delivery-1", sig) is True
+    mock_verify.assert_not_called()
+
+
+def test_redelivery_with_other_body_is_rejected(
+    webhook: WebhookServer, app_config: AppConfig,
+) -> None:
+    body = b'{"action": "opened"}'
+    sig = _sign(body, app_config.github.webhook_secret)
+    assert webhook._check_github_delivery(body, "delivery-1", sig) is True
+    assert webhook._check_github_delivery(b'{"action": "closed"}', "delivery-1", sig) is False
+
+
+# ── Batched publishing ───────────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_concurrent_publishes_share_one_client(webhook: WebhookServer) -> None:
+    with patch.object(WebhookServer, "_create_zeebe_client") as mock_factory:
+        mock_client = AsyncMock()
+        mock_client.publish_message = AsyncMock()
+        mock_factory.return_value = mock_client
+
+        await asyncio.gather(
+            webhook._publish(name="msg_a", correlation_key="1", variables={}),
+            webhook._publish(name="msg_b", correlation_key="2", variables={}),
+        )
+
+    mock_factory.assert_called_once()
+    names = [c.kwargs["name"] for c in mock_client.publish_message.call_args_list]
+    assert names == ["msg_a", "msg_b"]
+
+
+@pytest.mark.asyncio
+async def test_publisher_client_is_reused(webhook: WebhookServer) -> None:
+    with patch.object(WebhookServer, "_create_zeebe_client") as mock_factory:
+        mock_factory.return_value = AsyncMock()
+
+        await webhook._publish(name="msg_a", correlation_key="1", variables={})
+        await webhook._publish(name="msg_b", correlation_key="2", variables={})
+
+    mock_factory.assert_called_once()
+    await webhook._close_zeebe_client()
+    assert webhook._zeebe is None
+
+
+@pytest.mark.asyncio
+async def test_publish_failure_reaches_caller(webhook: WebhookServer) -> None:
+    with patch.object(WebhookServer, "_create_zeebe_client") as mock_factory:
+        mock_client = AsyncMock()
+        mock_client.publish_message = AsyncMock(side_effect=RuntimeError("gateway down"))
+        mock_factory.return_value = mock_client
+
+        with pytest.raises(RuntimeError, match="gateway down"):
+            await webhook._publish(name="msg_a", correlation_key="1", variables={})
 
 
 # ── Production variable injection ─────────────────────────
@@ -444,55 +555,47 @@ def test_verify_github_signature_no_prefix() -> None:
 
 @pytest.mark.asyncio
 async def test_pr_event_includes_production_vars(
-    app_config_with_production: AppConfig,
+    production_client: TestClient, app_config_with_production: AppConfig,
 ) -> None:
     """When production server is configured, variables include production_* keys."""
-    webhook = WebhookServer(app_config_with_production)
-    server = TestServer(webhook._app)
-    client = TestClient(server)
-    await client.start_server()
+    payload = {
+        "action": "opened",
+        "pull_request": {
+            "number": 42,
+            "title": "Test PR",
+            "html_url": "https://github.com/tut-ua/odoo-enterprise/pull/42",
+            "user": {"login": "dev"},
+            "base": {"ref": "main"},
+            "head": {"ref": "feat/test", "sha": "abc123"},
+        },
+        "repository": {"full_name": "tut-ua/odoo-enterprise"},
+    }
+    body = json.dumps(payload).encode()
+    sig = _sign(body, app_config_with_production.github.webhook_secret)
 
-    try:
-        payload = {
-            "action": "opened",
-            "pull_request": {
-                "number": 42,
-                "title": "Test PR",
-                "html_url": "https://github.com/tut-ua/odoo-enterprise/pull/42",
-                "user": {"login": "dev"},
-                "base": {"ref": "main"},
-                "head": {"ref": "feat/test", "sha": "abc123"},
+    with patch.object(WebhookServer, "_create_zeebe_client") as mock_factory:
+        mock_client = AsyncMock()
+        mock_client.publish_message = AsyncMock()
+        mock_factory.return_value = mock_client
+
+        resp = await production_client.post(
+            "/webhook/github",
+            data=body,
+            headers={
+                "X-GitHub-Event": "pull_request",
+                "X-Hub-Signature-256": sig,
+                "Content-Type": "application/json",
             },
-            "repository": {"full_name": "tut-ua/odoo-enterprise"},
-        }
-        body = json.dumps(payload).encode()
-        sig = _sign(body, app_config_with_production.github.webhook_secret)
-
-        with patch.object(WebhookServer, "_create_zeebe_client") as mock_factory:
-            mock_client = AsyncMock()
-            mock_client.publish_message = AsyncMock()
-            mock_factory.return_value = mock_client
-
-            resp = await client.post(
-                "/webhook/github",
-                data=body,
-                headers={
-                    "X-GitHub-Event": "pull_request",
-                    "X-Hub-Signature-256": sig,
-                    "Content-Type": "application/json",
-                },
-            )
-            assert resp.status == 200
-
-            variables = mock_client.publish_message.call_args[1]["variables"]
-            assert "production_host" in variables
-            assert variables["production_host"] == "prod.example.com"
-            assert "production_ssh_user" in variables
-            assert "production_repo_dir" in variables
-            assert "production_db" in variables
-            assert "production_container" in variables
-    finally:
-        await client.close()
+        )
+        assert resp.status == 200
+
+        variables = mock_client.publish_message.call_args.kwargs["variables"]
+        assert "production_host" in variables
+        assert variables["production_host"] == "prod.example.com"
+        assert "production_ssh_user" in variables
+        assert "production_repo_dir" in variables
+        assert "production_db" in variables
+        assert "production_container" in variables
 
 
 @pytest.mark.asyncio
@@ -530,7 +633,7 @@ async def test_pr_event_without_production(
             },
         )
         assert resp.status == 200
-        variables = mock_client.publish_message.call_args[1]["variables"]
+        variables = mock_client.publish_message.call_args.kwargs["variables"]
         assert "production_host" not in variables
 
 
@@ -569,7 +672,7 @@ async def test_pr_event_includes_staging_vars(
             },
         )
         assert resp.status == 200
-        variables = mock_client.publish_message.call_args[1]["variables"]
+        variables = mock_client.publish_message.call_args.kwargs["variables"]
         assert variables["staging_host"] == "staging.example.com"
         assert variables["staging_ssh_user"] == "deploy"
         assert variables["staging_repo_dir"] == "/opt/odoo-enterprise"
@@ -612,7 +715,7 @@ async def test_push_staging_publishes_deploy_trigger(
         data = await resp.json()
         assert data["message"] == "msg_deploy_trigger"
 
-        call_kwargs = mock_client.publish_message.call_args[1]
+        call_kwargs = mock_client.publish_message.call_args.kwargs
         assert call_kwargs["name"] == "msg_deploy_trigger"
         assert call_kwargs["correlation_key"] == "staging"
         assert call_kwargs["variables"]["trigger_sha"] == "abc123def456"
@@ -3,19 +3,35 @@
 from __future__ import annotations
 
 import os
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 
-from dotenv import load_dotenv
 
-load_dotenv(Path(__file__).resolve().parent.parent / '.env.camunda')
+def _load_env_file() -> None:
+    """Load ``.env.camunda`` into ``os.environ`` at import time.
+
+    Modules read settings via ``os.getenv`` on import, so this must run
+    before them. Deployments that inject the environment directly (compose
+    ``env_file``, k8s ``envFrom``) set ``CAMUNDA_SKIP_DOTENV=1`` to skip the
+    file parse and the python-dotenv import.
+    """
+    if os.getenv('CAMUNDA_SKIP_DOTENV') == '1':
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).resolve().parent.parent / '.env.camunda')
+
+
+_load_env_file()
 
 
 def _split_env_list(value: str) -> tuple[str, ...]:
     return tuple(item.strip() for item in value.replace("\n", ",").split(",") if item.strip())
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ServerConfig:
     """Configuration for a target server accessed via SSH."""
 
@@ -28,7 +44,7 @@ class ServerConfig:
     ssh_port: int = 22
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ZeebeConfig:
     """Zeebe connection settings."""
 
@@ -41,7 +57,7 @@ class ZeebeConfig:
     audience: str = ''
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GitHubConfig:
     """GitHub API credentials."""
 
@@ -51,16 +67,18 @@ class GitHubConfig:
     repository: str = 'tut-ua/odoo-enterprise'
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WebhookConfig:
     """Webhook server settings."""
 
     host: str = '0.0.0.0'
     port: int = 9001
     odoo_webhook_token: str = ''
+    # Requests declaring a larger body are refused before it is read.
+    max_body_size: int = 1024 ** 2
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OdooConfig:
     """Odoo webhook connection for task creation."""
 
@@ -69,7 +87,7 @@ class OdooConfig:
     assignee_id: int = 0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     """Root configuration assembled from environment variables."""
 
@@ -82,7 +100,20 @@ class AppConfig:
     db_checkpoint_base_url: str = ''
     db_checkpoint_token: str = ''
     staging_admin_logins: tuple[str, ...] = ()
-    servers: dict[str, ServerConfig] = field(default_factory=dict)
+    servers: Mapping[str, ServerConfig] = field(default_factory=dict)
+    # host → server name, built once so resolve_server is a dict lookup
+    _server_names_by_host: Mapping[str, str] = field(
+        init=False, repr=False, compare=False,
+    )
+
+    def __post_init__(self) -> None:
+        # read-only view over a private copy, so the frozen config can't be
+        # mutated through the caller's dict
+        object.__setattr__(self, 'servers', MappingProxyType(dict(self.servers)))
+        by_host: dict[str, str] = {}
+        for name, server in self.servers.items():
+            by_host.setdefault(server.host, name)
+        object.__setattr__(self, '_server_names_by_host', MappingProxyType(by_host))
 
     @classmethod
     def from_env(cls) -> AppConfig:
@@ -122,6 +153,7 @@ class AppConfig:
                 host=os.getenv('WEBHOOK_HOST', '0.0.0.0'),
                 port=int(os.getenv('WEBHOOK_PORT', '9001')),
                 odoo_webhook_token=os.getenv('ODOO_WEBHOOK_TOKEN', ''),
+                max_body_size=int(os.getenv('WEBHOOK_MAX_BODY_SIZE', str(1024 ** 2))),
             ),
             odoo=OdooConfig(
                 webhook_url=os.getenv('ODOO_WEBHOOK_URL', ''),
@@ -146,20 +178,20 @@ class AppConfig:
 
     def resolve_server(self, server_host: str) -> ServerConfig:
         """Resolve server by host or name."""
-        # Try by name first
-        if server_host in self.servers:
-            return self.servers[server_host]
-        # Then by host
-        for server in self.servers.values():
-            if server.host == server_host:
-                return server
+        # Try by name first, then by host
+        server = self.servers.get(server_host)
+        if server is not None:
+            return server
+        name = self._server_names_by_host.get(server_host)
+        if name is not None:
+            return self.servers[name]
         raise ValueError(f"No server config for '{server_host}'")
 
     def resolve_server_name(self, server_host: str) -> str:
         """Resolve server_host (name or IP) to canonical server name."""
         if server_host in self.servers:
             return server_host
-        for name, server in self.servers.items():
-            if server.host == server_host:
-                return name
+        name = self._server_names_by_host.get(server_host)
+        if name is not None:
+            return name
         raise ValueError(f"No server config for '{server_host}'")
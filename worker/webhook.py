@@ -26,7 +26,7 @@ class WebhookServer:
 
     def __init__(self, config: AppConfig) -> None:
         self._config = config
-        self._app = web.Application()
+        self._app = web.Application(client_max_size=config.webhook.max_body_size)
         self._app.router.add_get('/health', self._handle_health)
         self._app.router.add_get('/reports/fop/latest', self._handle_fop_report)
         self._app.router.add_get(
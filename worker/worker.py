@@ -218,6 +218,10 @@ async def main() -> None:
         _incident_janitor_loop(config, stop_event),
     )
 
+    token_manager = get_token_manager()
+    if token_manager is not None:
+        token_manager.close()
+
     logger.info("All services stopped.")
 
 
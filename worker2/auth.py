@@ -2,18 +2,27 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import AsyncIterator
 
 import grpc
+import httpx
 from pyzeebe import ZeebeClient
 
 logger = logging.getLogger(__name__)
 
 # Global token manager reference for refresh on reconnect
 _token_manager = None
+# Retry delay for the background refresh loop after a failed token fetch
+_REFRESH_RETRY_SECONDS = 5.0
+# How long past the refresh deadline cached_token still serves the old token
+# while the background refresh catches up; the deadline is set 30s before the
+# real expiry, so this leaves a margin before the token actually lapses.
+_CACHED_TOKEN_GRACE_SECONDS = 20.0
 _token_manager_key: tuple[str, str, str, str] | None = None
 
 
@@ -49,13 +58,26 @@ class TokenManager:
         self._audience = audience
         self._token: str | None = None
         self._expires_at: float = 0.0
+        # Pooled client: refreshes reuse the TLS connection to the token URL.
+        self._client: httpx.Client | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    def _http(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=30.0)
+        return self._client
+
+    def close(self) -> None:
+        """Stop background refresh and close the pooled HTTP client."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
     def refresh_token(self) -> str:
         """Fetch a new OAuth2 token."""
-        import time
-
-        import httpx
-
         data = {
             'grant_type': 'client_credentials',
             'client_id': self._client_id,
@@ -64,7 +86,7 @@ class TokenManager:
         if self._audience:
             data['audience'] = self._audience
 
-        resp = httpx.post(self._token_url, data=data, timeout=30.0)
+        resp = self._http().post(self._token_url, data=data)
         resp.raise_for_status()
         body = resp.json()
         self._token = body['access_token']
@@ -76,12 +98,44 @@ class TokenManager:
 
     @property
     def token(self) -> str:
-        import time
-
         if not self._token or time.monotonic() >= self._expires_at:
             return self.refresh_token()
         return self._token
 
+    @property
+    def cached_token(self) -> str:
+        """Last fetched token, without blocking on a refresh.
+
+        The background refresh loop keeps it current; a synchronous fetch
+        happens only on first access or when the loop has fallen more than
+        ``_CACHED_TOKEN_GRACE_SECONDS`` behind, so an expired token is never sent.
+        """
+        if not self._token or time.monotonic() >= self._expires_at + _CACHED_TOKEN_GRACE_SECONDS:
+            return self.refresh_token()
+        return self._token
+
+    def start_background_refresh(self) -> None:
+        """Refresh the token ahead of expiry from the running event loop.
+
+        No-op outside an event loop or when the loop task is already running.
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refresh_task = loop.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(max(self._expires_at - time.monotonic(), 0.0))
+            try:
+                await asyncio.to_thread(self.refresh_token)
+            except Exception as exc:
+                logger.warning('Background OAuth2 token refresh failed: %s', exc)
+                await asyncio.sleep(_REFRESH_RETRY_SECONDS)
+
 
 class _TokenInjectorMixin:
     """Shared logic: injects Bearer token into gRPC metadata.
@@ -96,7 +150,7 @@ class _TokenInjectorMixin:
 
     def _inject_token(self, client_call_details):
         metadata = list(client_call_details.metadata or [])
-        metadata.append(('authorization', f'Bearer {self._token_manager.token}'))
+        metadata.append(('authorization', f'Bearer {self._token_manager.cached_token}'))
         return grpc.aio.ClientCallDetails(
             client_call_details.method,
             client_call_details.timeout,
@@ -141,25 +195,25 @@ def create_channel(config: ZeebeAuthConfig) -> grpc.aio.Channel:
     """Create a gRPC channel for Zeebe — insecure or OAuth2-authenticated."""
     global _token_manager, _token_manager_key
 
+    address = config.gateway_address
+    client_id, client_secret = config.client_id, config.client_secret
+    token_url, audience = config.token_url, config.audience
     options = _keepalive_options()
 
     if not config.use_oauth:
-        logger.info('Using insecure Zeebe channel to %s', config.gateway_address)
-        return grpc.aio.insecure_channel(config.gateway_address, options=options)
+        logger.info('Using insecure Zeebe channel to %s', address)
+        return grpc.aio.insecure_channel(address, options=options)
 
     # OAuth2 — initialise/reuse token manager.
-    manager_key = (
-        config.client_id,
-        config.client_secret,
-        config.token_url,
-        config.audience,
-    )
+    manager_key = (client_id, client_secret, token_url, audience)
     if _token_manager is None or _token_manager_key != manager_key:
+        if _token_manager is not None:
+            _token_manager.close()
         _token_manager = TokenManager(
-            client_id=config.client_id,
-            client_secret=config.client_secret,
-            token_url=config.token_url,
-            audience=config.audience,
+            client_id=client_id,
+            client_secret=client_secret,
+            token_url=token_url,
+            audience=audience,
         )
         _token_manager_key = manager_key
     _token_manager.token
@@ -167,14 +221,15 @@ def create_channel(config: ZeebeAuthConfig) -> grpc.aio.Channel:
     if not config.use_tls:
         # Insecure channel + Bearer token interceptor (Docker internal network)
         logger.info(
-            'Using insecure OAuth2 Zeebe channel to %s', config.gateway_address,
+            'Using insecure OAuth2 Zeebe channel to %s', address,
         )
+        _token_manager.start_background_refresh()
         interceptors = [
             _UnaryUnaryTokenInterceptor(_token_manager),
             _UnaryStreamTokenInterceptor(_token_manager),
         ]
         return grpc.aio.insecure_channel(
-            config.gateway_address, interceptors=interceptors, options=options,
+            address, interceptors=interceptors, options=options,
         )
 
     # TLS channel with composite credentials (external / cloud)
@@ -182,8 +237,8 @@ def create_channel(config: ZeebeAuthConfig) -> grpc.aio.Channel:
     channel_credentials = grpc.ssl_channel_credentials()
     composite = grpc.composite_channel_credentials(channel_credentials, call_credentials)
 
-    logger.info('Using TLS OAuth2 Zeebe channel to %s', config.gateway_address)
-    return grpc.aio.secure_channel(config.gateway_address, composite, options=options)
+    logger.info('Using TLS OAuth2 Zeebe channel to %s', address)
+    return grpc.aio.secure_channel(address, composite, options=options)
 
 
 def get_token_manager() -> TokenManager | None:
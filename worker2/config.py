@@ -3,19 +3,35 @@
 from __future__ import annotations
 
 import os
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 
-from dotenv import load_dotenv
 
-load_dotenv(Path(__file__).resolve().parent.parent / '.env.camunda')
+def _load_env_file() -> None:
+    """Load ``.env.camunda`` into ``os.environ`` at import time.
+
+    Modules read settings via ``os.getenv`` on import, so this must run
+    before them. Deployments that inject the environment directly (compose
+    ``env_file``, k8s ``envFrom``) set ``CAMUNDA_SKIP_DOTENV=1`` to skip the
+    file parse and the python-dotenv import.
+    """
+    if os.getenv('CAMUNDA_SKIP_DOTENV') == '1':
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).resolve().parent.parent / '.env.camunda')
+
+
+_load_env_file()
 
 
 def _split_env_list(value: str) -> tuple[str, ...]:
     return tuple(item.strip() for item in value.replace("\n", ",").split(",") if item.strip())
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ServerConfig:
     """Configuration for a target server accessed via SSH."""
 
@@ -28,7 +44,7 @@ class ServerConfig:
     ssh_port: int = 22
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ZeebeConfig:
     """Zeebe connection settings."""
 
@@ -41,7 +57,7 @@ class ZeebeConfig:
     audience: str = ''
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GitHubConfig:
     """GitHub API credentials."""
 
@@ -52,16 +68,18 @@ class GitHubConfig:
     repository: str = 'tut-ua/odoo-enterprise'
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WebhookConfig:
     """Webhook server settings."""
 
     host: str = '0.0.0.0'
     port: int = 9001
     odoo_webhook_token: str = ''
+    # Requests declaring a larger body are refused before it is read.
+    max_body_size: int = 1024 ** 2
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OdooConfig:
     """Odoo webhook connection for task creation."""
 
@@ -70,7 +88,7 @@ class OdooConfig:
     assignee_id: int = 0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     """Root configuration assembled from environment variables."""
 
@@ -79,11 +97,27 @@ class AppConfig:
     webhook: WebhookConfig = field(default_factory=WebhookConfig)
     odoo: OdooConfig = field(default_factory=OdooConfig)
     ssh_key_path: str = ''
+    # Concurrent SSH channels per server (kept under sshd's MaxSessions)
+    max_parallel_ssh: int = 8
     openrouter_api_key: str = ''
     db_checkpoint_base_url: str = ''
     db_checkpoint_token: str = ''
     staging_admin_logins: tuple[str, ...] = ()
-    servers: dict[str, ServerConfig] = field(default_factory=dict)
+    servers: Mapping[str, ServerConfig] = field(default_factory=dict)
+    # name or host → server name, built once so resolution is one dict lookup
+    _server_names: Mapping[str, str] = field(
+        init=False, repr=False, compare=False,
+    )
+
+    def __post_init__(self) -> None:
+        # read-only view over a private copy, so the frozen config can't be
+        # mutated through the caller's dict
+        object.__setattr__(self, 'servers', MappingProxyType(dict(self.servers)))
+        # names take precedence over hosts, matching the old lookup order
+        names = {name: name for name in self.servers}
+        for name, server in self.servers.items():
+            names.setdefault(server.host, name)
+        object.__setattr__(self, '_server_names', MappingProxyType(names))
 
     @classmethod
     def from_env(cls) -> AppConfig:
@@ -124,6 +158,7 @@ class AppConfig:
                 host=os.getenv('WEBHOOK_HOST', '0.0.0.0'),
                 port=int(os.getenv('WEBHOOK_PORT', '9001')),
                 odoo_webhook_token=os.getenv('ODOO_WEBHOOK_TOKEN', ''),
+                max_body_size=int(os.getenv('WEBHOOK_MAX_BODY_SIZE', str(1024 ** 2))),
             ),
             odoo=OdooConfig(
                 webhook_url=os.getenv('ODOO_WEBHOOK_URL', ''),
@@ -131,6 +166,7 @@ class AppConfig:
                 assignee_id=int(os.getenv('ODOO_ASSIGNEE_ID', '0')),
             ),
             ssh_key_path=os.getenv('SSH_KEY_PATH', str(Path.home() / '.ssh' / 'camunda-production')),
+            max_parallel_ssh=int(os.getenv('MAX_PARALLEL_SSH', '8')),
             openrouter_api_key=os.getenv('OPENROUTER_API_KEY', ''),
             db_checkpoint_base_url=os.getenv('DB_CHECKPOINT_BASE_URL', ''),
             db_checkpoint_token=os.getenv('DB_CHECKPOINT_TOKEN', ''),
@@ -149,22 +185,16 @@ class AppConfig:
 
     def resolve_server(self, server_host: str) -> ServerConfig:
         """Resolve server by host or name."""
-        # Try by name first
-        if server_host in self.servers:
-            return self.servers[server_host]
-        # Then by host
-        for server in self.servers.values():
-            if server.host == server_host:
-                return server
+        name = self._server_names.get(server_host)
+        if name is not None:
+            return self.servers[name]
         from .errors import ConfigError
         raise ConfigError(f"No server config for '{server_host}'")
 
     def resolve_server_name(self, server_host: str) -> str:
         """Resolve server_host (name or IP) to canonical server name."""
-        if server_host in self.servers:
-            return server_host
-        for name, server in self.servers.items():
-            if server.host == server_host:
-                return name
+        name = self._server_names.get(server_host)
+        if name is not None:
+            return name
         from .errors import ConfigError
         raise ConfigError(f"No server config for '{server_host}'")
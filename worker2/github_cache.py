@@ -0,0 +1,56 @@
+"""Small in-memory TTL cache for GitHub API reads.
+
+Entries expire after their TTL; once ``max_size`` is reached the least
+recently used entry is evicted. Process-local and not shared between
+worker restarts.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class MemoryCache:
+    """LRU dict of ``key -> (value, expires_at)``."""
+
+    def __init__(self, max_size: int = 1000) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_ms: int) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl_ms / 1000)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CacheKeys:
+    """Cache key builders for GitHub resources."""
+
+    @staticmethod
+    def pr(repo: str, pr_number: int) -> str:
+        return f"pr:{repo}#{pr_number}"
+
+    @staticmethod
+    def bot_review(repo: str, pr_number: int) -> str:
+        return f"bot-review:{repo}#{pr_number}"
@@ -2,37 +2,162 @@
 
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import logging
+import time
 from typing import Any
 
 import httpx
 
 from .errors import GitHubError
+from .github_cache import CacheKeys, MemoryCache
 
 logger = logging.getLogger(__name__)
 
+# httpx needs the optional h2 package for HTTP/2; without it, stay on HTTP/1.1.
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 API_BASE = "https://api.github.com"
 
+PR_CACHE_TTL_MS = 60_000
+BOT_REVIEW_CACHE_TTL_MS = 30_000
+
+MAX_CONCURRENT_REQUESTS = 10
+# Pages requested together once a listing turns out to span more than one.
+PAGE_PREFETCH = 4
+RATE_LIMIT_RETRIES = 5
+# Below this many remaining calls, requests are paced evenly until the reset.
+RATE_LIMIT_LOW_WATER = 50
+
+
+def _header_float(resp: httpx.Response, name: str) -> float | None:
+    value = resp.headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
 
 class GitHubClient:
-    """Async GitHub REST API client."""
+    """Async GitHub REST API client.
+
+    Owns one pooled HTTP/2 ``httpx.AsyncClient`` so calls reuse (and
+    multiplex over) the keep-alive connection instead of paying a TLS
+    handshake each; call :meth:`aclose` when done.
+    """
 
     def __init__(self, token: str, deploy_pat: str = '') -> None:
         self._token = token
         self._deploy_pat = deploy_pat
+        self._client: httpx.AsyncClient | None = None
+        self._cache = MemoryCache()
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        # Earliest time.time() at which the next request may be sent.
+        self._next_request_at = 0.0
+        self._login: str | None = None
+
+    def _http(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None:
+            # HTTP/2 lets concurrent calls multiplex over one TLS connection.
+            self._client = httpx.AsyncClient(
+                http2=_HTTP2_AVAILABLE,
+                timeout=30.0,
+                headers={
+                    "Accept": "application/vnd.github+json",
+                    "X-GitHub-Api-Version": "2022-11-28",
+                },
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> GitHubClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
 
     def _headers(self, use_deploy_pat: bool = False) -> dict[str, str]:
-        """Build auth headers."""
+        """Build auth headers (Accept/API version are client defaults)."""
         tok = self._deploy_pat if use_deploy_pat and self._deploy_pat else self._token
         if not tok:
             raise GitHubError(
                 "GitHub token is empty — set GITHUB_TOKEN or DEPLOY_PAT in .env.camunda"
             )
-        return {
-            "Authorization": f"Bearer {tok}",
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28",
-        }
+        return {"Authorization": f"Bearer {tok}"}
+
+    def _track_rate_limit(self, resp: httpx.Response) -> None:
+        """Pace requests evenly over the window once the quota runs low."""
+        remaining = _header_float(resp, "X-RateLimit-Remaining")
+        reset_at = _header_float(resp, "X-RateLimit-Reset")
+        if remaining is None or reset_at is None or remaining >= RATE_LIMIT_LOW_WATER:
+            return
+        now = time.time()
+        self._next_request_at = now + max(reset_at - now, 0.0) / max(remaining, 1.0)
+
+    @staticmethod
+    def _rate_limit_wait(resp: httpx.Response) -> float | None:
+        """Seconds to wait before retrying a rate-limited response, else None."""
+        if resp.status_code not in (403, 429):
+            return None
+        retry_after = _header_float(resp, "Retry-After")
+        if retry_after is not None:
+            return retry_after
+        if _header_float(resp, "X-RateLimit-Remaining") == 0:
+            reset_at = _header_float(resp, "X-RateLimit-Reset")
+            if reset_at is not None:
+                return max(reset_at - time.time(), 0.0)
+        # A plain 403 is a permission error, not a rate limit.
+        return None
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        use_deploy_pat: bool = False,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send an authenticated request, honouring GitHub rate limits.
+
+        Retries 403/429 responses that carry ``Retry-After`` (or an exhausted
+        primary quota) up to ``RATE_LIMIT_RETRIES`` times.
+        """
+        request_headers = self._headers(use_deploy_pat)
+        if headers:
+            request_headers.update(headers)
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            async with self._semaphore:
+                delay = self._next_request_at - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                resp = await self._http().request(
+                    method, url, headers=request_headers, **kwargs,
+                )
+            self._track_rate_limit(resp)
+            wait = self._rate_limit_wait(resp)
+            if wait is None or attempt == RATE_LIMIT_RETRIES:
+                break
+            logger.warning(
+                "GitHub rate limit on %s %s (HTTP %d) — retrying in %.1fs (%d/%d)",
+                method, url, resp.status_code, wait, attempt + 1, RATE_LIMIT_RETRIES,
+            )
+            await asyncio.sleep(wait)
+        resp.raise_for_status()
+        return resp
 
     async def _request(
         self,
@@ -42,48 +167,70 @@ class GitHubClient:
         **kwargs: Any,
     ) -> dict:
         """Make an authenticated GitHub API request."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.request(
-                method, url, headers=self._headers(use_deploy_pat), **kwargs,
+        resp = await self._send(method, url, use_deploy_pat=use_deploy_pat, **kwargs)
+        if resp.status_code == 204:
+            return {}
+        return resp.json()
+
+    async def _get_all_pages(self, url: str, per_page: int = 100) -> list[Any]:
+        """Fetch every page of a GitHub list endpoint.
+
+        After the first page, ``PAGE_PREFETCH`` pages are requested at once
+        over the shared HTTP/2 connection; the listing ends at the first
+        short page and anything fetched past it is dropped.
+        """
+        async def fetch(page: int) -> list[Any]:
+            resp = await self._send(
+                "GET", url, params={"per_page": per_page, "page": page}, timeout=60.0,
             )
-            resp.raise_for_status()
-            if resp.status_code == 204:
-                return {}
             return resp.json()
 
-    async def get_pr(self, repo: str, pr_number: int) -> dict:
-        """Get PR details."""
-        return await self._request("GET", f"{API_BASE}/repos/{repo}/pulls/{pr_number}")
+        items = await fetch(1)
+        next_page = 2
+        done = len(items) < per_page
+        while not done:
+            batch = await asyncio.gather(
+                *(fetch(page) for page in range(next_page, next_page + PAGE_PREFETCH))
+            )
+            next_page += PAGE_PREFETCH
+            for page_items in batch:
+                items.extend(page_items)
+                if len(page_items) < per_page:
+                    done = True
+                    break
+        return items
+
+    def invalidate_pr(self, repo: str, pr_number: int) -> None:
+        """Drop cached reads for a PR after a write to it."""
+        self._cache.delete(CacheKeys.pr(repo, pr_number))
+        self._cache.delete(CacheKeys.bot_review(repo, pr_number))
+
+    async def get_pr(self, repo: str, pr_number: int, cached: bool = True) -> dict:
+        """Get PR details.
+
+        Served from a 60 s cache unless ``cached`` is False; callers that pin
+        the head SHA must pass ``cached=False``.
+        """
+        key = CacheKeys.pr(repo, pr_number)
+        if cached:
+            hit = self._cache.get(key)
+            if hit is not None:
+                return hit
+        data = await self._request("GET", f"{API_BASE}/repos/{repo}/pulls/{pr_number}")
+        self._cache.set(key, data, ttl_ms=PR_CACHE_TTL_MS)
+        return data
 
     async def get_pr_diff(self, repo: str, pr_number: int) -> str:
         """Get PR diff as plain text."""
         url = f"{API_BASE}/repos/{repo}/pulls/{pr_number}"
-        headers = self._headers()
-        headers["Accept"] = "application/vnd.github.diff"
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.request("GET", url, headers=headers)
-            resp.raise_for_status()
-            return resp.text
+        resp = await self._send(
+            "GET", url, headers={"Accept": "application/vnd.github.diff"}, timeout=60.0,
+        )
+        return resp.text
 
     async def get_pr_files(self, repo: str, pr_number: int) -> list[dict[str, Any]]:
         """Get all files changed in a PR via the paginated files API."""
-        url = f"{API_BASE}/repos/{repo}/pulls/{pr_number}/files"
-        files: list[dict[str, Any]] = []
-        page = 1
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            while True:
-                resp = await client.get(
-                    url,
-                    headers=self._headers(),
-                    params={"per_page": 100, "page": page},
-                )
-                resp.raise_for_status()
-                batch = resp.json()
-                files.extend(batch)
-                if len(batch) < 100:
-                    break
-                page += 1
-        return files
+        return await self._get_all_pages(f"{API_BASE}/repos/{repo}/pulls/{pr_number}/files")
 
     async def get_pr_diff_from_files(self, repo: str, pr_number: int) -> str:
         """Build a reviewable diff from the PR files API.
@@ -127,17 +274,55 @@ class GitHubClient:
         data: dict[str, Any] = {"merge_method": method}
         if commit_title:
             data["commit_title"] = commit_title
-        return await self._request(
+        result = await self._request(
             "PUT", f"{API_BASE}/repos/{repo}/pulls/{pr_number}/merge", json=data,
         )
+        self.invalidate_pr(repo, pr_number)
+        return result
 
     async def comment_pr(self, repo: str, pr_number: int, body: str) -> dict:
         """Post a comment on a PR."""
-        return await self._request(
+        result = await self._request(
             "POST",
             f"{API_BASE}/repos/{repo}/issues/{pr_number}/comments",
             json={"body": body},
         )
+        self.invalidate_pr(repo, pr_number)
+        return result
+
+    async def find_comment(self, repo: str, pr_number: int, marker: str) -> dict | None:
+        """Return the PR comment whose body contains `marker`, if any."""
+        comments = await self._get_all_pages(
+            f"{API_BASE}/repos/{repo}/issues/{pr_number}/comments",
+        )
+        for c in comments:
+            if marker in (c.get("body") or ""):
+                return c
+        return None
+
+    async def get_login(self) -> str:
+        """Return the login of the account behind the API token (cached)."""
+        if self._login is None:
+            user = await self._request("GET", f"{API_BASE}/user")
+            self._login = str(user.get("login") or "")
+        return self._login
+
+    async def find_own_comment(self, repo: str, pr_number: int, marker: str) -> dict | None:
+        """Return the newest PR comment by this client's account containing `marker`.
+
+        Unlike :meth:`find_comment`, comments by anyone else are ignored, so
+        the result can be trusted for state the worker itself wrote.
+        """
+        login = await self.get_login()
+        if not login:
+            return None
+        comments = await self._get_all_pages(
+            f"{API_BASE}/repos/{repo}/issues/{pr_number}/comments",
+        )
+        for c in reversed(comments):
+            if (c.get("user") or {}).get("login") == login and marker in (c.get("body") or ""):
+                return c
+        return None
 
     async def upsert_comment(
         self,
@@ -153,18 +338,10 @@ class GitHubClient:
         and appends '(оновлено)' note. If not found — creates a new comment.
         """
         url = f"{API_BASE}/repos/{repo}/issues/{pr_number}/comments"
-        params = {"per_page": "100", "sort": "created", "direction": "desc"}
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.get(url, headers=self._headers(), params=params)
-            resp.raise_for_status()
-            comments = resp.json()
-
-        existing_id = None
-        for c in comments:
-            if marker in c.get("body", ""):
-                existing_id = c["id"]
-                break
+        existing = await self.find_comment(repo, pr_number, marker)
+        existing_id = existing["id"] if existing else None
 
+        self.invalidate_pr(repo, pr_number)
         if existing_id:
             updated_body = body
             if update_note:
@@ -206,22 +383,20 @@ class GitHubClient:
         if ":" in head:
             head_candidates.insert(0, head)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for head_query in dict.fromkeys(head_candidates):
-                resp = await client.get(
-                    f"{API_BASE}/repos/{repo}/pulls",
-                    headers=self._headers(use_deploy_pat=True),
-                    params={
-                        "state": "open",
-                        "head": head_query,
-                        "base": base,
-                        "per_page": 1,
-                    },
-                )
-                resp.raise_for_status()
-                items = resp.json()
-                if items:
-                    return items[0]
+        for head_query in dict.fromkeys(head_candidates):
+            items = await self._request(
+                "GET",
+                f"{API_BASE}/repos/{repo}/pulls",
+                params={
+                    "state": "open",
+                    "head": head_query,
+                    "base": base,
+                    "per_page": 1,
+                },
+                use_deploy_pat=True,
+            )
+            if items:
+                return items[0]
         return {}
 
     async def mark_pr_ready(self, repo: str, pr_number: int) -> dict:
@@ -240,14 +415,13 @@ class GitHubClient:
             }
         }
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                "https://api.github.com/graphql",
-                headers=self._headers(),
-                json={"query": query, "variables": {"pullRequestId": node_id}},
-            )
-            resp.raise_for_status()
-            return resp.json()
+        result = await self._request(
+            "POST",
+            f"{API_BASE}/graphql",
+            json={"query": query, "variables": {"pullRequestId": node_id}},
+        )
+        self.invalidate_pr(repo, pr_number)
+        return result
 
     async def get_bot_review_comment(
         self, repo: str, pr_number: int, bot_name: str = "github-actions[bot]",
@@ -257,15 +431,22 @@ class GitHubClient:
         Searches by content ('PR Reviewer Guide') rather than author type,
         because PR-Agent may post under a regular user account.
         """
-        comments = await self._request(
-            "GET",
+        key = CacheKeys.bot_review(repo, pr_number)
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+
+        # This endpoint ignores sort/direction and always lists oldest first,
+        # so the newest review is found by scanning all pages backwards.
+        comments = await self._get_all_pages(
             f"{API_BASE}/repos/{repo}/issues/{pr_number}/comments",
-            params={"per_page": 100, "sort": "created", "direction": "desc"},
         )
 
-        for comment in comments:
-            body = comment.get("body", "")
+        for comment in reversed(comments):
+            body = comment.get("body") or ""
             if "PR Reviewer Guide" in body or "🏅" in body:
+                # Only hits are cached; a missing review is re-checked each call.
+                self._cache.set(key, comment, ttl_ms=BOT_REVIEW_CACHE_TTL_MS)
                 return comment
 
         return None
@@ -8,16 +8,18 @@ Job type: audit-analysis
 
 from __future__ import annotations
 
-import json
+import hashlib
 import logging
 import textwrap
+from contextlib import aclosing
 from typing import Any
 
+import orjson
 from pyzeebe import ZeebeWorker
 
 from ..config import AppConfig
 from ..errors import ConfigError
-from ..ssh import AsyncSSHClient
+from ..ssh import ENSURE_REMOTE_SCRIPT_DIR, REMOTE_SCRIPT_DIR, AsyncSSHClient
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +27,41 @@ logger = logging.getLogger(__name__)
 # Inlines SuperCallAnalyzer to avoid external dependencies.
 _ANALYSIS_SCRIPT = textwrap.dedent(r'''
 import ast
+import functools
 import json
 import os
 import re
 import subprocess
 import sys
-from dataclasses import dataclass, field, asdict
 from typing import Any
 
+try:
+    import re2  # google-re2: linear-time matching, used when the server has it
+except ImportError:
+    re2 = None
+
+try:
+    import orjson  # faster output encoding, used when the server has it
+except ImportError:
+    orjson = None
+
+
+def json_line(obj: Any) -> bytes:
+    """Encode one NDJSON record as UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, ensure_ascii=False).encode() + b"\n"
+
+
+def compile_scan(pattern: str):
+    """Compile a JS/XML scanning regex, preferring RE2 over backtracking re."""
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            pass
+    return re.compile(pattern)
+
 
 # === SuperCallAnalyzer (inlined from registry_of_truth) ===
 
@@ -81,21 +110,29 @@ class SuperCallAnalyzer(ast.NodeVisitor):
         pass
 
 
-# === Data Models ===
+# === Class discovery ===
+
+# Statement fields that can hold nested statements (and thus classes).
+_BODY_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
 
-@dataclass
-class Conflict:
-    id: int = 0
-    severity: str = "info"  # critical, warning, info
-    type: str = ""  # python_override, js_patch, xml_xpath
-    custom_module: str = ""
-    custom_file: str = ""
-    target: str = ""  # model.method, component, inherit_id
-    detail: str = ""
-    has_super: bool = False
-    base_module: str = ""
-    base_file: str = ""
-    base_change: str = ""  # modified, removed
+
+def iter_class_defs(tree: ast.AST):
+    """Yield every ClassDef in breadth-first order, like ast.walk.
+
+    Classes are always statements, so only statement bodies are descended;
+    expression subtrees (the bulk of the AST) are never visited.
+    """
+    queue = list(getattr(tree, "body", []))
+    i = 0
+    while i < len(queue):
+        node = queue[i]
+        i += 1
+        if isinstance(node, ast.ClassDef):
+            yield node
+        for name in _BODY_FIELDS:
+            children = getattr(node, name, None)
+            if children:
+                queue.extend(children)
 
 
 # === Git helpers ===
@@ -108,16 +145,21 @@ def run_git(root: str, *args: str) -> str:
     return result.stdout.strip()
 
 
+# Base dirs to diff; translations and localisations are excluded by git itself.
+BASE_PATHSPEC = (
+    "src/community/", "src/enterprise/",
+    ":(exclude)*/i18n/*", ":(exclude)*/l10n_*",
+)
+
+
 def get_changed_base_files(root: str) -> list[str]:
     """Get files changed in workspace (staged + unstaged) under base dirs."""
-    # Use git diff against HEAD to see what sync changed
-    output = run_git(root, "diff", "--name-only", "HEAD", "--", "src/community/", "src/enterprise/")
+    # Use git diff against HEAD to see what sync changed; -z keeps odd names intact
+    output = run_git(root, "diff", "-z", "--name-only", "HEAD", "--", *BASE_PATHSPEC)
     if not output:
         # Also check untracked
-        output = run_git(root, "diff", "--name-only", "--cached", "--", "src/community/", "src/enterprise/")
-    if not output:
-        return []
-    return [f for f in output.splitlines() if "/i18n/" not in f and "/l10n_" not in f]
+        output = run_git(root, "diff", "-z", "--name-only", "--cached", "--", *BASE_PATHSPEC)
+    return [f for f in output.split("\0") if f]
 
 
 def get_file_content(root: str, filepath: str) -> str | None:
@@ -133,20 +175,25 @@ def get_file_content(root: str, filepath: str) -> str | None:
 
 # === Python Analysis ===
 
-def extract_python_overrides(filepath: str, module_name: str) -> list[dict]:
-    """Extract _inherit method overrides from a Python file."""
+def extract_python_overrides(
+    filepath: str, module_name: str, changed_models: frozenset[str] | None = None,
+) -> list[dict]:
+    """Extract _inherit method overrides from a Python file.
+
+    With ``changed_models``, files that never mention one of those models
+    are skipped without being parsed.
+    """
     try:
         with open(filepath, encoding="utf-8", errors="replace") as f:
             source = f.read()
+        if changed_models is not None and not any(m in source for m in changed_models):
+            return []
         tree = ast.parse(source)
     except (OSError, SyntaxError):
         return []
 
     results = []
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.ClassDef):
-            continue
-
+    for node in iter_class_defs(tree):
         inherit_model = ""
         for stmt in node.body:
             if isinstance(stmt, ast.Assign):
@@ -182,6 +229,10 @@ def extract_python_overrides(filepath: str, module_name: str) -> list[dict]:
     return results
 
 
+# Cheap pre-filter for the model index: string _name/_inherit declarations.
+MODEL_DECL_RE = re.compile(r'^\s*_(?:name|inherit)\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+
+
 def extract_base_methods(source: str) -> dict[str, set[str]]:
     """Extract {ClassName.method} from base Python source."""
     try:
@@ -190,26 +241,25 @@ def extract_base_methods(source: str) -> dict[str, set[str]]:
         return {}
 
     methods: dict[str, set[str]] = {}
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            model = ""
-            for stmt in node.body:
-                if isinstance(stmt, ast.Assign):
-                    for t in stmt.targets:
-                        if isinstance(t, ast.Name) and t.id in ("_name", "_inherit"):
-                            if isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
-                                model = stmt.value.value
-            if model:
-                for item in node.body:
-                    if isinstance(item, ast.FunctionDef):
-                        methods.setdefault(model, set()).add(item.name)
+    for node in iter_class_defs(tree):
+        model = ""
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign):
+                for t in stmt.targets:
+                    if isinstance(t, ast.Name) and t.id in ("_name", "_inherit"):
+                        if isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
+                            model = stmt.value.value
+        if model:
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef):
+                    methods.setdefault(model, set()).add(item.name)
     return methods
 
 
 # === JS Analysis ===
 
-PATCH_RE = re.compile(r'patch\(\s*(\w+)(?:\.prototype)?\s*,', re.MULTILINE)
-IMPORT_RE = re.compile(r'import\s*\{([^}]+)\}\s*from\s*["\'](@[\w/.@-]+)["\']', re.MULTILINE)
+PATCH_RE = compile_scan(r'patch\(\s*(\w+)(?:\.prototype)?\s*,')
+IMPORT_RE = compile_scan(r'import\s*\{([^}]+)\}\s*from\s*["\'](@[\w/.@-]+)["\']')
 ODOO_MODULE_RE = re.compile(r'@([\w-]+)/(.*)')
 
 
@@ -229,7 +279,11 @@ def extract_js_patches(filepath: str, module_name: str) -> list[dict]:
                 imports[name] = m.group(2)
 
     results = []
+    # Matches come in order, so count newlines only since the previous one
+    line, pos = 1, 0
     for m in PATCH_RE.finditer(source):
+        line += source.count("\n", pos, m.start())
+        pos = m.start()
         target = m.group(1)
         import_path = imports.get(target, "")
         base_module = ""
@@ -242,7 +296,7 @@ def extract_js_patches(filepath: str, module_name: str) -> list[dict]:
             "target": target,
             "import_path": import_path,
             "base_module": base_module,
-            "line": source[:m.start()].count("\n") + 1,
+            "line": line,
         })
 
     return results
@@ -250,12 +304,11 @@ def extract_js_patches(filepath: str, module_name: str) -> list[dict]:
 
 # === XML Analysis ===
 
-INHERIT_RE = re.compile(
+INHERIT_RE = compile_scan(
     r'(?:inherit_id\s*=\s*["\']([^"\']+)["\']'
-    r'|<field\s+name=["\']inherit_id["\']\s+ref=["\']([^"\']+)["\'])',
-    re.MULTILINE,
+    r'|<field\s+name=["\']inherit_id["\']\s+ref=["\']([^"\']+)["\'])'
 )
-XPATH_RE = re.compile(r'<xpath\s+expr=["\']([^"\']+)["\']', re.MULTILINE)
+XPATH_RE = compile_scan(r'<xpath\s+expr=["\']([^"\']+)["\']')
 
 
 def extract_xml_inherits(filepath: str, module_name: str) -> list[dict]:
@@ -266,31 +319,97 @@ def extract_xml_inherits(filepath: str, module_name: str) -> list[dict]:
     except OSError:
         return []
 
-    raw = INHERIT_RE.findall(content)
-    inherit_ids = list(set(g1 or g2 for g1, g2 in raw if g1 or g2))
-    xpaths = XPATH_RE.findall(content)
+    # Pair each xpath with the inherit_id that precedes it in the file, so
+    # records grow with |inherits| + |xpaths| rather than their product.
+    events = [(m.start(), m.group(1) or m.group(2), None) for m in INHERIT_RE.finditer(content)]
+    if not events:
+        return []
+    events += [(m.start(), None, m.group(1)) for m in XPATH_RE.finditer(content)]
+    events.sort(key=lambda e: e[0])
 
     results = []
-    for iid in inherit_ids:
-        base_module = iid.split(".")[0] if "." in iid else ""
-        for xpath in xpaths:
-            results.append({
-                "inherit_id": iid,
-                "xpath": xpath,
-                "base_module": base_module,
-            })
-        if not xpaths:
-            results.append({
-                "inherit_id": iid,
-                "xpath": "",
-                "base_module": base_module,
-            })
+    iid = ""
+    bare = False  # current inherit has no xpath yet
+    for _, found_iid, xpath in events:
+        if found_iid is not None:
+            if bare:
+                results.append({"inherit_id": iid, "xpath": "", "base_module": base_module})
+            iid, bare = found_iid, True
+            base_module = iid.split(".")[0] if "." in iid else ""
+        elif iid:
+            results.append({"inherit_id": iid, "xpath": xpath, "base_module": base_module})
+            bare = False
+    if bare:
+        results.append({"inherit_id": iid, "xpath": "", "base_module": base_module})
 
     return results
 
 
+# === File scanning ===
+
+# Below this many files a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 64
+
+
+def _scan_one(task: tuple[str, str, str, str], changed_models: frozenset[str]) -> list[dict]:
+    fpath, _rel_path, mod_name, kind = task
+    if kind == "py":
+        return extract_python_overrides(fpath, mod_name, changed_models)
+    if kind == "js":
+        return extract_js_patches(fpath, mod_name)
+    return extract_xml_inherits(fpath, mod_name)
+
+
+def scan_files(
+    tasks: list[tuple[str, str, str, str]], changed_models: frozenset[str],
+) -> list[list[dict]]:
+    """Run the extractors over (fpath, rel_path, module, kind) tasks.
+
+    Parsing is CPU-bound and independent per file, so large scans are spread
+    over all cores; results keep the order of ``tasks``.
+    """
+    workers = os.cpu_count() or 1
+    if len(tasks) < PARALLEL_MIN_FILES or workers < 2:
+        return [_scan_one(t, changed_models) for t in tasks]
+    # Imported here: most runs stay serial and skip the import cost
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # fork: children inherit the loaded script instead of re-importing it
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        scan = functools.partial(_scan_one, changed_models=changed_models)
+        return list(ex.map(scan, tasks, chunksize=32))
+
+
 # === Main Analysis ===
 
+SEVERITIES = ("critical", "warning", "info")
+
+SKIP_DIRS = frozenset({"__pycache__", ".git"})
+
+
+def iter_files(root: str):
+    """Yield (path, name) for files under root, skipping SKIP_DIRS.
+
+    Uses os.scandir directly so file-vs-directory checks come from the
+    directory entry instead of a stat per file.
+    """
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.name
+
+
 def discover_custom_modules(src_root: str) -> dict[str, str]:
     """Discover custom modules: {name: path}."""
     modules = {}
@@ -317,9 +436,10 @@ def run_analysis(workspace: str) -> dict[str, Any]:
     xml_changed = [f for f in changed_files if f.endswith(".xml")]
 
     if not changed_files:
-        return {"conflicts": [], "stats": {"total": 0}, "extension_points": 0}
+        return {"conflicts": [], "stats": {"total": 0}, "extension_points_scanned": 0}
 
-    # Build model → changed base files index
+    # Build model → changed base files index from a regex scan of the model
+    # declarations; a base file is only AST-parsed once an override needs it.
     model_to_files: dict[str, list[str]] = {}
     for f in py_changed:
         if "/models/" not in f or f.endswith("__init__.py"):
@@ -327,9 +447,11 @@ def run_analysis(workspace: str) -> dict[str, Any]:
         content = get_file_content(workspace, f)
         if not content:
             continue
-        methods_by_model = extract_base_methods(content)
-        for model in methods_by_model:
+        for model in dict.fromkeys(MODEL_DECL_RE.findall(content)):
             model_to_files.setdefault(model, []).append(f)
+    base_methods_cache: dict[str, dict[str, set[str]]] = {}
+    # Custom Python files that never mention one of these are not parsed.
+    changed_models = frozenset(model_to_files)
 
     # Build changed base module set (for JS/XML matching)
     changed_base_modules: set[str] = set()
@@ -345,100 +467,107 @@ def run_analysis(workspace: str) -> dict[str, Any]:
     # Discover custom modules
     modules = discover_custom_modules(src_root)
     conflicts: list[dict] = []
-    total_ext_points = 0
+    # Only parsed files count: Python files that mention no changed model are
+    # skipped, so this is not a total of every override in the custom modules.
+    ext_points_scanned = 0
 
+    tasks: list[tuple[str, str, str, str]] = []
+    prefix_len = len(os.path.join(workspace, ""))
     for mod_name, mod_path in sorted(modules.items()):
-        for root, _, files in os.walk(mod_path):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                rel_path = os.path.relpath(fpath, workspace)
-
-                if fname.endswith(".py") and fname != "__init__.py":
-                    overrides = extract_python_overrides(fpath, mod_name)
-                    total_ext_points += len(overrides)
-
-                    for ov in overrides:
-                        model = ov["model"]
-                        method = ov["method"]
-                        base_files = model_to_files.get(model, [])
-                        if not base_files:
-                            continue
-
-                        for bf in base_files:
-                            content = get_file_content(workspace, bf)
-                            if not content:
-                                continue
-                            base_methods = extract_base_methods(content)
-                            model_methods = base_methods.get(model, set())
-                            if method not in model_methods:
-                                continue
-
-                            if not ov["has_super"]:
-                                severity = "critical"
-                            elif ov["super_conditional"]:
-                                severity = "warning"
-                            else:
-                                severity = "info"
-
-                            conflicts.append({
-                                "type": "python_override",
-                                "severity": severity,
-                                "custom_module": mod_name,
-                                "custom_file": rel_path,
-                                "target": f"{model}.{method}",
-                                "has_super": ov["has_super"],
-                                "super_conditional": ov.get("super_conditional", False),
-                                "base_file": bf,
-                                "line": ov["line"],
-                            })
-
-                elif fname.endswith(".js"):
-                    patches = extract_js_patches(fpath, mod_name)
-                    total_ext_points += len(patches)
-
-                    for patch in patches:
-                        if patch["base_module"] and patch["base_module"] in changed_base_modules:
-                            conflicts.append({
-                                "type": "js_patch",
-                                "severity": "warning",
-                                "custom_module": mod_name,
-                                "custom_file": rel_path,
-                                "target": patch["target"],
-                                "base_module": patch["base_module"],
-                                "line": patch["line"],
-                            })
-
-                elif fname.endswith(".xml") and "/views/" in rel_path:
-                    inherits = extract_xml_inherits(fpath, mod_name)
-                    total_ext_points += len(inherits)
-
-                    for inh in inherits:
-                        if inh["base_module"] and inh["base_module"] in changed_base_modules:
-                            conflicts.append({
-                                "type": "xml_xpath",
-                                "severity": "warning",
-                                "custom_module": mod_name,
-                                "custom_file": rel_path,
-                                "target": inh["inherit_id"],
-                                "xpath": inh.get("xpath", ""),
-                                "base_module": inh["base_module"],
-                            })
-
-    # Sort by severity
-    sev_order = {"critical": 0, "warning": 1, "info": 2}
-    conflicts.sort(key=lambda c: sev_order.get(c.get("severity", "info"), 3))
+        for fpath, fname in iter_files(mod_path):
+            rel_path = fpath[prefix_len:]
+            if fname.endswith(".py") and fname != "__init__.py":
+                if changed_models:
+                    tasks.append((fpath, rel_path, mod_name, "py"))
+            elif fname.endswith(".js"):
+                tasks.append((fpath, rel_path, mod_name, "js"))
+            elif fname.endswith(".xml") and "/views/" in rel_path:
+                tasks.append((fpath, rel_path, mod_name, "xml"))
+
+    for (fpath, rel_path, mod_name, kind), found in zip(tasks, scan_files(tasks, changed_models)):
+        ext_points_scanned += len(found)
+
+        if kind == "py":
+            for ov in found:
+                model = ov["model"]
+                method = ov["method"]
+                base_files = model_to_files.get(model, [])
+                if not base_files:
+                    continue
+
+                for bf in base_files:
+                    base_methods = base_methods_cache.get(bf)
+                    if base_methods is None:
+                        base_methods = extract_base_methods(get_file_content(workspace, bf) or "")
+                        base_methods_cache[bf] = base_methods
+                    if method not in base_methods.get(model, ()):
+                        continue
+
+                    if not ov["has_super"]:
+                        severity = "critical"
+                    elif ov["super_conditional"]:
+                        severity = "warning"
+                    else:
+                        severity = "info"
+
+                    conflicts.append({
+                        "type": "python_override",
+                        "severity": severity,
+                        "custom_module": mod_name,
+                        "custom_file": rel_path,
+                        "target": f"{model}.{method}",
+                        "has_super": ov["has_super"],
+                        "super_conditional": ov.get("super_conditional", False),
+                        "base_file": bf,
+                        "line": ov["line"],
+                    })
+
+        elif kind == "js":
+            for patch in found:
+                if patch["base_module"] and patch["base_module"] in changed_base_modules:
+                    conflicts.append({
+                        "type": "js_patch",
+                        "severity": "warning",
+                        "custom_module": mod_name,
+                        "custom_file": rel_path,
+                        "target": patch["target"],
+                        "base_module": patch["base_module"],
+                        "line": patch["line"],
+                    })
+
+        else:
+            for inh in found:
+                if inh["base_module"] and inh["base_module"] in changed_base_modules:
+                    conflicts.append({
+                        "type": "xml_xpath",
+                        "severity": "warning",
+                        "custom_module": mod_name,
+                        "custom_file": rel_path,
+                        "target": inh["inherit_id"],
+                        "xpath": inh.get("xpath", ""),
+                        "base_module": inh["base_module"],
+                    })
+
+    # Order by severity with one bucketing pass (stable, like a keyed sort);
+    # the bucket sizes double as the severity stats
+    by_severity: dict[str, list[dict]] = {sev: [] for sev in SEVERITIES}
+    by_type = {"python_override": 0, "js_patch": 0, "xml_xpath": 0}
+    for c in conflicts:
+        by_severity[c["severity"]].append(c)
+        by_type[c["type"]] += 1
+    conflicts = [c for sev in SEVERITIES for c in by_severity[sev]]
     for i, c in enumerate(conflicts, 1):
         c["id"] = i
 
     stats = {
         "total": len(conflicts),
-        "critical": sum(1 for c in conflicts if c.get("severity") == "critical"),
-        "warning": sum(1 for c in conflicts if c.get("severity") == "warning"),
-        "info": sum(1 for c in conflicts if c.get("severity") == "info"),
+        "critical": len(by_severity["critical"]),
+        "warning": len(by_severity["warning"]),
+        "info": len(by_severity["info"]),
         "by_type": {
-            "python": sum(1 for c in conflicts if c.get("type") == "python_override"),
-            "js": sum(1 for c in conflicts if c.get("type") == "js_patch"),
-            "xml": sum(1 for c in conflicts if c.get("type") == "xml_xpath"),
+            "python": by_type["python_override"],
+            "js": by_type["js_patch"],
+            "xml": by_type["xml_xpath"],
         },
         "base_files_changed": len(changed_files),
         "custom_modules_scanned": len(modules),
@@ -447,16 +576,35 @@ def run_analysis(workspace: str) -> dict[str, Any]:
     return {
         "conflicts": conflicts,
         "stats": stats,
-        "extension_points": total_ext_points,
+        "extension_points_scanned": ext_points_scanned,
     }
 
 
 if __name__ == "__main__":
     workspace = sys.argv[1] if len(sys.argv) > 1 else "/tmp/sync-workspace"
     result = run_analysis(workspace)
-    json.dump(result, sys.stdout, ensure_ascii=False)
+    # NDJSON: one conflict per line so the worker can parse as it reads
+    write = sys.stdout.buffer.write
+    for conflict in result["conflicts"]:
+        write(json_line(conflict))
+    write(json_line({
+        "stats": result["stats"],
+        "extension_points_scanned": result["extension_points_scanned"],
+    }))
 ''').strip()
 
+# Content-addressed remote path: a changed script gets a new name, so an
+# existing remote copy can be reused without comparing contents. Kept in the
+# private script directory, outside the per-run sync workspace, which is
+# deleted after every run. Relative to home for SFTP; shell commands go
+# through _SCRIPT_SHELL_PATH, since they run from the workspace.
+_SCRIPT_BYTES = _ANALYSIS_SCRIPT.encode()
+_SCRIPT_PATH = f"{REMOTE_SCRIPT_DIR}/_audit_{hashlib.sha256(_SCRIPT_BYTES).hexdigest()[:16]}.py"
+_SCRIPT_SHELL_PATH = f'"$HOME/{_SCRIPT_PATH}"'
+
+# Conflict rows shown in the markdown report; the rest are only counted.
+_REPORT_LIMIT = 80
+
 
 def register_audit_handlers(
     worker: ZeebeWorker,
@@ -479,8 +627,8 @@ def register_audit_handlers(
     ) -> dict:
         """Deep static analysis: Python overrides, JS patches, XML xpaths.
 
-        Transfers a self-contained analysis script to the remote workspace,
-        runs it, and returns structured conflict data.
+        Uploads a self-contained analysis script to the remote server (once
+        per script version), runs it against the workspace, and returns structured conflict data.
         """
         server = _resolve_server(server_host)
 
@@ -497,15 +645,12 @@ def register_audit_handlers(
 
         ws = workspace_dir
 
-        # Transfer analysis script to workspace
-        # Use heredoc to write the script via SSH
-        script_path = f"{ws}/_audit_analyze.py"
-        await ssh.run(
-            server,
-            f"cat > {script_path} << 'AUDIT_SCRIPT_EOF'\n{_ANALYSIS_SCRIPT}\nAUDIT_SCRIPT_EOF",
-            check=True,
-            timeout=30,
+        # Upload the analysis script once per version; later runs reuse it
+        probe = await ssh.run(
+            server, f"{ENSURE_REMOTE_SCRIPT_DIR} && test -f {_SCRIPT_SHELL_PATH}", timeout=10,
         )
+        if not probe.success:
+            await ssh.upload(server, _SCRIPT_BYTES, _SCRIPT_PATH)
 
         # Stage files for diff detection (git add -N to track new files)
         await ssh.run(
@@ -514,43 +659,44 @@ def register_audit_handlers(
             timeout=30,
         )
 
-        # Run the analysis script
-        result = await ssh.run(
-            server,
-            f"cd {ws} && python3 {script_path} {ws} 2>/dev/null",
-            timeout=240,
-        )
-
-        # Cleanup script
-        await ssh.run(server, f"rm -f {script_path}", timeout=10)
-
-        if not result.success or not result.stdout.strip():
-            logger.warning(
-                "audit-analysis returned no output (exit=%d): %s",
-                result.exit_code, result.stderr[:200] if result.stderr else "",
-            )
+        # Run the analysis script; it prints one conflict per line, then a
+        # summary line. Only the rows that fit in the report are kept.
+        conflicts: list[dict] = []
+        summary: dict | None = None
+        try:
+            async with aclosing(ssh.run_stream(
+                server,
+                f"cd {ws} && python3 {_SCRIPT_SHELL_PATH} {ws}",
+                timeout=240,
+            )) as lines:
+                async for line in lines:
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line)
+                    if "stats" in record:
+                        summary = record
+                    elif len(conflicts) < _REPORT_LIMIT:
+                        conflicts.append(record)
+        except orjson.JSONDecodeError as exc:
+            logger.error("audit-analysis JSON parse error: %s", exc)
             return {
                 "audit_conflicts": 0,
                 "audit_critical": 0,
                 "audit_warning": 0,
-                "audit_report": "",
+                "audit_report": f"JSON parse error: {exc}",
             }
 
-        # Parse JSON output
-        try:
-            data = json.loads(result.stdout)
-        except json.JSONDecodeError as exc:
-            logger.error("audit-analysis JSON parse error: %s", exc)
+        if summary is None:
+            logger.warning("audit-analysis returned no summary (%d conflict lines)", len(conflicts))
             return {
                 "audit_conflicts": 0,
                 "audit_critical": 0,
                 "audit_warning": 0,
-                "audit_report": f"JSON parse error: {exc}",
+                "audit_report": "",
             }
 
-        conflicts = data.get("conflicts", [])
-        stats = data.get("stats", {})
-        ext_points = data.get("extension_points", 0)
+        stats = summary.get("stats", {})
+        ext_points = summary.get("extension_points_scanned", 0)
 
         # Build markdown report
         report_lines = [
@@ -568,7 +714,7 @@ def register_audit_handlers(
             report_lines.append("| # | Severity | Type | Custom Module | Target | Base | File | Line | Super |")
             report_lines.append("|---|---|---|---|---|---|---|---|---|")
 
-            for c in conflicts[:80]:  # Limit to 80 in report
+            for c in conflicts:
                 sev_icon = {"critical": "!!!", "warning": "!", "info": "-"}.get(
                     c.get("severity", "info"), "-"
                 )
@@ -593,13 +739,14 @@ def register_audit_handlers(
                     f"| {custom_file} | {line_no} | {super_info} |"
                 )
 
-            if len(conflicts) > 80:
-                report_lines.append(f"| ... | ... | ... | +{len(conflicts) - 80} more | ... | ... | ... | ... | ... |")
+            hidden = stats.get("total", 0) - len(conflicts)
+            if hidden > 0:
+                report_lines.append(f"| ... | ... | ... | +{hidden} more | ... | ... | ... | ... | ... |")
 
         audit_report = "\n".join(report_lines)
 
         logger.info(
-            "audit-analysis: %d conflicts (%d critical, %d warning), %d extension points",
+            "audit-analysis: %d conflicts (%d critical, %d warning), %d extension points scanned",
             stats.get("total", 0),
             stats.get("critical", 0),
             stats.get("warning", 0),
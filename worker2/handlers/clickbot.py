@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import logging
 import re
+import shlex
 from typing import Any
 
 from pyzeebe import ZeebeWorker
@@ -17,6 +18,21 @@ from ..ssh import AsyncSSHClient
 
 logger = logging.getLogger(__name__)
 
+# Clickbot log parsing — compiled once, the log can be many MB in full mode
+_RESULT_RE = re.compile(
+    r"(?P<passed>clickbot test succeeded(?:.*?app='(?P<passed_app>[^']+)')?)"
+    r"|(?P<skipped>skipped Subtest(?:.*?app='(?P<skipped_app>[^']+)')?)"
+    r"|(?P<no_xmlid>Skipping app without xmlid[:\s]*(?P<no_xmlid_app>[^\n]*))"
+)
+_FAIL_RE = re.compile(
+    r"FAIL: Subtest.*?app='([^']+)'(?:.*?(?:Error|Exception|Traceback)[^\n]*([^\n]{0,200}))?",
+    re.DOTALL,
+)
+_ERROR_CONTEXT_RE = re.compile(r"((?:Error|Exception|AssertionError)[^\n]{0,200})")
+_MISSING_FILE_RE = re.compile(r"FileNotFoundError[^\n]*['\"]([^'\"]+)['\"]")
+_LOAD_MODULE_RE = re.compile(r"load_openerp_module\('([^']+)'\)")
+_REGISTRY_RE = re.compile(r"((?:ERROR\s+)?odoo[^\n]*Failed to load registry[^\n]*)")
+
 
 async def _get_fk_excluded_tables(
     ssh: AsyncSSHClient,
@@ -37,8 +53,7 @@ async def _get_fk_excluded_tables(
     seed_literal = ",".join(f"'{t}'" for t in seed)
     # depth=2, but depth-2 tables must match messaging-related prefixes to
     # avoid pulling in the entire Odoo schema via mail_notification → res_partner → account_*.
-    # Uses ::text cast (not ::name COLLATE "C") to avoid double-quote shell-quoting issues
-    # and collation mismatch in the recursive CTE.
+    # COLLATE "C" avoids a collation mismatch in the recursive CTE.
     sql = (
         f"WITH RECURSIVE ex(tbl, depth) AS ("
         f"SELECT unnest(ARRAY[{seed_literal}])::name COLLATE \"C\", 0 "
@@ -51,11 +66,11 @@ async def _get_fk_excluded_tables(
         f"WHERE c.relname != ex.tbl AND ex.depth < 2"
         f") SELECT DISTINCT tbl FROM ex ORDER BY tbl"
     )
-    # $'...' shell quoting: double-quotes are literal, single-quotes must be escaped as \'
-    sql_dollar = sql.replace("'", "\\'")
+    # SQL goes over stdin, so its quotes never pass through the remote shell
     result = await ssh.run(
         server,
-        f"docker exec {ctr}-db psql -U odoo -d {db} -t -A -c $'{sql_dollar}'",
+        f"docker exec -i {shlex.quote(ctr + '-db')} "
+        f"psql -U odoo -d {shlex.quote(db)} -t -A -v ON_ERROR_STOP=1 <<'SQL'\n{sql}\nSQL",
         timeout=30,
     )
     if result.exit_code != 0 or not result.stdout.strip():
@@ -77,6 +92,54 @@ async def _get_fk_excluded_tables(
     return tables
 
 
+_SNAPSHOT_PREFIX = "clickbot_snap_"
+_SNAPSHOT_KEY_RE = re.compile(r"[0-9a-f]{16}")
+
+
+def _clickbot_psql(sql: str) -> str:
+    """Build a command that runs ``sql`` in one psql session inside clickbot-db."""
+    return (
+        "docker exec -i clickbot-test-db "
+        "psql -U clickbot -d postgres -v ON_ERROR_STOP=1 <<'SQL'\n"
+        f"{sql}\n"
+        "SQL"
+    )
+
+
+async def _snapshot_key(
+    ssh: AsyncSSHClient,
+    server: Any,
+    ctr: str,
+    db: str,
+) -> str:
+    """Key the clickbot-db template by repo commit and source DB content version.
+
+    The content version is the latest write_date of installed modules and
+    views — a single cheap query that moves whenever a module update or
+    view change would make the cached copy stale.
+
+    Returns "" when the key cannot be computed — the caller then restores
+    from scratch without touching any snapshot.
+    """
+    probe_sql = (
+        "SELECT (SELECT max(write_date) FROM ir_module_module), "
+        "(SELECT max(write_date) FROM ir_ui_view)"
+    )
+    result = await ssh.run_in_repo(
+        server,
+        "set -o pipefail; "
+        f"{{ git rev-parse HEAD && "
+        f"docker exec {ctr}-db psql -U odoo -d {db} -t -A -v ON_ERROR_STOP=1 -c \"{probe_sql}\"; }} "
+        "| sha256sum | cut -c1-16",
+        timeout=60,
+    )
+    key = result.stdout.strip()
+    if not result.success or not _SNAPSHOT_KEY_RE.fullmatch(key):
+        logger.warning("clickbot snapshot key failed (exit=%s): %s", result.exit_code, result.stderr[:200])
+        return ""
+    return key
+
+
 def register_clickbot_handlers(
     worker: ZeebeWorker,
     config: AppConfig,
@@ -95,7 +158,7 @@ def register_clickbot_handlers(
 
         The clickbot-test Docker service (docker-compose.clickbot.yml)
         handles everything: DB restore, module update, browser tests.
-        This handler only does pg_dump, launches the container, and parses results.
+        This handler only streams pg_dump into it, launches the container, and parses results.
         """
         server_name = server_host or "staging"
         server = config.resolve_server(server_name)
@@ -103,27 +166,14 @@ def register_clickbot_handlers(
         ctr = server.container
 
         try:
-            # 1. Cleanup previous runs
+            # 1. Cleanup previous runs (volumes kept — they hold the template DB)
             await ssh.run_in_repo(
                 server,
-                "docker compose -f docker-compose.clickbot.yml down -v 2>/dev/null || true",
+                "docker compose -f docker-compose.clickbot.yml down 2>/dev/null || true",
                 timeout=300,
             )
 
-            # 2. Dump production DB (exclude FK-dependent noisy tables auto-detected)
-            logger.info("Dumping production DB %s on %s", db, server.host)
-            excluded_tables = await _get_fk_excluded_tables(ssh, server, ctr, db)
-            exclude_flags = " ".join(f"--exclude-table-data={t}" for t in excluded_tables)
-            await ssh.run(
-                server,
-                f"docker exec {ctr}-db pg_dump -U odoo -Fc --no-owner --no-acl {db} "
-                f"{exclude_flags} "
-                f"> /tmp/clickbot_db_dump.custom",
-                check=True,
-                timeout=600,
-            )
-
-            # 3. Start clickbot-db, restore dump, rename to clickbot_test
+            # 2. Start clickbot-db
             await ssh.run_in_repo(
                 server,
                 "docker compose -f docker-compose.clickbot.yml up -d clickbot-db",
@@ -133,51 +183,84 @@ def register_clickbot_handlers(
             # Wait for DB health check
             await ssh.run(
                 server,
-                "for i in $(seq 1 30); do "
-                "docker exec clickbot-test-db pg_isready -U clickbot && break; "
-                "sleep 2; done",
+                "for i in $(seq 1 300); do "
+                "docker exec clickbot-test-db pg_isready -U clickbot -q && break; "
+                "sleep 0.2; done",
                 timeout=120,
             )
 
-            # Copy dump into container and restore
-            await ssh.run(
-                server,
-                "docker cp /tmp/clickbot_db_dump.custom clickbot-test-db:/tmp/dump.custom",
-                check=True,
-                timeout=120,
-            )
-            await ssh.run(
-                server,
-                "docker exec clickbot-test-db pg_restore -U clickbot -d postgres "
-                "--no-owner --no-acl --create "
-                "--section=pre-data --section=data "
-                "/tmp/dump.custom",
-                check=True,
-                timeout=600,
-            )
-
-            # Rename DB to clickbot_test (what the test container expects)
-            await ssh.run(
-                server,
-                f"docker exec clickbot-test-db psql -U clickbot -d postgres -c "
-                f"'ALTER DATABASE \"{db}\" RENAME TO clickbot_test'",
-                check=True,
-                timeout=30,
-            )
-
-            # Neutralize crons, mail (keep assets — avoid cold-start failures)
+            # 3. Clone clickbot_test from a cached template when the repo commit
+            # and source DB content are unchanged; otherwise restore from scratch.
+            # Neutralize crons, mail (keep assets — avoid cold-start failures).
             prepare_sql = (
-                "UPDATE ir_cron SET active = false; "
-                "UPDATE fetchmail_server SET active = false WHERE active = true; "
+                "\\connect clickbot_test\n"
+                "UPDATE ir_cron SET active = false;\n"
+                "UPDATE fetchmail_server SET active = false WHERE active = true;\n"
                 "UPDATE ir_mail_server SET active = false WHERE active = true;"
             )
-            await ssh.run(
-                server,
-                f'docker exec clickbot-test-db psql -U clickbot -d clickbot_test -c "{prepare_sql}"',
-                check=True,
-                timeout=30,
+            key = await _snapshot_key(ssh, server, ctr, db)
+            snapshot = f"{_SNAPSHOT_PREFIX}{key}"
+            clone_sql = (
+                "DROP DATABASE IF EXISTS clickbot_test;\n"
+                f"CREATE DATABASE clickbot_test TEMPLATE {snapshot};\n"
             )
 
+            cached = False
+            if key:
+                clone = await ssh.run(server, _clickbot_psql(clone_sql + prepare_sql), timeout=300)
+                cached = clone.success
+
+            if cached:
+                logger.info("Cloned clickbot_test from template %s on %s", snapshot, server.host)
+            else:
+                # Drop stale snapshots and leftovers so the restore starts clean
+                await ssh.run(
+                    server,
+                    _clickbot_psql(
+                        "SELECT format('DROP DATABASE %I', datname) FROM pg_database "
+                        f"WHERE datname LIKE '{_SNAPSHOT_PREFIX}%' OR datname IN ('{db}', 'clickbot_test')\n"
+                        "\\gexec"
+                    ),
+                    check=True,
+                    timeout=300,
+                )
+
+                # Stream production DB dump straight into clickbot-db — no host
+                # temp file, no docker cp (exclude FK-dependent noisy tables auto-detected).
+                # pg_restore -j needs a seekable file, so the dump lands inside the
+                # container and is restored with half its CPUs as parallel jobs.
+                logger.info("Dumping production DB %s on %s into clickbot-db", db, server.host)
+                excluded_tables = await _get_fk_excluded_tables(ssh, server, ctr, db)
+                exclude_flags = " ".join(f"--exclude-table-data={t}" for t in excluded_tables)
+                await ssh.run(
+                    server,
+                    "set -o pipefail; "
+                    f"docker exec {ctr}-db pg_dump -U odoo -Fc --no-owner --no-acl {db} "
+                    f"{exclude_flags} | "
+                    "docker exec -i clickbot-test-db sh -c '"
+                    "cat > /tmp/dump.custom || exit 1; "
+                    "jobs=$(( $(nproc) / 2 )); [ \"$jobs\" -ge 1 ] || jobs=1; "
+                    "pg_restore -U clickbot -d postgres "
+                    "--no-owner --no-acl --create --exit-on-error -j \"$jobs\" "
+                    "--section=pre-data --section=data /tmp/dump.custom; "
+                    "rc=$?; rm -f /tmp/dump.custom; exit $rc'",
+                    check=True,
+                    timeout=1200,
+                )
+
+                # Keep the restored DB as the template and clone clickbot_test
+                # (what the test container expects) from it — one psql session.
+                if key:
+                    restore_sql = f'ALTER DATABASE "{db}" RENAME TO {snapshot};\n' + clone_sql
+                else:
+                    restore_sql = f'ALTER DATABASE "{db}" RENAME TO clickbot_test;\n'
+                await ssh.run(
+                    server,
+                    _clickbot_psql(restore_sql + prepare_sql),
+                    check=True,
+                    timeout=300,
+                )
+
             # 4. Run clickbot tests via docker compose
             test_timeout = 3600 if test_mode == "full" else 1800
             logger.info("Running clickbot tests (mode=%s)", test_mode)
@@ -204,42 +287,41 @@ def register_clickbot_handlers(
             )
             phase1_crashed = any(ind in log_output for ind in _PHASE1_INDICATORS)
 
-            # Passed apps
-            passed_matches = re.findall(
-                r"clickbot test succeeded.*?app='([^']+)'", log_output,
-            )
-            n_passed = len(passed_matches) or log_output.count("clickbot test succeeded")
+            # Passed and skipped apps — one pass over the log for both
+            passed_matches: list[str] = []
+            skipped_details: list[dict[str, str]] = []
+            n_succeeded = 0
+            n_skip_lines = 0
+            for m in _RESULT_RE.finditer(log_output):
+                if m.lastgroup == "passed":
+                    n_succeeded += 1
+                    if m.group("passed_app"):
+                        passed_matches.append(m.group("passed_app"))
+                elif m.lastgroup == "skipped":
+                    n_skip_lines += 1
+                    if m.group("skipped_app"):
+                        skipped_details.append({"app": m.group("skipped_app").strip(), "reason": "Скіпнуто тестом"})
+                else:
+                    n_skip_lines += 1
+                    app = m.group("no_xmlid_app") or "unknown"
+                    skipped_details.append({"app": app.strip(), "reason": "Немає xmlid"})
+            n_passed = len(passed_matches) or n_succeeded
 
             # Failed apps with reasons
             failed_details: list[dict[str, str]] = []
-            for m in re.finditer(
-                r"FAIL: Subtest.*?app='([^']+)'(?:.*?(?:Error|Exception|Traceback)[^\n]*([^\n]{0,200}))?",
-                log_output,
-                re.DOTALL,
-            ):
+            for m in _FAIL_RE.finditer(log_output):
                 app = m.group(1)
                 reason = m.group(2).strip() if m.group(2) else ""
                 if not reason:
                     # Try to find error context nearby
                     pos = m.end()
                     snippet = log_output[pos:pos + 500]
-                    err_match = re.search(r"((?:Error|Exception|AssertionError)[^\n]{0,200})", snippet)
+                    err_match = _ERROR_CONTEXT_RE.search(snippet)
                     reason = err_match.group(1).strip() if err_match else "Невідома помилка"
                 failed_details.append({"app": app, "reason": reason})
             n_failed = len(failed_details)
 
-            # Skipped apps with reasons
-            skipped_details: list[dict[str, str]] = []
-            for m in re.finditer(
-                r"(?:skipped Subtest.*?app='([^']+)'|Skipping app without xmlid[:\s]*([^\n]*))",
-                log_output,
-            ):
-                app = m.group(1) or m.group(2) or "unknown"
-                skipped_details.append({"app": app.strip(), "reason": "Немає xmlid" if not m.group(1) else "Скіпнуто тестом"})
-            n_skipped = len(skipped_details) or (
-                log_output.count("skipped Subtest")
-                + log_output.count("Skipping app without xmlid")
-            )
+            n_skipped = len(skipped_details) or n_skip_lines
 
             # Also catch: no results + bad exit + odoo reset indicator (ambiguous case)
             if not phase1_crashed and result.exit_code != 0 and (n_passed + n_failed + n_skipped) == 0:
@@ -247,13 +329,9 @@ def register_clickbot_handlers(
 
             # ── Phase 1 crashed — return immediately with clear report ──────
             if phase1_crashed:
-                fnf_match = re.search(
-                    r"FileNotFoundError[^\n]*['\"]([^'\"]+)['\"]", log_output,
-                )
-                mod_match = re.search(r"load_openerp_module\('([^']+)'\)", log_output)
-                reg_match = re.search(
-                    r"((?:ERROR\s+)?odoo[^\n]*Failed to load registry[^\n]*)", log_output,
-                )
+                fnf_match = _MISSING_FILE_RE.search(log_output)
+                mod_match = _LOAD_MODULE_RE.search(log_output)
+                reg_match = _REGISTRY_RE.search(log_output)
 
                 details: list[str] = []
                 if fnf_match:
@@ -336,7 +414,6 @@ def register_clickbot_handlers(
             # Always cleanup
             await ssh.run_in_repo(
                 server,
-                "docker compose -f docker-compose.clickbot.yml down -v 2>/dev/null || true",
+                "docker compose -f docker-compose.clickbot.yml down 2>/dev/null || true",
                 timeout=300,
             )
-            await ssh.run(server, "rm -f /tmp/clickbot_db_dump.custom")
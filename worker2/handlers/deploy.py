@@ -7,6 +7,7 @@ All operations execute via SSH on target servers.
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
 import re
@@ -21,7 +22,7 @@ from ..errors import DeployError
 
 from ..config import AppConfig
 from ..retry import retry
-from ..ssh import AsyncSSHClient, CommandResult
+from ..ssh import ENSURE_REMOTE_SCRIPT_DIR, REMOTE_SCRIPT_DIR, AsyncSSHClient, CommandResult
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,9 @@ _deploy_locks: dict[str, asyncio.Lock] = {}
 # Prevents two concurrent deploy pipelines from clobbering each other across tasks.
 _DEPLOY_LOCK_STALE_SECS = 1800  # 30 min — discard lock if older than this
 _NO_PR_MODULES = "__NO_CHANGED_ODOO_MODULES__"
+_SMOKE_ERROR_RE = re.compile(r"CRITICAL|ERROR|ImportError|ModuleNotFoundError|SyntaxError|Traceback")
+_PR_REF_RE = re.compile(r"#(\d+)")
+_UNSAFE_STAMP_CHARS_RE = re.compile(r"[^A-Za-z0-9_.-]")
 
 
 def _get_deploy_lock(server_host: str) -> asyncio.Lock:
@@ -158,6 +162,20 @@ WHERE u.login IS NULL;
 """.strip()
 
 
+def _psql_stdin_command(container: str, db: str, sql: str) -> str:
+    """Build a ``docker exec -i ... psql`` command that reads ``sql`` from stdin.
+
+    The SQL travels in a quoted heredoc, so it needs no shell escaping and
+    several statements share one psql session.
+    """
+    return (
+        f"docker exec -i {shlex.quote(f'{container}-db')} "
+        f"psql -U odoo -d {shlex.quote(db)} -t -A -v ON_ERROR_STOP=1 <<'SQL'\n"
+        f"{sql}\n"
+        "SQL"
+    )
+
+
 def _extract_psql_marker(stdout: str, marker: str) -> str:
     prefix = f"{marker}="
     for line in stdout.splitlines():
@@ -354,9 +372,9 @@ def register_deploy_handlers(
             "    print('BROKEN'); [print(b) for b in broken[:10]]; sys.exit(1)\n"
             "mb = subprocess.run(['git','merge-base',BASE_REF,REF], capture_output=True, text=True)\n"
             "base = mb.stdout.strip() if mb.returncode == 0 and mb.stdout.strip() else BASE_REF\n"
-            "diff = subprocess.run(['git','diff','--name-only',base,REF], capture_output=True, text=True)\n"
+            "diff = subprocess.run(['git','diff','-z','--name-only',base,REF,'--','src/custom/'], capture_output=True, text=True)\n"
             "mods = set()\n"
-            "paths = diff.stdout.splitlines() if diff.returncode == 0 else []\n"
+            "paths = diff.stdout.split('\\0') if diff.returncode == 0 else []\n"
             "for path in paths:\n"
             "    if not path.startswith('src/custom/'):\n"
             "        continue\n"
@@ -506,14 +524,20 @@ def register_deploy_handlers(
         db = db_name or server.db_name
         repo = repo_dir or server.repo_dir
 
-        scan_script = _build_version_compare_script(ctr, db)
+        scan_command = (
+            f"python3 {_VERSION_COMPARE_SHELL_PATH} {shlex.quote(ctr)} {shlex.quote(db)}"
+        )
 
         try:
             result = await ssh.run_in_repo(
                 server,
-                scan_script,
+                f"{ENSURE_REMOTE_SCRIPT_DIR} && test -f {_VERSION_COMPARE_SHELL_PATH}"
+                f" || exit {_SCRIPT_MISSING_EXIT}; {scan_command}",
                 timeout=120,
             )
+            if result.exit_code == _SCRIPT_MISSING_EXIT:
+                await ssh.upload(server, _VERSION_COMPARE_BYTES, _VERSION_COMPARE_PATH)
+                result = await ssh.run_in_repo(server, scan_command, timeout=120)
         except Exception as exc:
             logger.warning("detect-modules: SSH error (%s), falling back to 'all'", exc)
             return {"changed_modules": "all"}
@@ -564,16 +588,16 @@ def register_deploy_handlers(
 
         await retry(_up, max_attempts=3, delay=5.0)
 
-        # Wait for container running (max 60s)
-        for _ in range(12):
-            result = await ssh.run(
-                server,
-                f"docker inspect --format='{{{{.State.Status}}}}' {ctr} 2>/dev/null || echo unknown",
-            )
-            if result.stdout.strip().strip("'") == "running":
-                break
-            await _sleep(5)
-        else:
+        # Wait for container running (max ~60s) — polled remotely with backoff,
+        # so a fast start is seen within 200ms and a slow one costs one round-trip
+        result = await ssh.run(
+            server,
+            "for d in 0.2 0.3 0.5 1 2 3 5 8 13 21 4 0; do "
+            f"s=$(docker inspect --format '{{{{.State.Status}}}}' {shlex.quote(ctr)} 2>/dev/null); "
+            '[ "$s" = running ] && exit 0; sleep "$d"; done; exit 1',
+            timeout=90,
+        )
+        if not result.success:
             raise DeployError(f"Container {ctr} not running after 60s", variables={"error_type": "code"})
 
         # Wait for HTTP service (max 240s)
@@ -619,14 +643,12 @@ def register_deploy_handlers(
             # force_rebuild=True: rebuild image without module migrations
             lock = _get_deploy_lock(server_host)
             async with lock:
-                await ssh.run_in_repo(server, "docker compose stop web", check=True, timeout=60)
-                await ssh.run_in_repo(server, "docker compose build web", check=True, timeout=1200)
+                await _stop_and_build_web(ssh, server)
                 await ssh.run_in_repo(server, "docker compose up -d web", check=True, timeout=60)
                 # Clear stale asset bundles — new image may have different JS/XML files
                 await ssh.run(
                     server,
-                    f"docker exec {ctr}-db psql -U odoo -d {db} -c"
-                    f" \"DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%';\"",
+                    _psql_stdin_command(ctr, db, "DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%';"),
                     check=False,
                 )
             logger.info("module-update: force_rebuild on %s — image rebuilt, asset bundles cleared", server.host)
@@ -634,27 +656,33 @@ def register_deploy_handlers(
 
         lock = _get_deploy_lock(server_host)
         async with lock:
-            # Get DB password
-            db_password = await _get_db_password(ssh, server, ctr)
-
-            # Clean __pycache__
-            await ssh.run_in_repo(
-                server,
-                "find src -type d -name __pycache__ -exec rm -rf {} + 2>/dev/null || true",
-            )
+            # DB password, __pycache__ cleanup and the installed-modules query
+            # are independent — run them concurrently over the one connection.
+            prep = [
+                _get_db_password(ssh, server, ctr),
+                ssh.run_in_repo(
+                    server,
+                    # git clean walks only untracked paths instead of stat-ing all of src/
+                    "git clean -fdxq -- 'src/*__pycache__*' 2>/dev/null || true",
+                ),
+            ]
+            if changed_modules != "all":
+                # Query installed modules — only update those that are installed
+                prep.append(ssh.run(
+                    server,
+                    _psql_stdin_command(
+                        ctr, db,
+                        "SELECT COALESCE(json_agg(name), '[]') FROM ir_module_module WHERE state = 'installed';",
+                    ),
+                    check=True,
+                ))
+            db_password, _, *installed_result = await asyncio.gather(*prep)
 
             if changed_modules == "all":
                 update_flag = "-u all"
                 modules_updated = "all"
             else:
-                # Query installed modules — only update those that are installed
-                result = await ssh.run(
-                    server,
-                    f"docker exec {ctr}-db psql -U odoo -d {db} -t -A "
-                    f"-c \"SELECT name FROM ir_module_module WHERE state = 'installed';\"",
-                    check=True,
-                )
-                installed = set(result.stdout.strip().split("\n"))
+                installed = set(json.loads(installed_result[0].stdout.strip() or "[]"))
 
                 to_update = []
                 if changed_modules:
@@ -685,7 +713,7 @@ def register_deploy_handlers(
             new_commit = str(kwargs.get("new_commit") or "").strip()
             stamp_path = ""
             if new_commit:
-                safe_commit = re.sub(r"[^A-Za-z0-9_.-]", "_", new_commit)[:64]
+                safe_commit = _UNSAFE_STAMP_CHARS_RE.sub("_", new_commit)[:64]
                 stamp_path = f"{repo}/.deploy-state/module_update_{safe_commit}"
                 stamp = await ssh.run(server, f"test -f {shlex.quote(stamp_path)}", check=False)
                 if stamp.success:
@@ -699,8 +727,7 @@ def register_deploy_handlers(
                     return {"modules_updated": modules_updated, "module_update_skipped": True}
 
             # Stop web and rebuild image with new code BEFORE migration
-            await ssh.run_in_repo(server, "docker compose stop web", check=True, timeout=60)
-            await ssh.run_in_repo(server, "docker compose build web", check=True, timeout=1200)
+            await _stop_and_build_web(ssh, server)
 
             # Run migration in isolated container (new image, web stopped)
             await ssh.run_in_repo(
@@ -716,8 +743,10 @@ def register_deploy_handlers(
             # Clear asset cache
             await ssh.run(
                 server,
-                f"docker exec {ctr}-db psql -U odoo -d {db} -c "
-                "\"DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%' OR name LIKE 'web.assets%';\"",
+                _psql_stdin_command(
+                    ctr, db,
+                    "DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%' OR name LIKE 'web.assets%';",
+                ),
             )
 
             # Start web with new image
@@ -770,15 +799,8 @@ def register_deploy_handlers(
         server = config.resolve_server(server_host)
         db = db_name or server.db_name
         ctr = container or server.container
-        db_container = f"{ctr}-db"
         sql = _build_staging_admin_grant_sql(logins)
-        command = (
-            f"docker exec {shlex.quote(db_container)} "
-            f"psql -U odoo -d {shlex.quote(db)} -t -A -v ON_ERROR_STOP=1 <<'SQL'\n"
-            f"{sql}\n"
-            "SQL"
-        )
-        result = await ssh.run(server, command, check=True, timeout=120)
+        result = await ssh.run(server, _psql_stdin_command(ctr, db, sql), check=True, timeout=120)
 
         missing = _extract_psql_marker(result.stdout, "MISSING")
         if missing:
@@ -815,8 +837,10 @@ def register_deploy_handlers(
 
         await ssh.run(
             server,
-            f"docker exec {ctr}-db psql -U odoo -d {db} -c "
-            "\"DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%' OR name LIKE 'web.assets%';\"",
+            _psql_stdin_command(
+                ctr, db,
+                "DELETE FROM ir_attachment WHERE url LIKE '/web/assets/%' OR name LIKE 'web.assets%';",
+            ),
         )
         await ssh.run_in_repo(server, "docker compose up -d", check=True)
         logger.info("cache-clear on %s", server.host)
@@ -853,16 +877,25 @@ def register_deploy_handlers(
             "inconsistent states",
             "Importing test framework",
         ]
+        # Walk the log by regex hits instead of splitting it into lines;
+        # only the first three errors are reported, so stop there.
+        out = result.stdout
         error_lines = []
-        for line in result.stdout.split("\n"):
-            if re.search(r"CRITICAL|ERROR|ImportError|ModuleNotFoundError|SyntaxError|Traceback", line):
-                if not any(p in line for p in ignore_patterns):
-                    error_lines.append(line.strip())
+        match = _SMOKE_ERROR_RE.search(out)
+        while match and len(error_lines) < 3:
+            start = out.rfind("\n", 0, match.start()) + 1
+            end = out.find("\n", match.end())
+            if end == -1:
+                end = len(out)
+            line = out[start:end]
+            if not any(p in line for p in ignore_patterns):
+                error_lines.append(line.strip())
+            match = _SMOKE_ERROR_RE.search(out, end)
 
         smoke_passed = result.exit_code == 0 and not error_lines
 
         if not smoke_passed:
-            error_summary = "; ".join(error_lines[:3]) if error_lines else f"exit code {result.exit_code}"
+            error_summary = "; ".join(error_lines) if error_lines else f"exit code {result.exit_code}"
             raise DeployError(f"Smoke test failed on {server.host}: {error_summary}", variables={"error_type": "code"})
 
         logger.info("smoke-test on %s: passed=True", server.host)
@@ -1250,7 +1283,7 @@ def register_deploy_handlers(
 
         pr_numbers: list[int] = []
         for line in result.stdout.strip().splitlines():
-            match = re.search(r"#(\d+)", line)
+            match = _PR_REF_RE.search(line)
             if match:
                 pr_numbers.append(int(match.group(1)))
 
@@ -1264,23 +1297,21 @@ def register_deploy_handlers(
 # ── Helpers ────────────────────────────────────────────────────
 
 
-def _build_version_compare_script(container: str, db_name: str) -> str:
-    """Build a shell script comparing src/custom in repo, container, and DB.
-
-    Uses Odoo's adapt_version logic: if version has 2-3 parts and doesn't
-    start with 'MAJOR.0.', prepend 'MAJOR.0.' (e.g. '1.0' -> '19.0.1.0').
-    """
-    db_container = f"{container}-db"
-    return f"""python3 <<'PYEOF'
+# Compares src/custom in repo, container, and DB; prints changed module names.
+# Uses Odoo's adapt_version logic: if version has 2-3 parts and doesn't
+# start with 'MAJOR.0.', prepend 'MAJOR.0.' (e.g. '1.0' -> '19.0.1.0').
+# Takes the container and DB name as argv so the body never changes.
+_VERSION_COMPARE_SCRIPT = r"""
 import ast
 import hashlib
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-CONTAINER = {container!r}
-DB_CONTAINER = {db_container!r}
-DB_NAME = {db_name!r}
+CONTAINER = sys.argv[1]
+DB_CONTAINER = CONTAINER + "-db"
+DB_NAME = sys.argv[2]
 CUSTOM_BASE = "src/custom"
 CONTAINER_CUSTOM_CANDIDATES = (
     "/opt/odoo/custom",
@@ -1289,14 +1320,15 @@ CONTAINER_CUSTOM_CANDIDATES = (
     "/opt/odoo/src/custom",
     "/app/src/custom",
 )
-IGNORED_DIRS = {{
+IGNORED_DIRS = {
     "__pycache__",
     ".git",
     ".mypy_cache",
     ".pytest_cache",
     ".ruff_cache",
-}}
+}
 IGNORED_SUFFIXES = (".pyc", ".pyo", ".swp", "~")
+HASH_WORKERS = 16
 
 
 def run(args):
@@ -1344,7 +1376,7 @@ def installed_versions():
     if result.returncode != 0:
         sys.stderr.write(result.stderr[:500])
         sys.exit(result.returncode or 1)
-    versions = {{}}
+    versions = {}
     for line in result.stdout.splitlines():
         if "=" not in line:
             continue
@@ -1363,11 +1395,11 @@ def hash_tree(path):
             full_path = os.path.join(root, filename)
             rel_path = os.path.relpath(full_path, path).replace(os.sep, "/")
             digest.update(rel_path.encode("utf-8"))
-            digest.update(b"\\0")
+            digest.update(b"\0")
             with open(full_path, "rb") as handle:
                 for chunk in iter(lambda: handle.read(1024 * 1024), b""):
                     digest.update(chunk)
-            digest.update(b"\\0")
+            digest.update(b"\0")
     return digest.hexdigest()
 
 
@@ -1376,13 +1408,13 @@ import hashlib
 import os
 import sys
 
-IGNORED_DIRS = {{
+IGNORED_DIRS = {
     "__pycache__",
     ".git",
     ".mypy_cache",
     ".pytest_cache",
     ".ruff_cache",
-}}
+}
 IGNORED_SUFFIXES = (".pyc", ".pyo", ".swp", "~")
 
 
@@ -1396,11 +1428,11 @@ def hash_tree(path):
             full_path = os.path.join(root, filename)
             rel_path = os.path.relpath(full_path, path).replace(os.sep, "/")
             digest.update(rel_path.encode("utf-8"))
-            digest.update(b"\\0")
+            digest.update(b"\0")
             with open(full_path, "rb") as handle:
                 for chunk in iter(lambda: handle.read(1024 * 1024), b""):
                     digest.update(chunk)
-            digest.update(b"\\0")
+            digest.update(b"\0")
     print(digest.hexdigest())
 
 
@@ -1423,7 +1455,7 @@ def container_custom_root():
         "sh",
         "-lc",
         "find /opt /mnt /app -maxdepth 4 -type d "
-        "\\\\( -path '*/src/custom' -o -name custom \\\\) 2>/dev/null | head -n 1",
+        "\\( -path '*/src/custom' -o -name custom \\) 2>/dev/null | head -n 1",
     ])
     if result.returncode == 0 and result.stdout.strip():
         return result.stdout.strip().splitlines()[0]
@@ -1448,10 +1480,11 @@ def main():
     installed = installed_versions()
     custom_root = container_custom_root()
     if not custom_root:
-        sys.stderr.write("Could not locate src/custom equivalent in container\\n")
+        sys.stderr.write("Could not locate src/custom equivalent in container\n")
         sys.exit(1)
 
     changed = set()
+    to_hash = []
     for module_name in sorted(os.listdir(CUSTOM_BASE)):
         module_dir = os.path.join(CUSTOM_BASE, module_name)
         manifest = os.path.join(module_dir, "__manifest__.py")
@@ -1465,11 +1498,17 @@ def main():
         if repo_version and repo_version != db_version:
             changed.add(module_name)
             continue
+        to_hash.append(module_name)
 
-        repo_hash = hash_tree(module_dir)
-        image_hash = container_module_hash(custom_root, module_name)
-        if image_hash != repo_hash:
-            changed.add(module_name)
+    def differs(module_name):
+        repo_hash = hash_tree(os.path.join(CUSTOM_BASE, module_name))
+        return container_module_hash(custom_root, module_name) != repo_hash
+
+    # One docker exec per module — overlap them, bounded so dockerd is not flooded.
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        for module_name, is_changed in zip(to_hash, pool.map(differs, to_hash)):
+            if is_changed:
+                changed.add(module_name)
 
     for module_name in sorted(changed):
         print(module_name)
@@ -1477,7 +1516,20 @@ def main():
 
 if __name__ == "__main__":
     main()
-PYEOF"""
+""".strip()
+
+# Content-addressed remote path in the private script directory, as for the
+# audit script: uploaded once per script version, after which each
+# detect-modules call sends one short command. The path is relative to home
+# for SFTP; commands run from the repo use _VERSION_COMPARE_SHELL_PATH.
+_VERSION_COMPARE_BYTES = _VERSION_COMPARE_SCRIPT.encode()
+_VERSION_COMPARE_PATH = (
+    f"{REMOTE_SCRIPT_DIR}/_detect_modules_"
+    f"{hashlib.sha256(_VERSION_COMPARE_BYTES).hexdigest()[:16]}.py"
+)
+_VERSION_COMPARE_SHELL_PATH = f'"$HOME/{_VERSION_COMPARE_PATH}"'
+# Exit status the wrapper uses when the script has not been uploaded yet
+_SCRIPT_MISSING_EXIT = 97
 
 
 import asyncio as _asyncio
@@ -1494,34 +1546,58 @@ async def _wait_http(
     max_attempts: int = 24,
     interval: int = 10,
 ) -> None:
-    """Poll HTTP endpoint until it responds."""
-    for attempt in range(1, max_attempts + 1):
-        result = await ssh.run(
-            server,
-            f"curl -sf -o /dev/null --max-time 10 http://localhost:{port}/web/login",
-        )
-        if result.success:
-            return
-        if attempt < max_attempts:
-            await _sleep(interval)
+    """Poll HTTP endpoint until it responds.
+
+    The whole poll loop runs remotely in one SSH command: the delay between
+    probes starts at 1s and doubles up to ``interval``, within a total budget
+    of ``max_attempts * interval`` seconds.
+    """
+    budget = max_attempts * interval
+    result = await ssh.run(
+        server,
+        f"end=$((SECONDS + {budget})); delay=1; "
+        "while :; do "
+        f"curl -sf -o /dev/null --max-time 10 http://localhost:{port}/web/login && exit 0; "
+        '[ "$SECONDS" -ge "$end" ] && exit 1; '
+        f'sleep "$delay"; delay=$((delay * 2)); [ "$delay" -le {interval} ] || delay={interval}; '
+        "done",
+        timeout=budget + 30,
+    )
+    if result.success:
+        return
 
     raise DeployError(
-        f"HTTP service not responding on {server.host}:{port} after {max_attempts * interval}s",
+        f"HTTP service not responding on {server.host}:{port} after {budget}s",
         variables={"error_type": "code"},
     )
 
 
+async def _stop_and_build_web(ssh: AsyncSSHClient, server: Any) -> None:
+    """Stop the web service and build its image concurrently.
+
+    The build does not need web stopped, so the two compose commands run
+    side by side on the pooled connection instead of back to back.
+    """
+    results = await asyncio.gather(
+        ssh.run_in_repo(server, "docker compose stop web", check=True, timeout=60),
+        ssh.run_in_repo(server, "docker compose build web", check=True, timeout=1200),
+        return_exceptions=True,
+    )
+    # Wait for both before failing so no compose command outlives the deploy lock
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
 async def _get_db_password(ssh: AsyncSSHClient, server: Any, container: str) -> str:
     """Retrieve database password from container or .env file."""
-    # Try container env
-    result = await ssh.run(server, f"docker exec {container} printenv PASSWORD 2>/dev/null")
-    if result.success and result.stdout.strip():
-        return result.stdout.strip()
-
-    # Fallback: .env file
-    result = await ssh.run_in_repo(
+    # Container env first, .env file as fallback — one round-trip either way
+    env_file = shlex.quote(f"{server.repo_dir}/.env")
+    result = await ssh.run(
         server,
-        "grep -oP 'POSTGRES_PASSWORD=\\K.*' .env 2>/dev/null",
+        f"pw=$(docker exec {container} printenv PASSWORD 2>/dev/null); "
+        f"[ -n \"$pw\" ] || pw=$(grep -oP 'POSTGRES_PASSWORD=\\K.*' {env_file} 2>/dev/null); "
+        "[ -n \"$pw\" ] && printf '%s\\n' \"$pw\"",
     )
     if result.success and result.stdout.strip():
         return result.stdout.strip()
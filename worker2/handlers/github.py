@@ -7,6 +7,7 @@ import asyncio
 import json
 import logging
 import os
+import re
 from pathlib import Path
 from typing import Any
 
@@ -190,7 +191,9 @@ async def _run_review_once(
         raw_stdout = stdout.decode()
         last_agent_text: str | None = None
         for line in reversed(raw_stdout.strip().split('\n')):
-            if not line.strip():
+            # Cheap substring check first — most events are reasoning and
+            # command output, and decoding each one just to discard it is waste.
+            if "agent_message" not in line:
                 continue
             try:
                 event = json.loads(line)
@@ -483,8 +486,14 @@ _SEVERITY_ICONS = {
     "nit": "\U0001f7e2",       # green circle
 }
 
+# Hidden trailer on the review comment recording the head it covers, so a
+# re-run for the same commit reuses the posted result instead of reviewing again.
+_REVIEW_RESULT_RE = re.compile(
+    r"<!-- codex-review head=([0-9a-f]{7,40}) score=(\d+) critical=([01]) -->"
+)
+
 
-def _format_review_comment(review: dict) -> str:
+def _format_review_comment(review: dict, head_sha: str = "") -> str:
     """Format review result as a markdown GitHub comment."""
     score = review.get("score", 0)
     summary = review.get("summary", "")
@@ -521,9 +530,24 @@ def _format_review_comment(review: dict) -> str:
         lines.append("*Reviewed by Claude CLI (fallback)*")
     else:
         lines.append("*Reviewed by Codex CLI (Subscription)*")
+    if head_sha:
+        lines.append(
+            f"<!-- codex-review head={head_sha} score={score} "
+            f"critical={int(bool(review.get('critical', False)))} -->"
+        )
     return "\n".join(lines)
 
 
+def _cached_review(comment: Any, head_sha: str) -> dict | None:
+    """Return score/critical from a review comment posted for ``head_sha``."""
+    if not head_sha or not isinstance(comment, dict):
+        return None
+    match = _REVIEW_RESULT_RE.search(comment.get("body") or "")
+    if not match or match.group(1) != head_sha:
+        return None
+    return {"score": int(match.group(2)), "critical": match.group(3) == "1"}
+
+
 def _format_review_unavailable_comment(
     reason: str,
     head_sha: str = "",
@@ -701,18 +725,53 @@ def register_github_handlers(
         current_retries = int(getattr(job, "retries", 0) or 0)
         retries_left_after_failure = max(current_retries - 1, 0)
 
-        # 1. Pin the review to the PR head seen at review time.
-        try:
-            pr_data = await github.get_pr(repo, pr_number)
+        # 1+2. Pin the review to the PR head seen at review time, fetch the
+        # diff and the current review comment; the reads are independent,
+        # so issue them together.
+        pr_result, diff_result, comment_result = await asyncio.gather(
+            github.get_pr(repo, pr_number, cached=False),
+            _get_pr_diff_with_retries(github, repo, pr_number),
+            # Only the worker's own comment is trusted: anyone who can comment
+            # on the PR could otherwise forge a passing trailer.
+            github.find_own_comment(repo, pr_number, "Codex Code Review"),
+            return_exceptions=True,
+        )
+        # return_exceptions also captures cancellation; never swallow it
+        for outcome in (pr_result, diff_result, comment_result):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+        if isinstance(pr_result, BaseException):
+            logger.warning("Failed to fetch PR #%d head before review: %s", pr_number, pr_result)
+        else:
             review_head_sha = str(
-                (pr_data.get("head") or {}).get("sha") or review_head_sha
+                (pr_result.get("head") or {}).get("sha") or review_head_sha
             )
-        except Exception as exc:
-            logger.warning("Failed to fetch PR #%d head before review: %s", pr_number, exc)
 
-        # 2. Fetch diff
+        # Re-runs for an already reviewed head reuse the posted result
+        # instead of spending minutes in the reviewer again.
+        if isinstance(comment_result, BaseException):
+            logger.warning(
+                "Failed to look up cached review for PR #%d, reviewing again: %s",
+                pr_number, comment_result,
+            )
+        cached = _cached_review(comment_result, review_head_sha)
+        if cached is not None:
+            logger.info(
+                "codex-review PR #%d: head %s already reviewed (score=%d, critical=%s), skipping",
+                pr_number, review_head_sha[:12], cached["score"], cached["critical"],
+            )
+            return {
+                "review_score": cached["score"],
+                "has_critical_issues": cached["critical"],
+                "review_head_sha": review_head_sha,
+                "head_sha": review_head_sha,
+                "process_instance_key": job.process_instance_key,
+            }
+
         try:
-            diff = await _get_pr_diff_with_retries(github, repo, pr_number)
+            if isinstance(diff_result, BaseException):
+                raise diff_result
+            diff = diff_result
         except ReviewUnavailableError as exc:
             logger.error("Review unavailable for PR #%d: %s", pr_number, exc)
             await _mark_review_unavailable(
@@ -751,7 +810,7 @@ def register_github_handlers(
 
         # 4. Post or update review comment on PR (single comment per PR, edited on re-run).
         try:
-            comment_body = _format_review_comment(review)
+            comment_body = _format_review_comment(review, review_head_sha)
             await github.upsert_comment(
                 repo, pr_number, comment_body, marker="Codex Code Review",
             )
@@ -1,7 +1,9 @@
 """Render handler — builds complex HTML for upstream-sync Odoo tasks."""
 
+import functools
 import html
 import logging
+import re
 from typing import Any
 
 from pyzeebe import Job, ZeebeWorker
@@ -10,6 +12,34 @@ from ..config import AppConfig
 
 logger = logging.getLogger(__name__)
 
+# Lines that can be table rows, and separator rows like |---|:-:|
+_MD_TABLE_LINE_RE = re.compile(r"^[^\n|]*\|.*$", re.MULTILINE)
+_MD_SEPARATOR_RE = re.compile(r"[\s:|-]*")
+
+# super() call status in python_override rows of the audit report
+_SUPER_LABELS = {"no": "❌ без super()", "cond": "⚠️ super() в умові", "yes": "✅ super()"}
+
+_CONFLICT_TODO_HTML = (
+    "<p><b>Що потрібно зробити:</b></p>"
+    "<ol>"
+    '<li>Переглянути <b style="color:red">critical</b> конфлікти</li>'
+    "<li>Виправити зачеплені custom модулі (tut_*)</li>"
+    "<li>Закомітити виправлення в репозиторій</li>"
+    "<li>Закрити цю задачу — процес продовжить створення PR</li>"
+    "</ol>"
+)
+
+_REVIEW_TODO_HTML = (
+    "<h4>Що потрібно перевірити</h4>"
+    "<ul>"
+    "<li>Які модулі оновились та чи всі потрібні</li>"
+    "<li>Impact на custom модулі (tut_*)</li>"
+    "<li>Результати audit — critical/warning конфлікти</li>"
+    "<li>Чи є нові/видалені модулі</li>"
+    "</ul>"
+    "<p><b>Після перевірки закрийте цю задачу</b> — процес продовжить merge в staging та деплой.</p>"
+)
+
 
 def _parse_md_table(md: str) -> list[dict[str, str]]:
     """Parse a markdown pipe-table into a list of dicts (header→value).
@@ -17,27 +47,18 @@ def _parse_md_table(md: str) -> list[dict[str, str]]:
     Only lines containing '|' are considered table rows.
     Preamble text (headings, paragraphs) is skipped.
     """
-    # Only keep lines that look like table rows (contain |)
-    table_lines = [
-        l.strip() for l in md.strip().splitlines()
-        if l.strip() and "|" in l
-    ]
-    if len(table_lines) < 2:
-        return []
-
-    rows: list[list[str]] = []
-    for line in table_lines:
-        cells = [c.strip() for c in line.strip("|").split("|")]
-        # Skip separator rows like |---|---|
-        if all(set(c) <= {"-", ":", " "} for c in cells):
+    headers: list[str] | None = None
+    rows: list[dict[str, str]] = []
+    for match in _MD_TABLE_LINE_RE.finditer(md):
+        line = match.group().strip()
+        if _MD_SEPARATOR_RE.fullmatch(line):
             continue
-        rows.append(cells)
-
-    if len(rows) < 2:
-        return []
-
-    headers = rows[0]
-    return [dict(zip(headers, row)) for row in rows[1:]]
+        cells = [c.strip() for c in line.strip("|").split("|")]
+        if headers is None:
+            headers = cells
+        else:
+            rows.append(dict(zip(headers, cells)))
+    return rows
 
 
 def _impact_to_html(md: str) -> str:
@@ -60,45 +81,48 @@ def _audit_to_html(md: str) -> str:
     if not rows:
         return "<p>Конфліктів не знайдено</p>"
 
+    # Module, target, base and file repeat across many rows — escape each
+    # distinct value once per report.
+    esc = functools.lru_cache(maxsize=512)(html.escape)
+
     critical = []
     warning = []
     info = []
     for r in rows:
         sev = r.get("Severity", "").strip()
-        ctype = html.escape(r.get("Type", ""))
-        mod = html.escape(r.get("Custom Module", ""))
-        target = html.escape(r.get("Target", ""))
-        base = html.escape(r.get("Base", ""))
-        custom_file = html.escape(r.get("File", ""))
+        ctype = esc(r.get("Type", ""))
+        mod = esc(r.get("Custom Module", ""))
+        target = esc(r.get("Target", ""))
+        base = esc(r.get("Base", ""))
+        custom_file = esc(r.get("File", ""))
         line_no = html.escape(r.get("Line", ""))
-        super_info = html.escape(r.get("Super", ""))
+        super_info = esc(r.get("Super", ""))
 
-        # Build detailed line
-        entry = f"<li><b>{mod}</b> → <code>{target}</code>"
+        # Build detailed line from fragments, joined once
+        frags = ["<li><b>", mod, "</b> → <code>", target, "</code>"]
         if ctype == "python_override":
-            entry += f" (Python override"
+            frags.append(" (Python override")
             if super_info:
-                label = {"no": "❌ без super()", "cond": "⚠️ super() в умові", "yes": "✅ super()"}.get(super_info, super_info)
-                entry += f", {label}"
-            entry += ")"
+                frags += (", ", _SUPER_LABELS.get(super_info, super_info))
+            frags.append(")")
         elif ctype == "js_patch":
-            entry += " (JS patch)"
+            frags.append(" (JS patch)")
         elif ctype == "xml_xpath":
-            entry += " (XML xpath"
+            frags.append(" (XML xpath")
             if super_info:
-                entry += f": <code>{super_info}</code>"
-            entry += ")"
+                frags += (": <code>", super_info, "</code>")
+            frags.append(")")
         if custom_file:
-            short_file = custom_file.rsplit("/", 1)[-1] if "/" in custom_file else custom_file
-            entry += f"<br/><small>📄 {custom_file}"
+            frags += ("<br/><small>📄 ", custom_file)
             if line_no:
-                entry += f":{line_no}"
+                frags += (":", line_no)
             if base:
-                entry += f" ← base: {base}"
-            entry += "</small>"
+                frags += (" ← base: ", base)
+            frags.append("</small>")
         elif base:
-            entry += f" (base: {base})"
-        entry += "</li>"
+            frags += (" (base: ", base, ")")
+        frags.append("</li>")
+        entry = "".join(frags)
 
         if "critical" in sev.lower():
             critical.append(entry)
@@ -157,78 +181,63 @@ def register_notify_handlers(
         Returns pre-built name+description for conflict and review tasks.
         Does NOT create tasks in Odoo — only renders HTML.
         """
-        modules_count = len(changed_modules.split(", ")) if changed_modules else 0
         branch_code = sync_branch.split("upstream-", 1)[-1] if "upstream-" in sync_branch else sync_branch
         repo = config.github.repository
         branch_url = f"https://github.com/{repo}/tree/{sync_branch}" if sync_branch else ""
         branch_link = f'<p>🔗 <b>Гілка:</b> <a href="{branch_url}">{sync_branch}</a></p>' if branch_url else ""
 
-        modules_html = "<br/>".join(
-            html.escape(m.strip()) for m in changed_modules.split(",") if m.strip()
-        )
-
-        conflict_task_name = f"[upstream-sync {branch_code}] Виправити конфлікти ({affected_custom_count} модулів)"
-        conflict_description = (
-            branch_link
-            + f"<h3>Upstream Sync — {current_version} ({enterprise_date})</h3>"
+        # One split feeds both the module count and the escaped list
+        modules = [s for m in changed_modules.split(",") if (s := m.strip())]
+        modules_count = len(modules)
+        modules_html = "<br/>".join(html.escape(m) for m in modules)
+        # Both task descriptions embed the same tables — render them once
+        impact_html = _impact_to_html(impact_table)
+        audit_html = _audit_to_html(audit_report)
+
+        # Fragments shared by both descriptions are rendered once
+        header_html = (
+            f"<h3>Upstream Sync — {current_version} ({enterprise_date})</h3>"
             f"<p><b>Змінено файлів:</b> community {community_files}, enterprise {enterprise_files}</p>"
+        )
+        audit_summary_html = (
             f"<p><b>Audit:</b> {audit_conflicts} конфліктів "
             f'(<span style="color:red;font-weight:bold">{audit_critical} critical</span>, '
             f'<span style="color:orange">{audit_warning} warning</span>)</p>'
-            f"<hr/>"
-            f"<h4>Зачеплені custom модулі ({affected_custom_count})</h4>"
-            + _impact_to_html(impact_table)
-            + f"<hr/>"
-            f"<h4>Audit — конфлікти з upstream</h4>"
-            + _audit_to_html(audit_report)
-            + f"<hr/>"
-            f"<h4>Оновлені модулі ({modules_count})</h4>"
-            f"<details><summary>Показати повний список</summary>"
+        )
+        impact_section_html = (
+            f"<hr/><h4>Зачеплені custom модулі ({affected_custom_count})</h4>{impact_html}<hr/>"
+        )
+        modules_section_html = (
+            f"<hr/><h4>Оновлені модулі ({modules_count})</h4>"
+            "<details><summary>Показати повний список</summary>"
             f"<p>{modules_html}</p>"
-            f"</details>"
-            f"<hr/>"
-            f"<p><b>Що потрібно зробити:</b></p>"
-            f"<ol>"
-            f'<li>Переглянути <b style="color:red">critical</b> конфлікти</li>'
-            f"<li>Виправити зачеплені custom модулі (tut_*)</li>"
-            f"<li>Закомітити виправлення в репозиторій</li>"
-            f"<li>Закрити цю задачу — процес продовжить створення PR</li>"
-            f"</ol>"
+            "</details><hr/>"
         )
 
+        conflict_task_name = f"[upstream-sync {branch_code}] Виправити конфлікти ({affected_custom_count} модулів)"
+        conflict_description = "".join((
+            branch_link,
+            header_html,
+            audit_summary_html,
+            impact_section_html,
+            "<h4>Audit — конфлікти з upstream</h4>",
+            audit_html,
+            modules_section_html,
+            _CONFLICT_TODO_HTML,
+        ))
+
         review_task_name = f"[upstream-sync {branch_code}] Переглянути аналіз оновлення"
-        review_description = (
-            branch_link
-            + (f'<p>🔗 <b>PR:</b> <a href="{pr_url}">{pr_url}</a></p>' if pr_url else "")
-            + f"<h3>Upstream Sync — {current_version} ({enterprise_date})</h3>"
-            + f"<p><b>Змінено файлів:</b> community {community_files}, enterprise {enterprise_files}</p>"
-            + (
-                f"<p><b>Audit:</b> {audit_conflicts} конфліктів "
-                f'(<span style="color:red;font-weight:bold">{audit_critical} critical</span>, '
-                f'<span style="color:orange">{audit_warning} warning</span>)</p>'
-                if audit_conflicts else "<p><b>Audit:</b> конфліктів не знайдено ✅</p>"
-            )
-            + f"<hr/>"
-            f"<h4>Зачеплені custom модулі ({affected_custom_count})</h4>"
-            + _impact_to_html(impact_table)
-            + f"<hr/>"
-            f"<h4>Audit — аналіз конфліктів з upstream</h4>"
-            + _audit_to_html(audit_report)
-            + f"<hr/>"
-            f"<h4>Оновлені модулі ({modules_count})</h4>"
-            f"<details><summary>Показати повний список</summary>"
-            f"<p>{modules_html}</p>"
-            f"</details>"
-            + f"<hr/>"
-            f"<h4>Що потрібно перевірити</h4>"
-            f"<ul>"
-            f"<li>Які модулі оновились та чи всі потрібні</li>"
-            f"<li>Impact на custom модулі (tut_*)</li>"
-            f"<li>Результати audit — critical/warning конфлікти</li>"
-            f"<li>Чи є нові/видалені модулі</li>"
-            f"</ul>"
-            + f"<p><b>Після перевірки закрийте цю задачу</b> — процес продовжить merge в staging та деплой.</p>"
-        )
+        review_description = "".join((
+            branch_link,
+            f'<p>🔗 <b>PR:</b> <a href="{pr_url}">{pr_url}</a></p>' if pr_url else "",
+            header_html,
+            audit_summary_html if audit_conflicts else "<p><b>Audit:</b> конфліктів не знайдено ✅</p>",
+            impact_section_html,
+            "<h4>Audit — аналіз конфліктів з upstream</h4>",
+            audit_html,
+            modules_section_html,
+            _REVIEW_TODO_HTML,
+        ))
 
         logger.info("Rendered sync HTML for branch %s", sync_branch)
         return {
@@ -63,6 +63,7 @@ _SECRET_PATTERNS = (
     re.compile(r"\bgh[pousr]_[A-Za-z0-9_]{20,}\b"),
     re.compile(r"\bgithub_pat_[A-Za-z0-9_]{20,}\b"),
 )
+_COMMIT_SHA_RE = re.compile(r"[0-9a-fA-F]{7,40}")
 
 
 _SFTP_CHUNK_TIMEOUT = 120   # seconds per 2MB chunk read/write
@@ -196,7 +197,7 @@ async def _reset_staging_code_to_deployed_commit(
         )
 
     target = (deployed_commit or "main").strip()
-    if target != "main" and not re.fullmatch(r"[0-9a-fA-F]{7,40}", target):
+    if target != "main" and not _COMMIT_SHA_RE.fullmatch(target):
         raise StagingExportError(
             f"Invalid deployed_commit for staging reset: {target!r}",
             variables={"error_type": "infra"},
@@ -510,7 +511,7 @@ def register_staging_sync_handlers(
                 )
 
             source_commit = (deployed_commit or "main").strip()
-            if source_commit != "main" and not re.fullmatch(r"[0-9a-fA-F]{7,40}", source_commit):
+            if source_commit != "main" and not _COMMIT_SHA_RE.fullmatch(source_commit):
                 raise StagingAnonymizeError(
                     f"Invalid deployed_commit for kozak source sync: {source_commit!r}",
                     variables={"error_type": "infra"},
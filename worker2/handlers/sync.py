@@ -28,6 +28,8 @@ from ..ssh import AsyncSSHClient
 
 logger = logging.getLogger(__name__)
 
+_VERSION_INFO_RE = re.compile(r"version_info\s*=\s*\((\d+),\s*(\d+)")
+
 
 def _git_auth_url(pat: str, repo: str) -> str:
     """Build authenticated GitHub URL."""
@@ -105,7 +107,7 @@ def register_sync_handlers(
         result = await ssh.run(
             server, f"cat {repo_dir}/src/community/odoo/release.py", check=True,
         )
-        vi_match = re.search(r"version_info\s*=\s*\((\d+),\s*(\d+)", result.stdout)
+        vi_match = _VERSION_INFO_RE.search(result.stdout)
         version = f"{vi_match.group(1)}.{vi_match.group(2)}" if vi_match else upstream_branch
 
         # Read upstream SHAs from state file (saved after each successful sync)
@@ -142,13 +144,14 @@ def register_sync_handlers(
         """Fetch latest verified SHAs from Runbot CI API."""
         url = "https://runbot.odoo.com/runbot/json/last_batches_infos"
 
-        async def _fetch() -> dict:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+        # One client for all attempts, so retries reuse the pooled connection
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            async def _fetch() -> dict:
                 resp = await client.get(url)
                 resp.raise_for_status()
                 return resp.json()
 
-        data = await retry(_fetch, max_attempts=3, delay=5.0)
+            data = await retry(_fetch, max_attempts=3, delay=5.0)
 
         branch_data = data.get(upstream_branch, {})
         commits = branch_data.get("commits", [])
@@ -395,58 +398,34 @@ def register_sync_handlers(
             raise ConfigError("workspace_dir is required")
         ws = workspace_dir
 
-        # Register new files for diff tracking
-        await _ws_run(
-            server, "git add -N src/community/ src/enterprise/ 2>/dev/null || true",
-            workspace=ws,
+        # One round-trip: register new files for diff tracking, then list
+        # every changed path; counts and module names are derived here.
+        # -z keeps odd names unquoted and intact.
+        result = await _ws_run(
+            server,
+            "git add -N src/community/ src/enterprise/ 2>/dev/null; "
+            "git diff -z --name-only -- src/community/ src/enterprise/",
+            check=True, workspace=ws, timeout=300,
         )
 
-        # Check community changes
-        com_check = await _ws_run(server, "git diff --quiet -- src/community/ 2>/dev/null; echo $?", workspace=ws, timeout=300)
-        community_changed = com_check.stdout.strip() != "0"
-
-        # Check enterprise changes
-        ent_check = await _ws_run(server, "git diff --quiet -- src/enterprise/ 2>/dev/null; echo $?", workspace=ws, timeout=300)
-        enterprise_changed = ent_check.stdout.strip() != "0"
-
-        has_changes = community_changed or enterprise_changed
-
         community_files = 0
         enterprise_files = 0
-        changed_modules: list[str] = []
-
-        if community_changed:
-            result = await _ws_run(
-                server, "git diff --name-only -- src/community/ | wc -l", check=True, workspace=ws, timeout=300,
-            )
-            community_files = int(result.stdout.strip())
-
-        if enterprise_changed:
-            result = await _ws_run(
-                server, "git diff --name-only -- src/enterprise/ | wc -l", check=True, workspace=ws, timeout=300,
-            )
-            enterprise_files = int(result.stdout.strip())
-
-            # Get changed module names
-            result = await _ws_run(
-                server,
-                "git diff --name-only -- src/enterprise/ | cut -d'/' -f3 | sort -u",
-                check=True, workspace=ws, timeout=300,
-            )
-            changed_modules = [m for m in result.stdout.strip().split("\n") if m]
-
-        # Also check community addons for impact analysis
-        if community_changed:
-            result = await _ws_run(
-                server,
-                "git diff --name-only -- src/community/odoo/addons/ 2>/dev/null "
-                "| cut -d'/' -f5 | sort -u",
-                workspace=ws, timeout=300,
-            )
-            community_modules = [m for m in result.stdout.strip().split("\n") if m]
-            all_modules = sorted(set(changed_modules + community_modules))
-        else:
-            all_modules = changed_modules
+        modules: set[str] = set()
+        for path in result.stdout.split("\0"):
+            parts = path.split("/", 5)
+            if len(parts) < 3:
+                continue
+            if parts[1] == "enterprise":
+                enterprise_files += 1
+                modules.add(parts[2])
+            elif parts[1] == "community":
+                community_files += 1
+                # Community addons feed impact analysis too
+                if len(parts) > 4 and parts[2:4] == ["odoo", "addons"]:
+                    modules.add(parts[4])
+
+        has_changes = bool(community_files or enterprise_files)
+        all_modules = sorted(modules)
 
         logger.info(
             "diff-report: changes=%s, community=%d files, enterprise=%d files, modules=%d",
@@ -575,9 +554,10 @@ def register_sync_handlers(
         )
         current_branch = current_branch_result.stdout.strip()
         if current_branch.startswith("sync/upstream-"):
+            # Only "ahead at all?" matters — let git stop at the first commit
             ahead_result = await _ws_run(
                 server,
-                "git rev-list --count origin/main..HEAD",
+                "git rev-list --count --max-count=1 origin/main..HEAD",
                 check=False, workspace=ws,
             )
             if ahead_result.stdout.strip().isdigit() and int(ahead_result.stdout.strip()) > 0:
@@ -47,7 +47,7 @@ async def cleanup_stale_incidents(config: AppConfig) -> int:
             resp = await client.post(
                 f"{zeebe_rest}/v2/incidents/search",
                 headers={
-                    "Authorization": f"Bearer {tm.token}",
+                    "Authorization": f"Bearer {tm.cached_token}",
                     "Content-Type": "application/json",
                 },
                 json={"filter": {"state": "ACTIVE"}},
@@ -91,7 +91,7 @@ async def cleanup_stale_incidents(config: AppConfig) -> int:
                 cancel_resp = await client.post(
                     f"{zeebe_rest}/v2/process-instances/{process_key}/cancellation",
                     headers={
-                        "Authorization": f"Bearer {tm.token}",
+                        "Authorization": f"Bearer {tm.cached_token}",
                         "Content-Type": "application/json",
                     },
                     content="{}",
@@ -13,10 +13,34 @@ logger = logging.getLogger(__name__)
 
 
 class OdooClient:
-    """Creates tasks in Odoo via webhook HTTP POST."""
+    """Creates tasks in Odoo via webhook HTTP POST.
+
+    Owns one keep-alive ``httpx.AsyncClient`` so a burst of task creates
+    reuses the connection instead of paying a TLS handshake each; call
+    :meth:`aclose` when done.
+    """
 
     def __init__(self, config: OdooConfig) -> None:
         self._config = config
+        self._client: httpx.AsyncClient | None = None
+
+    def _http(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def create_task(
         self,
@@ -55,14 +79,12 @@ class OdooClient:
         if create_process:
             body['create_process'] = True
 
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                self._config.webhook_url,
-                json=body,
-                headers={'Content-Type': 'application/json'},
-                timeout=30,
-            )
-            resp.raise_for_status()
+        resp = await self._http().post(
+            self._config.webhook_url,
+            json=body,
+            headers={'Content-Type': 'application/json'},
+        )
+        resp.raise_for_status()
 
         data = resp.json()
         task_id = int(data.get('id', data.get('task_id', 0)))
@@ -5,8 +5,9 @@ from __future__ import annotations
 import asyncio
 import logging
 import re
+import secrets
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import asyncssh
 
@@ -14,6 +15,20 @@ from .config import ServerConfig
 
 logger = logging.getLogger(__name__)
 
+# Pooled connections send a keepalive every 30s and are dropped after
+# three unanswered ones, so dead transports are noticed without probing.
+_KEEPALIVE_INTERVAL = 30
+_KEEPALIVE_COUNT_MAX = 3
+
+# Uploaded helper scripts live here, relative to the login user's home, not in
+# /tmp: the directory is private, so no other account on the host can plant or
+# swap a file under a script's predictable content-addressed name.
+REMOTE_SCRIPT_DIR = '.cache/camunda-worker'
+# Shell snippet creating REMOTE_SCRIPT_DIR with owner-only permissions.
+ENSURE_REMOTE_SCRIPT_DIR = (
+    f'mkdir -p "$HOME/{REMOTE_SCRIPT_DIR}" && chmod 700 "$HOME/{REMOTE_SCRIPT_DIR}"'
+)
+
 _SECRET_PATTERNS = (
     re.compile(r"https://x-access-token:[^@\s]+@github\.com/"),
     re.compile(r"\bgh[pousr]_[A-Za-z0-9_]{20,}\b"),
@@ -76,10 +91,18 @@ class SSHConnectionError(Exception):
 class AsyncSSHClient:
     """SSH client with connection pooling for executing remote commands."""
 
-    def __init__(self, key_path: str = '') -> None:
+    def __init__(self, key_path: str = '', max_sessions: int = 8) -> None:
         self._key_path = key_path
         self._connections: dict[str, asyncssh.SSHClientConnection] = {}
         self._lock = asyncio.Lock()
+        # Channels open at once per server. sshd refuses sessions beyond
+        # MaxSessions (default 10) on one connection, so fan-outs queue here.
+        self._max_sessions = max_sessions
+        self._sessions: dict[str, asyncio.Semaphore] = {}
+
+    def _session_slot(self, server: ServerConfig) -> asyncio.Semaphore:
+        key = f'{server.ssh_user}@{server.host}:{server.ssh_port}'
+        return self._sessions.setdefault(key, asyncio.Semaphore(self._max_sessions))
 
     async def _get_connection(self, server: ServerConfig) -> asyncssh.SSHClientConnection:
         """Get or create an SSH connection to the server."""
@@ -87,12 +110,11 @@ class AsyncSSHClient:
 
         async with self._lock:
             conn = self._connections.get(key)
-            if conn is not None:
-                try:
-                    await conn.run('true', check=True, timeout=5)
-                except Exception:
-                    self._connections.pop(key, None)
-                    conn = None
+            # Keepalives close dead transports for us, so a cached connection
+            # is reused without a probe round-trip unless it is already closed.
+            if conn is not None and conn.is_closed():
+                self._connections.pop(key, None)
+                conn = None
 
             if conn is None:
                 connect_kwargs: dict = {
@@ -100,6 +122,8 @@ class AsyncSSHClient:
                     'port': server.ssh_port,
                     'username': server.ssh_user,
                     'known_hosts': None,
+                    'keepalive_interval': _KEEPALIVE_INTERVAL,
+                    'keepalive_count_max': _KEEPALIVE_COUNT_MAX,
                 }
                 if self._key_path:
                     connect_kwargs['client_keys'] = [self._key_path]
@@ -141,10 +165,11 @@ class AsyncSSHClient:
         logger.debug('SSH %s: %s', server.host, _redact_command(command)[:200])
 
         try:
-            result = await asyncio.wait_for(
-                conn.run(command, check=False),
-                timeout=timeout,
-            )
+            async with self._session_slot(server):
+                result = await asyncio.wait_for(
+                    conn.run(command, check=False),
+                    timeout=timeout,
+                )
         except asyncio.TimeoutError:
             raise RemoteCommandError(
                 f'Command timed out after {timeout}s on {server.host}: '
@@ -186,6 +211,82 @@ class AsyncSSHClient:
             env=env,
         )
 
+    async def run_stream(
+        self,
+        server: ServerConfig,
+        command: str,
+        timeout: int = 120,
+    ) -> AsyncIterator[str]:
+        """Execute a command and yield its stdout line by line as it arrives.
+
+        Stderr is discarded and the exit status is not checked; callers
+        judge success from the output. Stopping iteration early closes
+        the remote channel.
+
+        Args:
+            server: Target server configuration.
+            command: Shell command to execute.
+            timeout: Overall timeout in seconds, counted while waiting for output.
+        """
+        conn = await self._get_connection(server)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        logger.debug('SSH %s (stream): %s', server.host, _redact_command(command)[:200])
+
+        try:
+            async with self._session_slot(server), \
+                    conn.create_process(command, stderr=asyncssh.DEVNULL) as process:
+                while True:
+                    try:
+                        line = await asyncio.wait_for(
+                            process.stdout.readline(),
+                            timeout=max(deadline - loop.time(), 0),
+                        )
+                    except asyncio.TimeoutError:
+                        raise RemoteCommandError(
+                            f'Command timed out after {timeout}s on {server.host}: '
+                            f'{_redact_command(command)[:100]}'
+                        )
+                    if not line:
+                        return
+                    yield line
+        except asyncssh.Error as exc:
+            key = f'{server.ssh_user}@{server.host}:{server.ssh_port}'
+            self._connections.pop(key, None)
+            raise SSHConnectionError(
+                f'SSH connection lost on {server.host}: {exc}'
+            ) from exc
+
+    async def upload(self, server: ServerConfig, data: bytes, path: str) -> None:
+        """Write bytes to a remote file over SFTP.
+
+        The data lands in a temporary sibling first and is renamed into
+        place, so readers never see a partially written file. The temporary
+        name is random, so concurrent uploads cannot clobber each other.
+        Relative paths resolve against the login user's home directory.
+        """
+        conn = await self._get_connection(server)
+        tmp_path = f'{path}.{secrets.token_hex(8)}.tmp'
+
+        logger.debug('SFTP %s: upload %d bytes to %s', server.host, len(data), path)
+
+        try:
+            async with self._session_slot(server), conn.start_sftp_client() as sftp:
+                async with sftp.open(tmp_path, 'wb') as remote_file:
+                    await remote_file.write(data)
+                await sftp.posix_rename(tmp_path, path)
+        except asyncssh.SFTPError as exc:
+            raise RemoteCommandError(
+                f'Upload to {path} failed on {server.host}: {exc}'
+            ) from exc
+        except asyncssh.Error as exc:
+            key = f'{server.ssh_user}@{server.host}:{server.ssh_port}'
+            self._connections.pop(key, None)
+            raise SSHConnectionError(
+                f'SSH connection lost on {server.host}: {exc}'
+            ) from exc
+
     async def close(self) -> None:
         """Close all SSH connections."""
         async with self._lock:
@@ -8,19 +8,21 @@ Endpoints:
 
 from __future__ import annotations
 
-import hashlib
+import asyncio
 import hmac
 import json
 import logging
 import re
-from contextlib import asynccontextmanager
-from typing import Any
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Mapping
 
+import orjson
 from aiohttp import web
 from pyzeebe import ZeebeClient
 
 from .auth import ZeebeAuthConfig, close_channel, create_channel
-from .config import AppConfig
+from .config import AppConfig, ServerConfig
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +30,17 @@ logger = logging.getLogger(__name__)
 _INSTALL_RE = re.compile(r'\[install:\s*([^\]]+)\]', re.IGNORECASE)
 _MERGE_PR_RE = re.compile(r'Merge pull request #(\d+) from \S+', re.IGNORECASE)
 
+_SIGNATURE_PREFIX = 'sha256='
+_SIGNATURE_LEN = len(_SIGNATURE_PREFIX) + 64  # prefix + hex SHA-256
+
+# GitHub redelivers on 5xx with the same delivery id and signature.
+_VERIFIED_DELIVERIES_MAX = 256
+
+# Messages queued within this window share one Zeebe client and are sent
+# concurrently; a burst of webhook events costs one round of publishes.
+_PUBLISH_DEBOUNCE_SECONDS = 0.01
+_PUBLISH_BATCH_MAX = 64
+
 
 def _parse_install_modules(payload: dict) -> str:
     """Parse [install: module1, module2] from push commit messages."""
@@ -50,16 +63,77 @@ def _parse_install_modules(payload: dict) -> str:
     return ",".join(sorted(modules))
 
 
+def _verify_github_signature(
+    body: bytes, secret: str | bytes | hmac.HMAC, signature: str,
+) -> bool:
+    """Check ``X-Hub-Signature-256`` against the body.
+
+    ``secret`` is either the raw webhook secret or a pre-keyed
+    ``hmac.new(secret, None, 'sha256')`` template, which is cloned.
+    """
+    # Cheap length check first; anything but prefix + 64 hex can never match.
+    if len(signature) != _SIGNATURE_LEN or not signature.startswith(_SIGNATURE_PREFIX):
+        return False
+    try:
+        received = bytes.fromhex(signature[len(_SIGNATURE_PREFIX):])
+    except ValueError:
+        return False
+    if isinstance(secret, hmac.HMAC):
+        mac = secret.copy()
+        mac.update(body)
+        expected = mac.digest()
+    else:
+        if isinstance(secret, str):
+            secret = secret.encode('utf-8')
+        expected = hmac.digest(secret, body, 'sha256')
+    return hmac.compare_digest(expected, received)
+
+
+def _json_response(data: Any) -> web.Response:
+    """JSON response serialised with orjson (bytes out, no str round-trip)."""
+    return web.Response(body=orjson.dumps(data), content_type='application/json')
+
+
+def _server_vars(name: str, server: ServerConfig) -> Mapping[str, Any]:
+    """Process variables describing a target server, prefixed with its name."""
+    return MappingProxyType({
+        f"{name}_host": server.host,
+        f"{name}_ssh_user": server.ssh_user,
+        f"{name}_repo_dir": server.repo_dir,
+        f"{name}_db": server.db_name,
+        f"{name}_container": server.container,
+    })
+
+
 class WebhookServer:
     """HTTP server that receives webhooks and publishes Zeebe messages."""
 
     def __init__(self, config: AppConfig) -> None:
         self._config = config
-        self._app = web.Application()
+        # Pre-keyed HMAC state: ipad/opad blocks are hashed once, each request
+        # only clones it and hashes the body.
+        secret = config.github.webhook_secret
+        self._github_hmac = (
+            hmac.new(secret.encode('utf-8'), None, 'sha256') if secret else None
+        )
+        # Server variables never change at runtime; PR events splat these
+        # prebuilt templates instead of re-reading every ServerConfig field.
+        self._server_vars: dict[str, Mapping[str, Any]] = {
+            name: _server_vars(name, config.servers[name])
+            for name in ('staging', 'production')
+            if name in config.servers
+        }
+        self._app = web.Application(client_max_size=config.webhook.max_body_size)
         self._app.router.add_post('/webhook/github', self._handle_github)
         self._app.router.add_post('/webhook/odoo', self._handle_odoo)
         self._app.router.add_get('/health', self._handle_health)
         self._app.router.add_post('/webhook/e2e', self._handle_e2e)
+        self._verified_deliveries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._publish_queue: asyncio.Queue[tuple[dict[str, Any], asyncio.Future]] = asyncio.Queue()
+        self._publisher: asyncio.Task | None = None
+        self._zeebe: tuple[ZeebeClient, Any] | None = None
+        self._app.on_cleanup.append(self._stop_publisher)
+        self._app.on_cleanup.append(self._close_zeebe_client)
         self._runner: web.AppRunner | None = None
 
     # -- Lifecycle -------------------------------------------------
@@ -80,7 +154,6 @@ class WebhookServer:
         )
         try:
             while True:
-                import asyncio
                 await asyncio.sleep(3600)
         except asyncio.CancelledError:
             pass
@@ -93,7 +166,7 @@ class WebhookServer:
             self._runner = None
             logger.info("Webhook server stopped")
 
-    # -- Zeebe client (temporary publisher) ------------------------
+    # -- Zeebe client (shared publisher) ---------------------------
 
     def _zeebe_auth_config(self) -> ZeebeAuthConfig:
         return ZeebeAuthConfig(
@@ -109,20 +182,78 @@ class WebhookServer:
         channel = create_channel(self._zeebe_auth_config())
         return ZeebeClient(channel), channel
 
-    @asynccontextmanager
-    async def _zeebe_client(self):
-        created = self._create_zeebe_client()
-        channel = None
-        if isinstance(created, tuple):
-            client, channel = created
-        else:
-            # Tests patch _create_zeebe_client with a mock client.
-            client = created
-        try:
-            yield client
-        finally:
+    def _zeebe_client(self) -> ZeebeClient:
+        """Return the long-lived publisher client, creating it on first use.
+
+        The channel stays open (with keepalive) until app cleanup, so only the
+        first publish pays connection and TLS setup.
+        """
+        if self._zeebe is None:
+            created = self._create_zeebe_client()
+            if isinstance(created, tuple):
+                self._zeebe = created
+            else:
+                # Tests patch _create_zeebe_client with a mock client.
+                self._zeebe = (created, None)
+        return self._zeebe[0]
+
+    async def _close_zeebe_client(self, app: web.Application | None = None) -> None:
+        if self._zeebe is not None:
+            _, channel = self._zeebe
+            self._zeebe = None
             await close_channel(channel)
 
+    # -- Batched publishing ----------------------------------------
+
+    async def _publish(self, **message: Any) -> None:
+        """Queue a ``publish_message`` call and wait until it has been sent.
+
+        Raises whatever the publish raised, so handlers keep answering 502.
+        """
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.create_task(self._run_publisher())
+        future = asyncio.get_running_loop().create_future()
+        self._publish_queue.put_nowait((message, future))
+        await future
+
+    async def _run_publisher(self) -> None:
+        while True:
+            batch = [await self._publish_queue.get()]
+            await asyncio.sleep(_PUBLISH_DEBOUNCE_SECONDS)
+            while len(batch) < _PUBLISH_BATCH_MAX and not self._publish_queue.empty():
+                batch.append(self._publish_queue.get_nowait())
+            await self._publish_batch(batch)
+
+    async def _publish_batch(self, batch: list[tuple[dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            client = self._zeebe_client()
+            results = await asyncio.gather(
+                *(client.publish_message(**message) for message, _ in batch),
+                return_exceptions=True,
+            )
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(None)
+
+    async def _stop_publisher(self, app: web.Application | None = None) -> None:
+        if self._publisher is not None:
+            self._publisher.cancel()
+            try:
+                await self._publisher
+            except asyncio.CancelledError:
+                pass
+            self._publisher = None
+        while not self._publish_queue.empty():
+            _, future = self._publish_queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Webhook server stopped"))
+
     # -- E2E test gate --------------------------------------------
 
     async def _handle_e2e(self, request: web.Request) -> web.Response:
@@ -132,7 +263,7 @@ class WebhookServer:
         Triggers e2e-gate.bpmn → github-create-pr → GitHub webhook → feature-pipeline
         """
         try:
-            payload = await request.json()
+            payload = orjson.loads(await request.read())
         except Exception:
             return web.Response(status=400, text="Invalid JSON")
 
@@ -155,18 +286,17 @@ class WebhookServer:
         }
 
         try:
-            async with self._zeebe_client() as client:
-                await client.publish_message(
-                    name="msg_e2e_passed",
-                    correlation_key=head_branch,
-                    variables=variables,
-                    time_to_live_in_milliseconds=3_600_000,
-                )
+            await self._publish(
+                name="msg_e2e_passed",
+                correlation_key=head_branch,
+                variables=variables,
+                time_to_live_in_milliseconds=3_600_000,
+            )
             logger.info(
                 "Published msg_e2e_passed for branch %s (pr_title=%r)",
                 head_branch, pr_title,
             )
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "message": "msg_e2e_passed",
                 "head_branch": head_branch,
@@ -178,38 +308,47 @@ class WebhookServer:
     # -- Health check ----------------------------------------------
 
     async def _handle_health(self, request: web.Request) -> web.Response:
-        return web.json_response({"status": "ok"})
+        return _json_response({"status": "ok"})
 
     # -- GitHub webhook --------------------------------------------
 
     async def _handle_github(self, request: web.Request) -> web.Response:
-        body = await request.read()
-
-        secret = self._config.github.webhook_secret
-        if not secret:
+        if self._github_hmac is None:
             logger.error("GITHUB_WEBHOOK_SECRET not configured")
             return web.Response(status=500, text="Webhook secret not configured")
 
+        # Reject before reading the body: a malformed signature can never
+        # match, and an oversized body is not worth buffering.
         signature = request.headers.get('X-Hub-Signature-256', '')
-        if not self._verify_github_signature(body, secret, signature):
+        if len(signature) != _SIGNATURE_LEN or not signature.startswith(_SIGNATURE_PREFIX):
+            logger.warning("Invalid GitHub webhook signature")
+            return web.Response(status=401, text="Invalid signature")
+        if (request.content_length or 0) > self._config.webhook.max_body_size:
+            return web.Response(status=413, text="Payload too large")
+
+        body = await request.read()
+        delivery_id = request.headers.get('X-GitHub-Delivery', '')
+        if not self._check_github_delivery(body, delivery_id, signature):
             logger.warning("Invalid GitHub webhook signature")
             return web.Response(status=401, text="Invalid signature")
 
         event_type = request.headers.get('X-GitHub-Event', '')
         try:
-            payload = json.loads(body)
-        except json.JSONDecodeError:
+            # Parse the same bytes that were HMAC-verified; no second read/decode.
+            payload = orjson.loads(body)
+        except ValueError:
             return web.Response(status=400, text="Invalid JSON")
 
-        delivery_id = request.headers.get('X-GitHub-Delivery', 'unknown')
-        logger.info("GitHub webhook: event=%s, delivery=%s", event_type, delivery_id)
+        logger.info(
+            "GitHub webhook: event=%s, delivery=%s", event_type, delivery_id or 'unknown',
+        )
 
         if event_type == 'pull_request':
             return await self._route_pr_event(payload)
         elif event_type == 'push':
             return await self._route_push_event(payload)
 
-        return web.json_response({"status": "ignored", "event": event_type})
+        return _json_response({"status": "ignored", "event": event_type})
 
     async def _route_pr_event(self, payload: dict) -> web.Response:
         action = payload.get('action', '')
@@ -236,7 +375,7 @@ class WebhookServer:
             return await self._publish_pr_merged(pr, payload)
 
         logger.info("Ignoring PR #%d action=%s", pr_number, action)
-        return web.json_response({"status": "ignored", "action": action})
+        return _json_response({"status": "ignored", "action": action})
 
     async def _route_push_event(self, payload: dict) -> web.Response:
         ref = payload.get('ref', '')
@@ -245,11 +384,11 @@ class WebhookServer:
         # Staging deploy is now triggered by FTP directly (call activity),
         # not by webhook push events. Ignore all push events.
         logger.info("Ignoring push to %s (deploy triggered by FTP)", ref)
-        return web.json_response({"status": "ignored", "ref": ref})
+        return _json_response({"status": "ignored", "ref": ref})
 
         if ref != 'refs/heads/staging':
             logger.info("Ignoring push to %s (not staging)", ref)
-            return web.json_response({"status": "ignored", "ref": ref})
+            return _json_response({"status": "ignored", "ref": ref})
 
         staging = self._config.servers.get('staging')
         if not staging:
@@ -296,18 +435,17 @@ class WebhookServer:
             logger.info("Install modules from commit: %s", install_modules)
 
         try:
-            async with self._zeebe_client() as client:
-                await client.publish_message(
-                    name="msg_deploy_trigger",
-                    correlation_key=variables.get("branch", "staging"),
-                    variables=variables,
-                    time_to_live_in_milliseconds=3_600_000,
-                )
+            await self._publish(
+                name="msg_deploy_trigger",
+                correlation_key=variables.get("branch", "staging"),
+                variables=variables,
+                time_to_live_in_milliseconds=3_600_000,
+            )
             logger.info(
                 "Published msg_deploy_trigger for push to staging (sha=%s)",
                 after_sha[:12],
             )
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "message": "msg_deploy_trigger",
                 "trigger_sha": after_sha,
@@ -335,55 +473,40 @@ class WebhookServer:
             "odoo_webhook_url": self._config.odoo.webhook_url,
         }
 
-        staging = self._config.servers.get('staging')
-        if staging:
-            variables.update({
-                "staging_host": staging.host,
-                "staging_ssh_user": staging.ssh_user,
-                "staging_repo_dir": staging.repo_dir,
-                "staging_db": staging.db_name,
-                "staging_container": staging.container,
-            })
-
-        production = self._config.servers.get('production')
-        if production:
-            variables.update({
-                "production_host": production.host,
-                "production_ssh_user": production.ssh_user,
-                "production_repo_dir": production.repo_dir,
-                "production_db": production.db_name,
-                "production_container": production.container,
-            })
+        variables.update(self._server_vars.get('staging', {}))
+        variables.update(self._server_vars.get('production', {}))
 
         # Sync PRs (sync/* → staging) are too large for automated review — skip it
         is_sync_pr = head_branch.startswith("sync/") and base_branch == "staging"
 
         try:
             messages = []
-            async with self._zeebe_client() as client:
-                if not is_sync_pr:
-                    await client.publish_message(
-                        name="msg_pr_review",
-                        correlation_key=str(pr_number),
-                        variables=variables,
-                        time_to_live_in_milliseconds=3_600_000,
-                    )
-                    messages.append("msg_pr_review")
-                else:
-                    logger.info("Skipping msg_pr_review for sync PR #%d (%s → %s)", pr_number, head_branch, base_branch)
-                if include_ftp_event:
-                    await client.publish_message(
-                        name="msg_pr_event",
-                        correlation_key=variables.get("head_branch", ""),
-                        variables=variables,
-                        time_to_live_in_milliseconds=3_600_000,
-                    )
-                    messages.append("msg_pr_event")
+            publishes = []
+            if not is_sync_pr:
+                publishes.append(self._publish(
+                    name="msg_pr_review",
+                    correlation_key=str(pr_number),
+                    variables=variables,
+                    time_to_live_in_milliseconds=3_600_000,
+                ))
+                messages.append("msg_pr_review")
+            else:
+                logger.info("Skipping msg_pr_review for sync PR #%d (%s → %s)", pr_number, head_branch, base_branch)
+            if include_ftp_event:
+                publishes.append(self._publish(
+                    name="msg_pr_event",
+                    correlation_key=variables.get("head_branch", ""),
+                    variables=variables,
+                    time_to_live_in_milliseconds=3_600_000,
+                ))
+                messages.append("msg_pr_event")
+            # Both land in the same publisher batch.
+            await asyncio.gather(*publishes)
             logger.info(
                 "Published %s for PR #%d (%s)",
                 " + ".join(messages), pr_number, pr.get('title', ''),
             )
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "messages": messages,
                 "pr_number": pr_number,
@@ -396,22 +519,21 @@ class WebhookServer:
         pr_number = pr.get('number', 0)
 
         try:
-            async with self._zeebe_client() as client:
-                await client.publish_message(
-                    name="msg_pr_updated",
-                    correlation_key=str(pr_number),
-                    variables={
-                        "pr_number": pr_number,
-                        "pr_url": pr.get('html_url', ''),
-                        "pr_title": pr.get('title', ''),
-                        "head_branch": pr.get('head', {}).get('ref', ''),
-                        "pr_updated": True,
-                        "head_sha": pr.get('head', {}).get('sha', ''),
-                    },
-                    time_to_live_in_milliseconds=3_600_000,
-                )
+            await self._publish(
+                name="msg_pr_updated",
+                correlation_key=str(pr_number),
+                variables={
+                    "pr_number": pr_number,
+                    "pr_url": pr.get('html_url', ''),
+                    "pr_title": pr.get('title', ''),
+                    "head_branch": pr.get('head', {}).get('ref', ''),
+                    "pr_updated": True,
+                    "head_sha": pr.get('head', {}).get('sha', ''),
+                },
+                time_to_live_in_milliseconds=3_600_000,
+            )
             logger.info("Published msg_pr_updated for PR #%d", pr_number)
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "message": "msg_pr_updated",
                 "pr_number": pr_number,
@@ -425,21 +547,20 @@ class WebhookServer:
         pr_number = pr.get('number', 0)
 
         try:
-            async with self._zeebe_client() as client:
-                await client.publish_message(
-                    name="msg_pr_ready",
-                    correlation_key=str(pr_number),
-                    variables={
-                        "pr_number": pr_number,
-                        "pr_url": pr.get('html_url', ''),
-                        "pr_title": pr.get('title', ''),
-                        "head_branch": pr.get('head', {}).get('ref', ''),
-                        "pr_ready": True,
-                    },
-                    time_to_live_in_milliseconds=3_600_000,
-                )
+            await self._publish(
+                name="msg_pr_ready",
+                correlation_key=str(pr_number),
+                variables={
+                    "pr_number": pr_number,
+                    "pr_url": pr.get('html_url', ''),
+                    "pr_title": pr.get('title', ''),
+                    "head_branch": pr.get('head', {}).get('ref', ''),
+                    "pr_ready": True,
+                },
+                time_to_live_in_milliseconds=3_600_000,
+            )
             logger.info("Published msg_pr_ready for PR #%d", pr_number)
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "message": "msg_pr_ready",
                 "pr_number": pr_number,
@@ -501,23 +622,22 @@ class WebhookServer:
         repo_full = payload.get('repository', {}).get('full_name', self._config.github.repository)
 
         try:
-            async with self._zeebe_client() as client:
-                await client.publish_message(
-                    name="msg_pr_merged",
-                    correlation_key=str(pr_number),
-                    variables={
-                        "pr_number": pr_number,
-                        "pr_url": pr.get('html_url', ''),
-                        "pr_title": pr.get('title', ''),
-                        "merge_commit_sha": pr.get('merge_commit_sha', ''),
-                        "repository": repo_full,
-                        "base_branch": pr.get('base', {}).get('ref', ''),
-                        "head_branch": pr.get('head', {}).get('ref', ''),
-                    },
-                    time_to_live_in_milliseconds=3_600_000,
-                )
+            await self._publish(
+                name="msg_pr_merged",
+                correlation_key=str(pr_number),
+                variables={
+                    "pr_number": pr_number,
+                    "pr_url": pr.get('html_url', ''),
+                    "pr_title": pr.get('title', ''),
+                    "merge_commit_sha": pr.get('merge_commit_sha', ''),
+                    "repository": repo_full,
+                    "base_branch": pr.get('base', {}).get('ref', ''),
+                    "head_branch": pr.get('head', {}).get('ref', ''),
+                },
+                time_to_live_in_milliseconds=3_600_000,
+            )
             logger.info("Published msg_pr_merged for PR #%d", pr_number)
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "message": "msg_pr_merged",
                 "pr_number": pr_number,
@@ -541,8 +661,8 @@ class WebhookServer:
                 return web.Response(status=401, text="Invalid token")
 
         try:
-            payload = await request.json()
-        except json.JSONDecodeError:
+            payload = orjson.loads(await request.read())
+        except ValueError:
             return web.Response(status=400, text="Invalid JSON")
 
         task_id = str(payload.get('task_id', ''))
@@ -581,17 +701,16 @@ class WebhookServer:
                 if key in payload:
                     msg_variables[key] = payload[key]
 
-            async with self._zeebe_client() as client:
-                await client.publish_message(
-                    name="msg_odoo_task_done",
-                    correlation_key=correlation_key,
-                    variables=msg_variables,
-                )
+            await self._publish(
+                name="msg_odoo_task_done",
+                correlation_key=correlation_key,
+                variables=msg_variables,
+            )
             logger.info(
                 "Published msg_odoo_task_done correlation_key=%s (task_id=%s, pik=%s)",
                 correlation_key, task_id, pik,
             )
-            return web.json_response({
+            return _json_response({
                 "status": "published",
                 "message": "msg_odoo_task_done",
                 "correlation_key": correlation_key,
@@ -655,7 +774,7 @@ class WebhookServer:
 
             if resp.status_code in (200, 204):
                 logger.info("Completed user task %s", user_task_key)
-                return web.json_response({"status": "completed", "user_task_key": user_task_key})
+                return _json_response({"status": "completed", "user_task_key": user_task_key})
             else:
                 logger.error("Failed to complete user task %s: HTTP %d %s", user_task_key, resp.status_code, resp.text)
                 return web.Response(status=502, text=f"Complete failed: HTTP {resp.status_code}")
@@ -701,7 +820,7 @@ class WebhookServer:
         if old_shas:
             await self._rollback_sync_state(old_shas)
 
-        return web.json_response({
+        return _json_response({
             "status": "cancelled",
             "process_instance_key": pik,
         })
@@ -784,13 +903,27 @@ class WebhookServer:
 
     # -- Helpers ---------------------------------------------------
 
-    @staticmethod
-    def _verify_github_signature(body: bytes, secret: str, signature: str) -> bool:
-        if not signature.startswith('sha256='):
+    def _check_github_delivery(self, body: bytes, delivery_id: str, signature: str) -> bool:
+        """Verify a delivery, skipping the HMAC for an identical redelivery.
+
+        Verified bodies are remembered per ``(delivery_id, signature)``; a hit
+        only counts when the body is byte-for-byte the one that was verified.
+        """
+        key = (delivery_id, signature)
+        if delivery_id:
+            cached = self._verified_deliveries.get(key)
+            if cached is not None and cached == body:
+                self._verified_deliveries.move_to_end(key)
+                return True
+
+        if not _verify_github_signature(body, self._github_hmac, signature):
             return False
-        expected = hmac.new(
-            secret.encode('utf-8'),
-            body,
-            hashlib.sha256,
-        ).hexdigest()
-        return hmac.compare_digest(f'sha256={expected}', signature)
+
+        if delivery_id:
+            self._verified_deliveries[key] = body
+            if len(self._verified_deliveries) > _VERIFIED_DELIVERIES_MAX:
+                self._verified_deliveries.popitem(last=False)
+        return True
+
+    # Kept for callers that still reach it through the class.
+    _verify_github_signature = staticmethod(_verify_github_signature)
@@ -11,13 +11,14 @@ import asyncio
 import logging
 import os
 import signal
+import ssl
 import traceback
 
 from pyzeebe import Job, ZeebeWorker
 from pyzeebe.job.job import JobController
 from pyzeebe.worker.job_poller import JobPoller
 
-from .auth import ZeebeAuthConfig, close_channel, create_channel
+from .auth import ZeebeAuthConfig, close_channel, create_channel, get_token_manager
 from .config import AppConfig
 from .github_client import GitHubClient
 from .handlers import register_all_handlers
@@ -158,8 +159,12 @@ def _wrap_handler(original_handler):
     return wrapper
 
 
-async def create_worker(config: AppConfig) -> tuple[ZeebeWorker, object]:
-    """Create a ZeebeWorker with all handlers registered."""
+async def create_worker(config: AppConfig) -> tuple[ZeebeWorker, object, GitHubClient, OdooClient]:
+    """Create a ZeebeWorker with all handlers registered.
+
+    Returns the worker, its channel and the shared GitHub and Odoo clients;
+    the caller closes the last three when the worker is torn down.
+    """
     auth_config = ZeebeAuthConfig(
         gateway_address=config.zeebe.gateway_address,
         client_id=config.zeebe.client_id,
@@ -179,7 +184,7 @@ async def create_worker(config: AppConfig) -> tuple[ZeebeWorker, object]:
     )
 
     # Shared clients
-    ssh = AsyncSSHClient(key_path=config.ssh_key_path)
+    ssh = AsyncSSHClient(key_path=config.ssh_key_path, max_sessions=config.max_parallel_ssh)
     github = GitHubClient(
         token=config.github.token,
         deploy_pat=config.github.deploy_pat,
@@ -191,7 +196,7 @@ async def create_worker(config: AppConfig) -> tuple[ZeebeWorker, object]:
     for task in worker.tasks:
         task.job_handler = _wrap_handler(task.job_handler)
 
-    return worker, channel
+    return worker, channel, github, odoo
 
 
 async def _release_active_jobs() -> None:
@@ -230,7 +235,7 @@ async def _cleanup_orphan_clickbot(config: AppConfig) -> None:
         try:
             result = await ssh.run(
                 server,
-                f"cd {server.repo_dir} && docker compose -f docker-compose.clickbot.yml down -v 2>/dev/null || true",
+                f"cd {server.repo_dir} && docker compose -f docker-compose.clickbot.yml down 2>/dev/null || true",
                 timeout=30,
             )
             logger.info("Clickbot cleanup on %s (%s): exit %d", name, server.host, result.exit_code)
@@ -290,11 +295,13 @@ async def worker_loop(config: AppConfig, stop_event: asyncio.Event) -> None:
 
     while not stop_event.is_set():
         channel = None
+        github: GitHubClient | None = None
+        odoo: OdooClient | None = None
         polling_stop = asyncio.Event()
         heartbeat_task: asyncio.Task | None = None
         stale_guard_task: asyncio.Task | None = None
         try:
-            worker, channel = await create_worker(config)
+            worker, channel, github, odoo = await create_worker(config)
             task_types = {task.type for task in worker.tasks}
             await guard_stale_jobs(task_types, context="Startup")
             logger.info("Worker started. Listening for jobs...")
@@ -349,6 +356,10 @@ async def worker_loop(config: AppConfig, stop_event: asyncio.Event) -> None:
                 except asyncio.CancelledError:
                     pass
             await close_channel(channel)
+            if github is not None:
+                await github.aclose()
+            if odoo is not None:
+                await odoo.aclose()
 
         await asyncio.sleep(restart_delay)
 
@@ -387,6 +398,9 @@ async def main() -> None:
     _validate_config(config)
     _patch_job_poller_health()
 
+    # hmac/hashlib dispatch SHA-256 to libcrypto, which picks SHA-NI /
+    # ARMv8 crypto extensions at runtime when the CPU exposes them.
+    logger.info("Webhook HMAC-SHA256 backend: %s", ssl.OPENSSL_VERSION)
     logger.info("Connecting to Zeebe at %s", config.zeebe.gateway_address)
 
     # Graceful shutdown
@@ -408,6 +422,10 @@ async def main() -> None:
         _incident_janitor_loop(config, stop_event),
     )
 
+    token_manager = get_token_manager()
+    if token_manager is not None:
+        token_manager.close()
+
     logger.info("All services stopped.")
 
 
@@ -36,48 +36,20 @@ _shutdown = False
 
 
 def _create_channel():
-    """Create gRPC channel for Zeebe (insecure + OAuth2 Bearer interceptor)."""
-    import grpc
-
-    gateway = os.environ.get("ZEEBE_ADDRESS", "zeebe:26500")
-    client_id = os.environ.get("ZEEBE_CLIENT_ID", "")
-    client_secret = os.environ.get("ZEEBE_CLIENT_SECRET", "")
-    token_url = os.environ.get("ZEEBE_TOKEN_URL", "")
-    use_oauth = bool(client_id and client_secret and token_url)
-
-    keepalive_options = [
-        ('grpc.keepalive_time_ms', 60_000),
-        ('grpc.keepalive_timeout_ms', 20_000),
-        ('grpc.keepalive_permit_without_calls', 1),
-        ('grpc.http2.max_pings_without_data', 0),
-        ('grpc.http2.min_time_between_pings_ms', 60_000),
-        ('grpc.http2.min_ping_interval_without_data_ms', 60_000),
-    ]
-
-    if use_oauth:
-        from worker.auth import TokenManager, _UnaryUnaryTokenInterceptor, _UnaryStreamTokenInterceptor
-
-        token_manager = TokenManager(
-            client_id=client_id,
-            client_secret=client_secret,
-            token_url=token_url,
-            audience=os.environ.get("ZEEBE_TOKEN_AUDIENCE", ""),
-        )
-        token_manager.refresh_token()
-
-        interceptors = [
-            _UnaryUnaryTokenInterceptor(token_manager),
-            _UnaryStreamTokenInterceptor(token_manager),
-        ]
-        channel = grpc.aio.insecure_channel(
-            gateway, interceptors=interceptors, options=keepalive_options,
-        )
-        logger.info("Zeebe channel: insecure + OAuth2 Bearer → %s", gateway)
-    else:
-        channel = grpc.aio.insecure_channel(gateway, options=keepalive_options)
-        logger.info("Zeebe channel: insecure → %s", gateway)
-
-    return channel
+    """Create gRPC channel for Zeebe (insecure + OAuth2 Bearer interceptor).
+
+    Delegates to ``worker.auth.create_channel`` so both workers share one
+    channel/keepalive/token-refresh implementation.
+    """
+    from worker.auth import ZeebeAuthConfig, create_channel
+
+    return create_channel(ZeebeAuthConfig(
+        gateway_address=os.environ.get("ZEEBE_ADDRESS", "zeebe:26500"),
+        client_id=os.environ.get("ZEEBE_CLIENT_ID", ""),
+        client_secret=os.environ.get("ZEEBE_CLIENT_SECRET", ""),
+        token_url=os.environ.get("ZEEBE_TOKEN_URL", ""),
+        audience=os.environ.get("ZEEBE_TOKEN_AUDIENCE", ""),
+    ))
 
 
 # ── Exception handler ────────────────────────────────────────────────